@@ -22,6 +22,7 @@ DRAWING_MODES = {
     "rectangle_center": "Прямоугольник от центра",
     "spline_bezier": "Сплайн Безье",
     "spline_segments": "Сплайн по отрезкам",
+    "select": "Выбор объектов",
 }
 
 GROUPED_DRAWING_MODES = {
@@ -30,6 +31,7 @@ GROUPED_DRAWING_MODES = {
     "Прямоугольник": ["rectangle_sides", "rectangle_center"],
     "Многоугольник": ["polygon", "polygon_inscribed", "polygon_circumscribed"],
     "Сплайн": ["spline_bezier", "spline_segments"],
+    "Выбор": ["select"],
 }
 
 GROUP_ORDER = [
@@ -82,10 +84,47 @@ STANDART_THICKNESSES = [
 GRID_SIZE = 50
 GRID_RANGE = [1, 1000]
 SNAP_GRID = False
+POLAR_SNAP_ANGLE = 15
+SNAP_OBJECTS = True
+SNAP_APERTURE = 10
+SNAP_MAX_SHAPES = 8
+INTERSECTION_MAX_CELLS = 64
+
+OBJECT_SNAP_NAMES = {
+    "endpoint": "Конечная точка",
+    "midpoint": "Середина",
+    "center": "Центр",
+    "quadrant": "Квадрант",
+    "vertex": "Вершина",
+    "intersection": "Пересечение",
+    "nearest": "Ближайшая",
+}
 
 SCALE_STEP = 0.01
 SCALE_LIMITS = [0.001, 3000]
 CANVAS_LIMIT = 10000
+SPATIAL_INDEX_CELL_SIZE = 25
+SPATIAL_INDEX_MAX_CELLS = 256
+PICK_TOLERANCE = 5
+TILE_SIZE = 256
+TILE_CACHE_LIMIT = 256
+CURVE_FLATNESS_TOLERANCE = 0.25
+CURVE_ZOOM_BUCKET_STEP = 2
+CURVE_MAX_SEGMENTS = 4096
+CURVE_CACHE_BUCKETS = 4
+PEN_LENGTH_STEP = 0.001
+LOD_ENABLED = True
+LOD_SKIP_SIZE = 0.1
+LOD_POINT_SIZE = 1.0
+LOD_CHORD_SIZE = 4.0
+TREE_FETCH_BATCH = 500
+DXF_IMPORT_CHUNK_SIZE = 2000
+DXF_STREAMING_IMPORT_SIZE = 256 * 1024 * 1024
+DXF_PARALLEL_IMPORT_SIZE = 16 * 1024 * 1024
+DXF_IMPORT_PROCESSES = None
+AUTOSAVE_INTERVAL = 5 * 60
+AUTOSAVE_FILE_PREFIX = "d-flex-autosave"
+UNDO_MEMORY_LIMIT = 64 * 1024 * 1024
 BACKGROUND_IMAGE = "resources/themes/bg2.jpg"
 TOOLBAR_HEIGHT = 150
 
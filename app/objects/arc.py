@@ -1,9 +1,91 @@
 import math
+import numpy as np
 from PySide6.QtCore import QRectF, QPointF
-from app.objects.parent import Geometry
+from app.objects.parent import Geometry, points_bounding_rect, polyline_intersects_rect
+
+
+def arc_bounding_rect(center, radius, start_angle, span_angle):
+    """Точные габариты дуги, идущей от start_angle на span_angle градусов"""
+    angles = [start_angle, start_angle + span_angle]
+    # Крайние точки окружности, попадающие в угловой диапазон дуги
+    for axis_angle in (0, 90, 180, 270):
+        if (axis_angle - start_angle) % 360 <= span_angle:
+            angles.append(axis_angle)
+    points = [
+        QPointF(
+            center.x() + radius * math.cos(math.radians(angle)),
+            center.y() + radius * math.sin(math.radians(angle)),
+        )
+        for angle in angles
+    ]
+    return points_bounding_rect(points)
+
+
+def arc_chord_points(center, radius, start_angle, span_angle):
+    """Начало, середина и конец дуги"""
+    return [
+        QPointF(
+            center.x() + radius * math.cos(math.radians(angle)),
+            center.y() + radius * math.sin(math.radians(angle)),
+        )
+        for angle in (
+            start_angle,
+            start_angle + span_angle / 2,
+            start_angle + span_angle,
+        )
+    ]
+
+
+def arc_distance(center, radius, start_angle, span_angle, x, y):
+    """Расстояние от точки (x, y) до дуги, идущей от start_angle на span_angle"""
+    dx = x - center.x()
+    dy = y - center.y()
+    angle = math.degrees(math.atan2(dy, dx))
+    if (angle - start_angle) % 360 <= span_angle:
+        return abs(math.hypot(dx, dy) - radius)
+    # Ближайшая точка дуги - один из её концов
+    return min(
+        math.hypot(
+            x - center.x() - radius * math.cos(math.radians(end)),
+            y - center.y() - radius * math.sin(math.radians(end)),
+        )
+        for end in (start_angle, start_angle + span_angle)
+    )
+
+
+def arc_polyline(center, radius, start_angle, span_angle, step=2.0):
+    """Точки дуги через каждые step градусов (массив N x 2)"""
+    count = max(2, math.ceil(abs(span_angle) / step) + 1)
+    angles = np.radians(np.linspace(start_angle, start_angle + span_angle, count))
+    return np.column_stack(
+        (center.x() + radius * np.cos(angles), center.y() + radius * np.sin(angles))
+    )
+
+
+def arc_snap_points(center, radius, start_angle, span_angle):
+    """Концы, середина и центр дуги, а также лежащие на ней квадранты"""
+    start, middle, end = arc_chord_points(center, radius, start_angle, span_angle)
+    points = [
+        ("endpoint", start.x(), start.y()),
+        ("endpoint", end.x(), end.y()),
+        ("midpoint", middle.x(), middle.y()),
+        ("center", center.x(), center.y()),
+    ]
+    for angle in (0, 90, 180, 270):
+        if (angle - start_angle) % 360 <= span_angle:
+            points.append(
+                (
+                    "quadrant",
+                    center.x() + radius * math.cos(math.radians(angle)),
+                    center.y() + radius * math.sin(math.radians(angle)),
+                )
+            )
+    return points
 
 
 class ArcByThreePoints(Geometry):
+    __slots__ = ("points",)
+
     def __init__(
         self,
         points,
@@ -28,6 +110,55 @@ class ArcByThreePoints(Geometry):
         rect = QRectF(center.x() - radius, center.y() - radius, 2 * radius, 2 * radius)
         painter.drawArc(rect, int(-start_angle * 16), int(-span_angle * 16))
 
+    def _compute_bounding_rect(self):
+        if len(self.points) < 3:
+            return points_bounding_rect(self.points)
+        center, radius, start_angle, span_angle = self.calculate_arc()
+        if radius is None:
+            return points_bounding_rect(self.points)
+        return arc_bounding_rect(center, radius, start_angle, span_angle)
+
+    def chord_points(self):
+        if len(self.points) < 3:
+            return None
+        center, radius, start_angle, span_angle = self.calculate_arc()
+        if radius is None:
+            return list(self.points)
+        return arc_chord_points(center, radius, start_angle, span_angle)
+
+    def distance_to_point(self, x, y):
+        if len(self.points) < 3:
+            return math.inf
+        center, radius, start_angle, span_angle = self.calculate_arc()
+        if radius is None:
+            return math.inf
+        return arc_distance(center, radius, start_angle, span_angle, x, y)
+
+    def intersects_rect(self, rect):
+        if len(self.points) < 3:
+            return False
+        center, radius, start_angle, span_angle = self.calculate_arc()
+        if radius is None:
+            return False
+        polyline = arc_polyline(center, radius, start_angle, span_angle)
+        return polyline_intersects_rect(polyline, rect)
+
+    def snap_points(self):
+        if len(self.points) < 3:
+            return []
+        center, radius, start_angle, span_angle = self.calculate_arc()
+        if radius is None:
+            return []
+        return arc_snap_points(center, radius, start_angle, span_angle)
+
+    def outline(self):
+        if len(self.points) < 3:
+            return []
+        center, radius, start_angle, span_angle = self.calculate_arc()
+        if radius is None:
+            return []
+        return [("arc", center.x(), center.y(), radius, start_angle, span_angle)]
+
     def get_total_length(self):
         if len(self.points) < 3:
             return 0
@@ -69,6 +200,8 @@ class ArcByThreePoints(Geometry):
 
 
 class ArcByRadiusChord(Geometry):
+    __slots__ = ("center", "radius_point", "chord_point")
+
     def __init__(
         self,
         center,
@@ -126,6 +259,32 @@ class ArcByRadiusChord(Geometry):
 
         return radius, start_angle, span_angle
 
+    def _compute_bounding_rect(self):
+        radius, start_angle, span_angle = self.calculate_arc()
+        return arc_bounding_rect(self.center, radius, start_angle, span_angle)
+
+    def chord_points(self):
+        radius, start_angle, span_angle = self.calculate_arc()
+        return arc_chord_points(self.center, radius, start_angle, span_angle)
+
+    def distance_to_point(self, x, y):
+        radius, start_angle, span_angle = self.calculate_arc()
+        return arc_distance(self.center, radius, start_angle, span_angle, x, y)
+
+    def intersects_rect(self, rect):
+        radius, start_angle, span_angle = self.calculate_arc()
+        polyline = arc_polyline(self.center, radius, start_angle, span_angle)
+        return polyline_intersects_rect(polyline, rect)
+
+    def snap_points(self):
+        radius, start_angle, span_angle = self.calculate_arc()
+        return arc_snap_points(self.center, radius, start_angle, span_angle)
+
+    def outline(self):
+        radius, start_angle, span_angle = self.calculate_arc()
+        center = self.center
+        return [("arc", center.x(), center.y(), radius, start_angle, span_angle)]
+
     def get_total_length(self):
         radius, _, span_angle = self.calculate_arc()
         return radius * abs(math.radians(span_angle))
@@ -1,9 +1,43 @@
 import math
 from PySide6.QtCore import QRectF, QPointF
-from app.objects.parent import Geometry
+from app.objects.parent import Geometry, points_bounding_rect
+
+
+def circle_bounding_rect(center, radius):
+    return QRectF(center.x() - radius, center.y() - radius, 2 * radius, 2 * radius)
+
+
+def circle_intersects_rect(center, radius, rect):
+    """Проходит ли окружность через прямоугольник QRectF"""
+    x, y = center.x(), center.y()
+    # Ближайшая к центру точка прямоугольника должна лежать не дальше радиуса,
+    # а самая дальняя (один из углов) - не ближе
+    nearest = math.hypot(
+        x - min(max(x, rect.left()), rect.right()),
+        y - min(max(y, rect.top()), rect.bottom()),
+    )
+    farthest = math.hypot(
+        max(abs(x - rect.left()), abs(x - rect.right())),
+        max(abs(y - rect.top()), abs(y - rect.bottom())),
+    )
+    return nearest <= radius <= farthest
+
+
+def circle_snap_points(center, radius):
+    """Центр и квадранты окружности"""
+    x, y = center.x(), center.y()
+    return [
+        ("center", x, y),
+        ("quadrant", x + radius, y),
+        ("quadrant", x, y + radius),
+        ("quadrant", x - radius, y),
+        ("quadrant", x, y - radius),
+    ]
 
 
 class Circle(Geometry):
+    __slots__ = ("center", "radius")
+
     def __init__(
         self,
         center,
@@ -30,11 +64,28 @@ class Circle(Geometry):
         )
         painter.drawEllipse(rect)
 
+    def _compute_bounding_rect(self):
+        return circle_bounding_rect(self.center, self.radius)
+
+    def distance_to_point(self, x, y):
+        return abs(math.hypot(x - self.center.x(), y - self.center.y()) - self.radius)
+
+    def intersects_rect(self, rect):
+        return circle_intersects_rect(self.center, self.radius, rect)
+
+    def snap_points(self):
+        return circle_snap_points(self.center, self.radius)
+
+    def outline(self):
+        return [("arc", self.center.x(), self.center.y(), self.radius, 0.0, 360.0)]
+
     def get_total_length(self):
         return 2 * math.pi * self.radius
 
 
 class CircleByThreePoints(Geometry):
+    __slots__ = ("points",)
+
     def __init__(
         self,
         points,
@@ -59,6 +110,46 @@ class CircleByThreePoints(Geometry):
         rect = QRectF(center.x() - radius, center.y() - radius, 2 * radius, 2 * radius)
         painter.drawEllipse(rect)
 
+    def _compute_bounding_rect(self):
+        if len(self.points) < 3:
+            return points_bounding_rect(self.points)
+        center, radius = self.calculate_circle()
+        if radius is None:
+            return points_bounding_rect(self.points)
+        return circle_bounding_rect(center, radius)
+
+    def distance_to_point(self, x, y):
+        if len(self.points) < 3:
+            return math.inf
+        center, radius = self.calculate_circle()
+        if radius is None:
+            return math.inf
+        return abs(math.hypot(x - center.x(), y - center.y()) - radius)
+
+    def intersects_rect(self, rect):
+        if len(self.points) < 3:
+            return False
+        center, radius = self.calculate_circle()
+        if radius is None:
+            return False
+        return circle_intersects_rect(center, radius, rect)
+
+    def snap_points(self):
+        if len(self.points) < 3:
+            return []
+        center, radius = self.calculate_circle()
+        if radius is None:
+            return []
+        return circle_snap_points(center, radius)
+
+    def outline(self):
+        if len(self.points) < 3:
+            return []
+        center, radius = self.calculate_circle()
+        if radius is None:
+            return []
+        return [("arc", center.x(), center.y(), radius, 0.0, 360.0)]
+
     def get_total_length(self):
         if len(self.points) < 3:
             return 0
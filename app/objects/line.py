@@ -1,8 +1,16 @@
 import math
-from app.objects.parent import Geometry
+from PySide6.QtCore import QLineF
+from app.objects.parent import (
+    Geometry,
+    points_bounding_rect,
+    segment_distance,
+    segment_intersects_rect,
+)
 
 
 class Line(Geometry):
+    __slots__ = ("start_point", "end_point", "_line")
+
     def __init__(
         self,
         start_point,
@@ -21,7 +29,46 @@ class Line(Geometry):
 
     def draw(self, painter, pen=None):
         super().draw(painter, pen)
-        painter.drawLine(self.start_point, self.end_point)
+        painter.drawLine(self.line())
+
+    def invalidate(self):
+        super().invalidate()
+        self._line = None
+
+    def line(self):
+        """Отрезок в виде QLineF; запоминается до изменения фигуры"""
+        if self._line is None:
+            self._line = QLineF(self.start_point, self.end_point)
+        return self._line
+
+    def segment(self):
+        """Координаты отрезка (x1, y1, x2, y2)"""
+        return (
+            self.start_point.x(),
+            self.start_point.y(),
+            self.end_point.x(),
+            self.end_point.y(),
+        )
+
+    def _compute_bounding_rect(self):
+        return points_bounding_rect([self.start_point, self.end_point])
+
+    def distance_to_point(self, x, y):
+        return segment_distance(x, y, *self.segment())
+
+    def intersects_rect(self, rect):
+        return segment_intersects_rect(*self.segment(), rect)
+
+    def snap_points(self):
+        x1, y1, x2, y2 = self.segment()
+        return [
+            ("endpoint", x1, y1),
+            ("endpoint", x2, y2),
+            ("midpoint", (x1 + x2) / 2, (y1 + y2) / 2),
+        ]
+
+    def outline(self):
+        return [("segment", *self.segment())]
 
     def get_total_length(self):
         return math.hypot(
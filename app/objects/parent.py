@@ -1,11 +1,168 @@
-from PySide6.QtGui import QPen, QColor
+from PySide6.QtGui import QPen
 from PySide6.QtCore import Qt
 import math
+import weakref
+import numpy as np
 from PySide6.QtCore import QPointF
 from PySide6.QtCore import QRectF
+from app.objects.style import Style
+from app.config.config import PEN_LENGTH_STEP
+
+# Атрибуты, изменение которых меняет форму фигуры
+GEOMETRY_ATTRIBUTES = {
+    "points",
+    "start_point",
+    "end_point",
+    "center",
+    "radius",
+    "radius_point",
+    "chord_point",
+    "rect",
+}
+
+DASHED_LINE_TYPES = ("dash", "dash_dot", "dash_dot_dot")
+
+# Перья, общие для фигур: стиль -> {(длина, замкнутость): QPen}
+_pens = weakref.WeakKeyDictionary()
+
+
+def length_bucket(length):
+    """Длина, округлённая до относительного шага PEN_LENGTH_STEP"""
+    if length <= 0:
+        return 1.0
+    step = math.log1p(PEN_LENGTH_STEP)
+    return math.exp(round(math.log(length) / step) * step)
+
+
+def painter_scale(painter):
+    """Во сколько раз painter увеличивает логические длины на устройстве"""
+    return math.sqrt(abs(painter.deviceTransform().determinant()))
+
+
+def points_bounding_rect(points):
+    """Наименьший прямоугольник, содержащий все точки"""
+    if not points:
+        return None
+    xs = [p.x() for p in points]
+    ys = [p.y() for p in points]
+    return QRectF(QPointF(min(xs), min(ys)), QPointF(max(xs), max(ys)))
+
+
+def segment_distance(px, py, x1, y1, x2, y2):
+    """Расстояние от точки (px, py) до отрезка"""
+    dx = x2 - x1
+    dy = y2 - y1
+    length_squared = dx * dx + dy * dy
+    if length_squared == 0:
+        return math.hypot(px - x1, py - y1)
+    t = ((px - x1) * dx + (py - y1) * dy) / length_squared
+    t = max(0.0, min(1.0, t))
+    return math.hypot(px - x1 - t * dx, py - y1 - t * dy)
+
+
+def polyline_distance(coords, px, py, closed=False):
+    """Расстояние от точки до ломаной (массив N x 2); closed - ломаная замкнута"""
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    if len(coords) < 2:
+        if not len(coords):
+            return math.inf
+        return math.hypot(coords[0, 0] - px, coords[0, 1] - py)
+    if closed:
+        starts, ends = coords, np.roll(coords, -1, axis=0)
+    else:
+        starts, ends = coords[:-1], coords[1:]
+    deltas = ends - starts
+    offsets = (px, py) - starts
+    length_squared = np.einsum("ij,ij->i", deltas, deltas)
+    t = np.einsum("ij,ij->i", offsets, deltas)
+    t = np.clip(np.divide(t, length_squared, where=length_squared > 0, out=t), 0, 1)
+    nearest = offsets - deltas * t[:, None]
+    return float(np.sqrt(np.einsum("ij,ij->i", nearest, nearest).min()))
+
+
+def segment_intersects_rect(x1, y1, x2, y2, rect):
+    """Пересекает ли отрезок прямоугольник QRectF (отсечение Лианга - Барски)"""
+    t0, t1 = 0.0, 1.0
+    for start, delta, low, high in (
+        (x1, x2 - x1, rect.left(), rect.right()),
+        (y1, y2 - y1, rect.top(), rect.bottom()),
+    ):
+        if delta == 0:
+            if start < low or start > high:
+                return False
+            continue
+        ta = (low - start) / delta
+        tb = (high - start) / delta
+        t0 = max(t0, min(ta, tb))
+        t1 = min(t1, max(ta, tb))
+        if t0 > t1:
+            return False
+    return True
+
+
+def polyline_intersects_rect(coords, rect, closed=False):
+    """Пересекает ли ломаная (массив N x 2) прямоугольник QRectF"""
+    coords = np.asarray(coords, dtype=float).reshape(-1, 2)
+    if len(coords) < 2:
+        return bool(len(coords)) and rect.contains(QPointF(*coords[0]))
+    if closed:
+        starts, ends = coords, np.roll(coords, -1, axis=0)
+    else:
+        starts, ends = coords[:-1], coords[1:]
+    deltas = ends - starts
+    t0 = np.zeros(len(starts))
+    t1 = np.ones(len(starts))
+    inside = np.ones(len(starts), dtype=bool)
+    for axis, low, high in (
+        (0, rect.left(), rect.right()),
+        (1, rect.top(), rect.bottom()),
+    ):
+        start = starts[:, axis]
+        delta = deltas[:, axis]
+        moving = delta != 0
+        inside &= moving | ((start >= low) & (start <= high))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ta = (low - start) / delta
+            tb = (high - start) / delta
+        t0 = np.where(moving, np.maximum(t0, np.minimum(ta, tb)), t0)
+        t1 = np.where(moving, np.minimum(t1, np.maximum(ta, tb)), t1)
+    return bool((inside & (t0 <= t1)).any())
+
+
+def polyline_outline(coords, closed=False):
+    """Контур ломаной в виде участков ("segment", x1, y1, x2, y2)"""
+    coords = [tuple(point) for point in coords]
+    if closed and len(coords) > 2:
+        coords.append(coords[0])
+    return [("segment", *start, *end) for start, end in zip(coords, coords[1:])]
+
+
+def polyline_snap_points(coords, closed=False):
+    """Точки привязки ломаной: вершины (у незамкнутой - концы) и середины"""
+    coords = [tuple(point) for point in coords]
+    if closed:
+        points = [("vertex", x, y) for x, y in coords]
+    else:
+        points = [("endpoint", *coords[0]), ("endpoint", *coords[-1])] if coords else []
+        points += [("vertex", x, y) for x, y in coords[1:-1]]
+    for _, x1, y1, x2, y2 in polyline_outline(coords, closed):
+        points.append(("midpoint", (x1 + x2) / 2, (y1 + y2) / 2))
+    return points
+
+
+def _style_field(name):
+    """Свойство фигуры, читающее поле её стиля; запись заменяет стиль целиком"""
+    return property(
+        lambda self: getattr(self.style, name),
+        lambda self, value: setattr(self, "style", self.style.replace(**{name: value})),
+    )
 
 
 class Geometry:
+    __slots__ = ("_bounding_rect", "_pen", "style", "__weakref__")
+
+    is_closed = False
+
     def __init__(
         self,
         line_type="solid",
@@ -14,12 +171,68 @@ class Geometry:
         dash_auto_mode=False,
         color=None,
     ):
-        self.line_type = line_type
-        self.line_thickness = line_thickness
-        self.dash_parameters = dash_parameters or {}
-        self.dash_auto_mode = dash_auto_mode
-        self.is_closed = False
-        self.color = color or QColor(0, 0, 0)
+        self._bounding_rect = None
+        self._pen = None
+        self.style = Style(
+            line_type, line_thickness, dash_parameters, dash_auto_mode, color
+        )
+
+    line_type = _style_field("line_type")
+    line_thickness = _style_field("line_thickness")
+    dash_parameters = _style_field("dash_parameters")
+    dash_auto_mode = _style_field("dash_auto_mode")
+    color = _style_field("color")
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in GEOMETRY_ATTRIBUTES:
+            self.invalidate()
+
+    @classmethod
+    def type_name(cls):
+        """Имя типа фигуры для отображения и группировки"""
+        return cls.__name__
+
+    def invalidate(self):
+        """Сбрасывает закэшированные данные после изменения формы фигуры.
+
+        Присваивание геометрических атрибутов вызывает его автоматически,
+        при изменении списка точек на месте его нужно вызвать явно.
+        """
+        self._bounding_rect = None
+        self._pen = None
+
+    def bounding_rect(self):
+        """Габаритный прямоугольник фигуры или None, если он не определён"""
+        if self._bounding_rect is None:
+            self._bounding_rect = self._compute_bounding_rect()
+        if self._bounding_rect is None:
+            return None
+        return QRectF(self._bounding_rect)
+
+    def _compute_bounding_rect(self):
+        return None
+
+    def chord_points(self):
+        """Ломаная, заменяющая кривую на мелком масштабе, или None"""
+        return None
+
+    def distance_to_point(self, x, y):
+        """Расстояние от точки до линии фигуры (без учёта толщины)"""
+        return math.inf
+
+    def intersects_rect(self, rect):
+        """Проходит ли линия фигуры через прямоугольник QRectF"""
+        bounds = self.bounding_rect()
+        return bounds is not None and bounds.intersects(rect)
+
+    def snap_points(self):
+        """Точки объектной привязки: список (вид, x, y)"""
+        return []
+
+    def outline(self):
+        """Контур фигуры из отрезков и дуг (см. app.utils.intersections)"""
+        return []
 
     def rotate_around_point(self, angle_degrees, center_point):
         """Поворачивает фигуру вокруг заданной точки"""
@@ -55,6 +268,27 @@ class Geometry:
         painter.setPen(pen if pen else self.create_pen())
 
     def create_pen(self):
+        """Перо фигуры.
+
+        Перья общие для фигур с одним стилем (а в режиме автоштриха - и с
+        близкой длиной) и не должны изменяться на месте. Фигура запоминает
+        своё перо до смены стиля или формы.
+        """
+        style = self.style
+        if self._pen is not None and self._pen[0] is style:
+            return self._pen[1]
+
+        key = None
+        if style.dash_auto_mode and style.line_type in DASHED_LINE_TYPES:
+            key = (length_bucket(self.get_total_length()), self.is_closed)
+        pens = _pens.setdefault(style, {})
+        pen = pens.get(key)
+        if pen is None:
+            pen = pens[key] = self._build_pen(key[0] if key else None)
+        self._pen = (style, pen)
+        return pen
+
+    def _build_pen(self, total_length=None):
         pen = QPen()
         pen.setColor(self.color)
         pen.setWidthF(self.line_thickness)
@@ -63,17 +297,17 @@ class Geometry:
 
         if self.line_type == "solid":
             pen.setStyle(Qt.SolidLine)
-        elif self.line_type in ["dash", "dash_dot", "dash_dot_dot"]:
+        elif self.line_type in DASHED_LINE_TYPES:
             pen.setStyle(Qt.CustomDashLine)
-            pen.setDashPattern(self._compute_dash_pattern())
+            pen.setDashPattern(self._compute_dash_pattern(total_length))
         else:
             pen.setStyle(Qt.SolidLine)
 
         return pen
 
-    def _compute_dash_pattern(self):
+    def _compute_dash_pattern(self, total_length=None):
         if self.dash_auto_mode:
-            total_length = self.get_total_length() or 1
+            total_length = total_length or self.get_total_length() or 1
             return self._generate_auto_dash_pattern(total_length)
         return self._generate_custom_dash_pattern()
 
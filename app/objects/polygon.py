@@ -1,8 +1,17 @@
 import math
-from app.objects.parent import Geometry
+from app.objects.parent import (
+    Geometry,
+    points_bounding_rect,
+    polyline_distance,
+    polyline_intersects_rect,
+    polyline_outline,
+    polyline_snap_points,
+)
 
 
 class Polygon(Geometry):
+    __slots__ = ("points",)
+
     def __init__(
         self,
         points,
@@ -23,6 +32,34 @@ class Polygon(Geometry):
         super().draw(painter, pen)
         painter.drawPolygon(self.points)
 
+    def coordinates(self):
+        """Вершины в виде списка кортежей (x, y)"""
+        return [(point.x(), point.y()) for point in self.points]
+
+    def _compute_bounding_rect(self):
+        return points_bounding_rect(self.points)
+
+    def distance_to_point(self, x, y):
+        # Многоугольник из двух точек не рисуется
+        if len(self.points) < 3:
+            return math.inf
+        return polyline_distance(self.coordinates(), x, y, closed=True)
+
+    def intersects_rect(self, rect):
+        if len(self.points) < 3:
+            return False
+        return polyline_intersects_rect(self.coordinates(), rect, closed=True)
+
+    def snap_points(self):
+        if len(self.points) < 3:
+            return []
+        return polyline_snap_points(self.coordinates(), closed=True)
+
+    def outline(self):
+        if len(self.points) < 3:
+            return []
+        return polyline_outline(self.coordinates(), closed=True)
+
     def get_total_length(self):
         if len(self.points) < 2:
             return 0
@@ -1,7 +1,15 @@
-from app.objects.parent import Geometry
+from app.objects.parent import (
+    Geometry,
+    polyline_distance,
+    polyline_intersects_rect,
+    polyline_outline,
+    polyline_snap_points,
+)
 
 
 class Rectangle(Geometry):
+    __slots__ = ("rect",)
+
     def __init__(
         self,
         rect,
@@ -20,5 +28,33 @@ class Rectangle(Geometry):
         super().draw(painter, pen)
         painter.drawRect(self.rect)
 
+    def _compute_bounding_rect(self):
+        return self.rect.normalized()
+
+    def corners(self):
+        rect = self.rect
+        return [
+            (rect.left(), rect.top()),
+            (rect.right(), rect.top()),
+            (rect.right(), rect.bottom()),
+            (rect.left(), rect.bottom()),
+        ]
+
+    def distance_to_point(self, x, y):
+        return polyline_distance(self.corners(), x, y, closed=True)
+
+    def intersects_rect(self, rect):
+        return polyline_intersects_rect(self.corners(), rect, closed=True)
+
+    def snap_points(self):
+        # Углы прямоугольника - концы его сторон
+        return [
+            ("endpoint" if kind == "vertex" else kind, x, y)
+            for kind, x, y in polyline_snap_points(self.corners(), closed=True)
+        ]
+
+    def outline(self):
+        return polyline_outline(self.corners(), closed=True)
+
     def get_total_length(self):
         return 2 * (self.rect.width() + self.rect.height())
@@ -0,0 +1,331 @@
+import math
+from itertools import starmap
+import numpy as np
+from PySide6.QtGui import QPolygonF
+from PySide6.QtCore import QPointF, QLineF, QRectF
+from app.objects.line import Line
+from app.objects.polygon import Polygon
+from app.objects.parent import (
+    polyline_distance,
+    polyline_intersects_rect,
+    polyline_outline,
+    polyline_snap_points,
+)
+from app.objects.style import Style
+
+
+class StyleTable:
+    """Нумерация стилей (Style) хранилища, чтобы хранить их номерами в массивах"""
+
+    def __init__(self):
+        self._styles = []
+        self._numbers = {}
+
+    def __len__(self):
+        return len(self._styles)
+
+    def __getitem__(self, number):
+        return self._styles[number]
+
+    def intern(
+        self,
+        line_type="solid",
+        line_thickness=1.0,
+        dash_parameters=None,
+        dash_auto_mode=False,
+        color=None,
+    ):
+        """Номер стиля с указанными параметрами"""
+        return self.number(
+            Style(line_type, line_thickness, dash_parameters, dash_auto_mode, color)
+        )
+
+    def number(self, style):
+        """Номер стиля в таблице; новый стиль добавляется при первом обращении"""
+        number = self._numbers.get(style)
+        if number is None:
+            number = len(self._styles)
+            self._styles.append(style)
+            self._numbers[style] = number
+        return number
+
+
+class ShapeStore:
+    """Хранилище отрезков и ломаных в непрерывных массивах float64.
+
+    Отрезок - строка (x1, y1, x2, y2) массива line_coords, ломаная - участок
+    массива vertices, заданный смещением и числом вершин. Стили хранятся
+    номерами в общей таблице styles. Фигуры холста для таких данных -
+    лёгкие представления StoredLine и StoredPolygon.
+    """
+
+    def __init__(self, styles=None):
+        self.styles = styles if styles is not None else StyleTable()
+        self.line_coords = np.empty((0, 4))
+        self.line_styles = np.empty(0, dtype=np.int32)
+        self.line_count = 0
+        self._segments = None
+        self.vertices = np.empty((0, 2))
+        self.vertex_count = 0
+        self.polygon_offsets = np.empty(0, dtype=np.int64)
+        self.polygon_sizes = np.empty(0, dtype=np.int64)
+        self.polygon_styles = np.empty(0, dtype=np.int32)
+        self.polygon_count = 0
+
+    def add_lines(self, coords, styles):
+        """Добавляет отрезки (массив N x 4) и возвращает их представления"""
+        coords = np.asarray(coords, dtype=float).reshape(-1, 4)
+        start = self.line_count
+        stop = start + len(coords)
+        self._reserve_lines(stop)
+        self.line_coords[start:stop] = coords
+        self.line_styles[start:stop] = styles
+        self.line_count = stop
+        if self._segments is not None:
+            self._segments.extend(starmap(QLineF, coords.tolist()))
+        return [StoredLine(self, row) for row in range(start, stop)]
+
+    def add_line(self, x1, y1, x2, y2, style):
+        return self.add_lines([(x1, y1, x2, y2)], style)[0]
+
+    def set_line_point(self, row, first, x, y):
+        """Меняет начало (first) или конец отрезка row"""
+        columns = slice(0, 2) if first else slice(2, 4)
+        self.line_coords[row, columns] = (x, y)
+        if self._segments is not None:
+            self._segments[row] = QLineF(*self.line_coords[row].tolist())
+
+    def line_segments(self):
+        """Все отрезки в виде списка QLineF для пакетной отрисовки.
+
+        Список строится при первом обращении и далее обновляется вместе
+        с массивом, поэтому при перерисовке объекты QLineF не создаются.
+        """
+        if self._segments is None:
+            coords = self.line_coords[: self.line_count].tolist()
+            self._segments = list(starmap(QLineF, coords))
+        return self._segments
+
+    def add_polygon(self, points, style):
+        """Добавляет ломаную (массив N x 2) и возвращает её представление"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        row = self.polygon_count
+        self._reserve_polygons(row + 1)
+        self.polygon_offsets[row] = self._append_vertices(points)
+        self.polygon_sizes[row] = len(points)
+        self.polygon_styles[row] = style
+        self.polygon_count = row + 1
+        return StoredPolygon(self, row)
+
+    def polygon_vertices(self, row):
+        offset = self.polygon_offsets[row]
+        return self.vertices[offset : offset + self.polygon_sizes[row]]
+
+    def set_polygon_vertices(self, row, points):
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        if len(points) == self.polygon_sizes[row]:
+            self.polygon_vertices(row)[:] = points
+            return
+        # Ломаная с другим числом вершин переносится в конец массива,
+        # старый участок остаётся неиспользуемым
+        self.polygon_offsets[row] = self._append_vertices(points)
+        self.polygon_sizes[row] = len(points)
+
+    def _append_vertices(self, points):
+        offset = self.vertex_count
+        self.vertices = _grow(self.vertices, offset + len(points))
+        self.vertices[offset : offset + len(points)] = points
+        self.vertex_count = offset + len(points)
+        return offset
+
+    def _reserve_lines(self, count):
+        self.line_coords = _grow(self.line_coords, count)
+        self.line_styles = _grow(self.line_styles, count)
+
+    def _reserve_polygons(self, count):
+        self.polygon_offsets = _grow(self.polygon_offsets, count)
+        self.polygon_sizes = _grow(self.polygon_sizes, count)
+        self.polygon_styles = _grow(self.polygon_styles, count)
+
+
+def _grow(array, count):
+    """Массив вместимостью не меньше count строк (с запасом в два раза)"""
+    if count <= len(array):
+        return array
+    grown = np.empty((max(count, 2 * len(array), 16),) + array.shape[1:], array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class _StoredStyle:
+    """Стиль фигуры, хранящийся номером в таблице стилей хранилища"""
+
+    __slots__ = ()
+
+    def _get_style(self):
+        return self._store.styles[self._style_numbers()[self._row]]
+
+    def _set_style(self, style):
+        self._style_numbers()[self._row] = self._store.styles.number(style)
+
+    style = property(_get_style, _set_style)
+
+    def bounding_rect(self):
+        # Габариты дёшево считаются по массиву, поэтому не запоминаются
+        return self._compute_bounding_rect()
+
+    def invalidate(self):
+        self._pen = None
+
+
+class StoredLine(_StoredStyle, Line):
+    """Отрезок, хранящийся строкой массива ShapeStore.line_coords"""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        object.__setattr__(self, "_store", store)
+        object.__setattr__(self, "_row", row)
+        object.__setattr__(self, "_pen", None)
+
+    def _style_numbers(self):
+        return self._store.line_styles
+
+    @classmethod
+    def type_name(cls):
+        return "Line"
+
+    def segment(self):
+        return tuple(self._store.line_coords[self._row].tolist())
+
+    def line(self):
+        return self._store.line_segments()[self._row]
+
+    def _set_point(self, first, point):
+        self._store.set_line_point(self._row, first, point.x(), point.y())
+
+    start_point = property(
+        lambda self: QPointF(*self._store.line_coords[self._row, :2].tolist()),
+        lambda self, point: self._set_point(True, point),
+    )
+    end_point = property(
+        lambda self: QPointF(*self._store.line_coords[self._row, 2:].tolist()),
+        lambda self, point: self._set_point(False, point),
+    )
+
+    def draw(self, painter, pen=None):
+        painter.setPen(pen if pen else self.create_pen())
+        painter.drawLine(self.line())
+
+    def _compute_bounding_rect(self):
+        x1, y1, x2, y2 = self.segment()
+        return QRectF(
+            QPointF(min(x1, x2), min(y1, y2)), QPointF(max(x1, x2), max(y1, y2))
+        )
+
+    def get_total_length(self):
+        x1, y1, x2, y2 = self.segment()
+        return math.hypot(x2 - x1, y2 - y1)
+
+
+class StoredPoints:
+    """Список вершин ломаной хранилища; запись сразу попадает в массив"""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def _array(self):
+        return self._store.polygon_vertices(self._row)
+
+    def __len__(self):
+        return int(self._store.polygon_sizes[self._row])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [QPointF(x, y) for x, y in self._array()[index].tolist()]
+        x, y = self._array()[index].tolist()
+        return QPointF(x, y)
+
+    def __setitem__(self, index, point):
+        self._array()[index] = (point.x(), point.y())
+
+    def __iter__(self):
+        return (QPointF(x, y) for x, y in self._array().tolist())
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+
+class StoredPolygon(_StoredStyle, Polygon):
+    """Ломаная, хранящаяся участком массива ShapeStore.vertices"""
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        object.__setattr__(self, "_store", store)
+        object.__setattr__(self, "_row", row)
+        object.__setattr__(self, "_pen", None)
+
+    def _style_numbers(self):
+        return self._store.polygon_styles
+
+    @classmethod
+    def type_name(cls):
+        return "Polygon"
+
+    def coordinates(self):
+        return [
+            tuple(point) for point in self._store.polygon_vertices(self._row).tolist()
+        ]
+
+    points = property(
+        lambda self: StoredPoints(self._store, self._row),
+        lambda self, points: self._store.set_polygon_vertices(
+            self._row, [(p.x(), p.y()) for p in points]
+        ),
+    )
+
+    def draw(self, painter, pen=None):
+        if self._store.polygon_sizes[self._row] < 3:
+            return
+        painter.setPen(pen if pen else self.create_pen())
+        painter.drawPolygon(QPolygonF(list(self.points)))
+
+    def _compute_bounding_rect(self):
+        vertices = self._store.polygon_vertices(self._row)
+        if not len(vertices):
+            return None
+        (left, top), (right, bottom) = vertices.min(axis=0), vertices.max(axis=0)
+        return QRectF(QPointF(left, top), QPointF(right, bottom))
+
+    def distance_to_point(self, x, y):
+        vertices = self._store.polygon_vertices(self._row)
+        if len(vertices) < 3:
+            return math.inf
+        return polyline_distance(vertices, x, y, closed=True)
+
+    def intersects_rect(self, rect):
+        vertices = self._store.polygon_vertices(self._row)
+        if len(vertices) < 3:
+            return False
+        return polyline_intersects_rect(vertices, rect, closed=True)
+
+    def snap_points(self):
+        if self._store.polygon_sizes[self._row] < 3:
+            return []
+        return polyline_snap_points(self.coordinates(), closed=True)
+
+    def outline(self):
+        if self._store.polygon_sizes[self._row] < 3:
+            return []
+        return polyline_outline(self.coordinates(), closed=True)
+
+    def get_total_length(self):
+        vertices = self._store.polygon_vertices(self._row)
+        if len(vertices) < 2:
+            return 0
+        deltas = vertices - np.roll(vertices, 1, axis=0)
+        return float(np.hypot(deltas[:, 0], deltas[:, 1]).sum())
@@ -1,12 +1,123 @@
 import math
-from PySide6.QtGui import QPainterPath, QPen, QColor
+from functools import lru_cache
+import numpy as np
+from PySide6.QtGui import QPainterPath, QPen, QColor, QPolygonF
 from PySide6.QtCore import QPointF, QRectF
-from app.objects.parent import Geometry
-from math import factorial
+from app.objects.parent import (
+    Geometry,
+    points_bounding_rect,
+    painter_scale,
+    polyline_distance,
+    polyline_intersects_rect,
+    polyline_outline,
+)
+from app.config.config import (
+    CURVE_FLATNESS_TOLERANCE,
+    CURVE_ZOOM_BUCKET_STEP,
+    CURVE_MAX_SEGMENTS,
+    CURVE_CACHE_BUCKETS,
+)
 from PySide6.QtCore import Qt
 
 
+def bernstein_basis(degree, t_values):
+    """Матрица базисных полиномов Бернштейна размера len(t_values) x (degree + 1).
+
+    Строится рекуррентно (как в алгоритме де Кастельжо), поэтому устойчива
+    и для кривых высокой степени, где биномиальные коэффициенты переполняются.
+    """
+    t = np.asarray(t_values, dtype=float)[:, None]
+    basis = np.zeros((t.shape[0], degree + 1))
+    basis[:, 0] = 1.0
+    for n in range(1, degree + 1):
+        shifted = basis[:, :n] * t
+        basis[:, :n] *= 1 - t
+        basis[:, 1 : n + 1] += shifted
+    return basis
+
+
+@lru_cache(maxsize=64)
+def uniform_bernstein_basis(degree, num_segments):
+    """Базис Бернштейна для равномерного разбиения [0, 1] на num_segments частей"""
+    basis = bernstein_basis(degree, np.linspace(0.0, 1.0, num_segments + 1))
+    basis.setflags(write=False)
+    return basis
+
+
+def zoom_bucket(painter):
+    """Номер диапазона масштаба, в котором рисует painter.
+
+    Диапазоны идут с шагом CURVE_ZOOM_BUCKET_STEP раз, номер округляется
+    вверх, чтобы разбиение было не грубее нужного для текущего масштаба.
+    """
+    scale = painter_scale(painter)
+    if not scale or not math.isfinite(scale):
+        return None
+    return math.ceil(math.log(scale, CURVE_ZOOM_BUCKET_STEP))
+
+
+def bucket_tolerance(bucket):
+    """Допустимое отклонение ломаной от кривой в логических единицах"""
+    return CURVE_FLATNESS_TOLERANCE / CURVE_ZOOM_BUCKET_STEP**bucket
+
+
+def bezier_segment_count(control, tolerance):
+    """Число равных по t отрезков, при котором ломаная отклоняется от кривой
+    Безье с опорными точками control (массив N x 2) не более чем на tolerance.
+
+    Используется оценка отклонения через вторые разности опорных точек:
+    n(n - 1) / 8 * max|P[i] - 2P[i + 1] + P[i + 2]| / segments^2.
+    """
+    degree = len(control) - 1
+    if degree < 2:
+        return 1
+    second = np.diff(control, n=2, axis=0)
+    spread = float(np.hypot(second[:, 0], second[:, 1]).max())
+    count = math.ceil(math.sqrt(degree * (degree - 1) * spread / (8 * tolerance)))
+    return max(1, min(count, CURVE_MAX_SEGMENTS))
+
+
+def _remember(cache, key, value):
+    """Кладёт значение в кэш разбиений, вытесняя самую старую запись"""
+    cache[key] = value
+    if len(cache) > CURVE_CACHE_BUCKETS:
+        del cache[next(iter(cache))]
+    return value
+
+
+def polyline_length(polyline):
+    """Длина ломаной, заданной массивом точек N x 2"""
+    if len(polyline) < 2:
+        return 0.0
+    deltas = np.diff(polyline, axis=0)
+    return float(np.hypot(deltas[:, 0], deltas[:, 1]).sum())
+
+
+def polyline_to_path(polyline):
+    path = QPainterPath()
+    if len(polyline) == 0:
+        return path
+    coords = polyline.tolist()
+    path.moveTo(*coords[0])
+    for x, y in coords[1:]:
+        path.lineTo(x, y)
+    return path
+
+
 class BezierSpline(Geometry):
+    __slots__ = (
+        "points",
+        "num_segments",
+        "is_editing",
+        "editing_index",
+        "control_point_size",
+        "highlight_index",
+        "is_completed",
+        "_polylines",
+        "_paths",
+        "_length",
+    )
+
     def __init__(
         self,
         points,
@@ -29,32 +140,63 @@ class BezierSpline(Geometry):
     @staticmethod
     def binomial_coefficient(n, k):
         """Вычисляет биномиальный коэффициент"""
-        return factorial(n) // (factorial(k) * factorial(n - k))
+        return math.comb(n, k)
+
+    def control_array(self):
+        """Контрольные точки в виде массива N x 2"""
+        return np.array([(p.x(), p.y()) for p in self.points], dtype=float)
+
+    def evaluate(self, t_values):
+        """Точки кривой для всех значений параметра t сразу (массив M x 2)"""
+        control = self.control_array()
+        return bernstein_basis(len(control) - 1, t_values) @ control
+
+    def invalidate(self):
+        super().invalidate()
+        # Ломаные по количеству сегментов, пути по диапазону масштаба
+        self._polylines = {}
+        self._paths = {}
+        self._length = None
+
+    def polyline(self, num_segments=None):
+        """Ломаная из num_segments + 1 точек кривой (массив M x 2, только чтение)"""
+        if num_segments is None:
+            num_segments = self.num_segments
+        polyline = self._polylines.get(num_segments)
+        if polyline is None:
+            control = self.control_array()
+            basis = uniform_bernstein_basis(len(control) - 1, num_segments)
+            polyline = basis @ control
+            polyline.setflags(write=False)
+            _remember(self._polylines, num_segments, polyline)
+        return polyline
+
+    def segment_count(self, bucket):
+        """Количество сегментов для диапазона масштаба bucket"""
+        if bucket is None:
+            return self.num_segments
+        return bezier_segment_count(self.control_array(), bucket_tolerance(bucket))
 
     def bezier_point(self, t):
         """Вычисляет точку на кривой Безье по параметру t"""
-        n = len(self.points) - 1
-        x, y = 0, 0
-        for i in range(n + 1):
-            binom = self.binomial_coefficient(n, i)
-            factor = (1 - t) ** (n - i) * t**i
-            x += binom * factor * self.points[i].x()
-            y += binom * factor * self.points[i].y()
+        x, y = self.evaluate([t])[0]
         return QPointF(x, y)
 
-    def generate_bezier_path(self):
+    def generate_bezier_path(self, num_segments=None):
         """Создает путь для кривой Безье"""
         if len(self.points) < 2:
             return None
+        return polyline_to_path(self.polyline(num_segments))
 
-        path = QPainterPath(self.points[0])
-        t_values = [i / self.num_segments for i in range(self.num_segments + 1)]
+    def painter_path(self, bucket=None):
+        """Закэшированный путь кривой для диапазона масштаба bucket.
 
-        for t in t_values[1:]:
-            point = self.bezier_point(t)
-            path.lineTo(point)
-
-        return path
+        Без bucket используется фиксированное разбиение num_segments.
+        """
+        if bucket in self._paths:
+            return self._paths[bucket]
+        path = self.generate_bezier_path(self.segment_count(bucket))
+        return _remember(self._paths, bucket, path)
 
     def draw(self, painter, pen=None):
         """Отрисовка сплайна и контрольных точек"""
@@ -63,7 +205,7 @@ class BezierSpline(Geometry):
 
         # Рисуем основную кривую
         super().draw(painter, pen)
-        path = self.generate_bezier_path()
+        path = self.painter_path(zoom_bucket(painter))
         if path:
             old_background_mode = painter.backgroundMode()
             painter.setBackgroundMode(Qt.TransparentMode)
@@ -74,35 +216,65 @@ class BezierSpline(Geometry):
         if not hasattr(self, "is_completed"):
             self.is_completed = False
 
+    def chord_points(self):
+        if len(self.points) < 2:
+            return None
+        # Середина кривой по алгоритму де Кастельжо
+        middle = list(self.points)
+        while len(middle) > 1:
+            middle = [(a + b) / 2 for a, b in zip(middle, middle[1:])]
+        return [self.points[0], middle[0], self.points[-1]]
+
     def get_closest_point(self, pos, threshold=10):
-        for i, point in enumerate(self.points):
-            if (point.x() - pos.x()) ** 2 + (point.y() - pos.y()) ** 2 < threshold**2:
-                return i
-        return None
+        """Индекс ближайшей к pos контрольной точки не дальше threshold или None"""
+        if not self.points:
+            return None
+        offsets = self.control_array() - (pos.x(), pos.y())
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        index = int(distances.argmin())
+        return index if distances[index] < threshold**2 else None
 
     def update_point(self, index, new_pos):
         if 0 <= index < len(self.points):
             self.points[index] = new_pos
+            self.invalidate()
 
-    def get_total_length(self):
+    def _compute_bounding_rect(self):
+        # Кривая Безье лежит внутри выпуклой оболочки контрольных точек
+        return points_bounding_rect(self.points)
+
+    def distance_to_point(self, x, y):
         if len(self.points) < 2:
-            return 0
+            return math.inf
+        return polyline_distance(self.polyline(), x, y)
 
-        length = 0
-        prev_point = self.bezier_point(0)
+    def intersects_rect(self, rect):
+        if len(self.points) < 2:
+            return False
+        return polyline_intersects_rect(self.polyline(), rect)
 
-        for i in range(1, self.num_segments + 1):
-            t = i / self.num_segments
-            current_point = self.bezier_point(t)
-            length += math.hypot(
-                current_point.x() - prev_point.x(), current_point.y() - prev_point.y()
-            )
-            prev_point = current_point
+    def snap_points(self):
+        if len(self.points) < 2:
+            return []
+        first, last = self.points[0], self.points[-1]
+        return [("endpoint", first.x(), first.y()), ("endpoint", last.x(), last.y())]
 
-        return length
+    def outline(self):
+        if len(self.points) < 2:
+            return []
+        return polyline_outline(self.polyline().tolist())
+
+    def get_total_length(self):
+        if len(self.points) < 2:
+            return 0
+        if self._length is None:
+            self._length = polyline_length(self.polyline())
+        return self._length
 
 
 class SegmentSpline(Geometry):
+    __slots__ = ("points", "_spline_points", "_polygons", "_length")
+
     def __init__(
         self,
         points,
@@ -117,13 +289,65 @@ class SegmentSpline(Geometry):
         )
         self.points = points
 
+    def invalidate(self):
+        super().invalidate()
+        self._spline_points = None
+        # Ломаные по диапазону масштаба
+        self._polygons = {}
+        self._length = None
+
     def draw(self, painter, pen=None):
         if len(self.points) < 2:
             return
         super().draw(painter, pen)
-        spline_points = self.generate_spline_points()
-        if spline_points:
-            painter.drawPolyline([QPointF(pt.x(), pt.y()) for pt in spline_points])
+        polygon = self.spline_polygon(zoom_bucket(painter))
+        if not polygon.isEmpty():
+            painter.drawPolyline(polygon)
+
+    def chord_points(self):
+        # Сплайн проходит через свои точки
+        return list(self.points) if len(self.points) >= 2 else None
+
+    def spline_points(self):
+        """Закэшированный результат generate_spline_points()"""
+        if self._spline_points is None:
+            self._spline_points = self.generate_spline_points()
+        return self._spline_points
+
+    def spline_polygon(self, bucket=None):
+        """Закэшированная ломаная сплайна для диапазона масштаба bucket.
+
+        Без bucket используется фиксированное разбиение generate_spline_points().
+        """
+        if bucket in self._polygons:
+            return self._polygons[bucket]
+        if bucket is None:
+            polygon = QPolygonF(self.spline_points())
+        else:
+            polyline = self.flatten(bucket_tolerance(bucket))
+            polygon = QPolygonF([QPointF(x, y) for x, y in polyline.tolist()])
+        return _remember(self._polygons, bucket, polygon)
+
+    def span_controls(self):
+        """Опорные точки кубических кривых Безье для каждого участка (S x 4 x 2)"""
+        points = np.array([(p.x(), p.y()) for p in self.points], dtype=float)
+        last = len(points) - 1
+        index = np.arange(last)
+        p0 = points[np.maximum(index - 1, 0)]
+        p1 = points[index]
+        p2 = points[index + 1]
+        p3 = points[np.minimum(index + 2, last)]
+        return np.stack([p1, p1 + (p2 - p0) / 6, p2 - (p3 - p1) / 6, p2], axis=1)
+
+    def flatten(self, tolerance):
+        """Ломаная сплайна с отклонением от кривой не более tolerance (M x 2)"""
+        pieces = []
+        for number, control in enumerate(self.span_controls()):
+            count = bezier_segment_count(control, tolerance)
+            piece = uniform_bernstein_basis(3, count) @ control
+            # Первая точка участка совпадает с последней точкой предыдущего
+            pieces.append(piece if number == 0 else piece[1:])
+        return np.concatenate(pieces)
 
     def generate_spline_points(self):
         spline_points = []
@@ -136,6 +360,47 @@ class SegmentSpline(Geometry):
             spline_points.extend(self.catmull_rom_spline(p0, p1, p2, p3, num_points))
         return spline_points
 
+    def _compute_bounding_rect(self):
+        if len(self.points) < 2:
+            return points_bounding_rect(self.points)
+        # Каждый участок Катмулла-Рома - кубическая кривая Безье с опорными
+        # точками p1, p1 + (p2 - p0) / 6, p2 - (p3 - p1) / 6, p2, поэтому
+        # он лежит внутри их выпуклой оболочки
+        hull_points = []
+        for i in range(len(self.points) - 1):
+            p0 = self.points[i - 1] if i > 0 else self.points[i]
+            p1 = self.points[i]
+            p2 = self.points[i + 1]
+            p3 = self.points[i + 2] if i + 2 < len(self.points) else self.points[i + 1]
+            hull_points.extend([p1, p1 + (p2 - p0) / 6, p2 - (p3 - p1) / 6, p2])
+        return points_bounding_rect(hull_points)
+
+    def distance_to_point(self, x, y):
+        if len(self.points) < 2:
+            return math.inf
+        return polyline_distance(self.spline_coordinates(), x, y)
+
+    def intersects_rect(self, rect):
+        if len(self.points) < 2:
+            return False
+        return polyline_intersects_rect(self.spline_coordinates(), rect)
+
+    def snap_points(self):
+        # Кривая проходит через все свои точки
+        if len(self.points) < 2:
+            return []
+        first, last = self.points[0], self.points[-1]
+        points = [("endpoint", first.x(), first.y()), ("endpoint", last.x(), last.y())]
+        return points + [("vertex", p.x(), p.y()) for p in self.points[1:-1]]
+
+    def outline(self):
+        if len(self.points) < 2:
+            return []
+        return polyline_outline(self.spline_coordinates())
+
+    def spline_coordinates(self):
+        return [(point.x(), point.y()) for point in self.spline_points()]
+
     def catmull_rom_spline(self, p0, p1, p2, p3, num_points):
         return [
             QPointF(
@@ -160,12 +425,14 @@ class SegmentSpline(Geometry):
     def get_total_length(self):
         if len(self.points) < 2:
             return 0
+        if self._length is not None:
+            return self._length
         length = 0
         previous_point = self.points[0]
-        spline_points = self.generate_spline_points()
-        for point in spline_points:
+        for point in self.spline_points():
             length += math.hypot(
                 point.x() - previous_point.x(), point.y() - previous_point.y()
             )
             previous_point = point
+        self._length = length
         return length
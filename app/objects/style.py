@@ -0,0 +1,80 @@
+import weakref
+from types import MappingProxyType
+from PySide6.QtGui import QColor
+
+
+class Style:
+    """Неизменяемый стиль линии, общий для всех фигур с одинаковыми параметрами.
+
+    Стили интернируются: Style(...) с теми же параметрами возвращает тот же
+    объект, поэтому стили можно сравнивать через ``is``. Цвет и параметры
+    штриха общие для всех фигур стиля и не должны изменяться на месте.
+    """
+
+    __slots__ = (
+        "line_type",
+        "line_thickness",
+        "dash_parameters",
+        "dash_auto_mode",
+        "color",
+        "__weakref__",
+    )
+
+    _interned = weakref.WeakValueDictionary()
+
+    def __new__(
+        cls,
+        line_type="solid",
+        line_thickness=1.0,
+        dash_parameters=None,
+        dash_auto_mode=False,
+        color=None,
+    ):
+        dash_parameters = dict(dash_parameters or {})
+        color = QColor(color) if color is not None else QColor(0, 0, 0)
+        key = (
+            line_type,
+            line_thickness,
+            tuple(sorted(dash_parameters.items())),
+            dash_auto_mode,
+            color.rgba(),
+        )
+        style = cls._interned.get(key)
+        if style is None:
+            style = super().__new__(cls)
+            set_field = super(Style, style).__setattr__
+            set_field("line_type", line_type)
+            set_field("line_thickness", line_thickness)
+            set_field("dash_parameters", MappingProxyType(dash_parameters))
+            set_field("dash_auto_mode", dash_auto_mode)
+            set_field("color", color)
+            cls._interned[key] = style
+        return style
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Style is immutable, use replace()")
+
+    def __reduce__(self):
+        return (
+            Style,
+            (
+                self.line_type,
+                self.line_thickness,
+                dict(self.dash_parameters),
+                self.dash_auto_mode,
+                self.color.name(QColor.HexArgb),
+            ),
+        )
+
+    def replace(self, **changes):
+        """Стиль, отличающийся от текущего указанными полями"""
+        fields = {name: getattr(self, name) for name in Style.__slots__[:-1]}
+        fields.update(changes)
+        return Style(**fields)
+
+    def __repr__(self):
+        return (
+            f"Style({self.line_type!r}, {self.line_thickness!r}, "
+            f"{dict(self.dash_parameters)!r}, {self.dash_auto_mode!r}, "
+            f"{self.color.name()!r})"
+        )
@@ -0,0 +1,145 @@
+import numpy as np
+from PySide6.QtCore import Qt, QPointF, QLineF
+from PySide6.QtGui import QPainterPath, QPolygonF, QPen, QColor
+from app.objects.line import Line
+from app.objects.polygon import Polygon
+from app.objects.shape_store import StoredLine, StoredPolygon
+from app.objects.parent import DASHED_LINE_TYPES, painter_scale
+from app.config.config import (
+    LOD_ENABLED,
+    LOD_SKIP_SIZE,
+    LOD_POINT_SIZE,
+    LOD_CHORD_SIZE,
+)
+
+
+def draw_shapes(painter, shapes, extents=None, highlight=None):
+    """Рисует фигуры, объединяя отрезки и многоугольники с одинаковым пером.
+
+    Отрезки одной группы выводятся одним вызовом drawLines, многоугольники -
+    одним drawPath. Отрезки из ShapeStore группируются по номеру стиля прямо
+    в массивах хранилища. Группы рисуются в порядке первого появления пера,
+    остальные фигуры - после них в исходном порядке.
+
+    extents - габариты фигур (left, top, right, bottom) из пространственного
+    индекса. С ними включается упрощённая отрисовка мелких фигур: меньше
+    LOD_POINT_SIZE пикселей - точка (меньше LOD_SKIP_SIZE - пропуск), кривые
+    меньше LOD_CHORD_SIZE пикселей - ломаная по хордам.
+
+    highlight - цвет выделения: фигуры рисуются сплошным пером этого цвета
+    на 2 толще своей линии, одним пером на каждую толщину.
+    """
+    pen_of = _shape_pen if highlight is None else _highlight_pens(highlight)
+    groups = {}
+    stored_rows = {}
+    others = []
+    points = {}
+    scale = painter_scale(painter) if LOD_ENABLED and extents is not None else None
+    for number, shape in enumerate(shapes):
+        if scale is not None and extents[number] is not None:
+            left, top, right, bottom = extents[number]
+            size = max(right - left, bottom - top) * scale
+            if size < LOD_POINT_SIZE:
+                if size >= LOD_SKIP_SIZE:
+                    center = QPointF((left + right) / 2, (top + bottom) / 2)
+                    color = shape.color if highlight is None else highlight
+                    points.setdefault(color.rgba(), []).append(center)
+                continue
+            if size < LOD_CHORD_SIZE:
+                chord = shape.chord_points()
+                if chord:
+                    _group(groups, pen_of(shape))[1].extend(
+                        QLineF(chord[i - 1], chord[i]) for i in range(1, len(chord))
+                    )
+                    continue
+
+        shape_type = type(shape)
+        if shape_type is StoredLine:
+            stored_rows.setdefault(shape._store, []).append(shape._row)
+        elif shape_type is Line:
+            _group(groups, pen_of(shape))[1].append(shape.line())
+        elif shape_type is Polygon or shape_type is StoredPolygon:
+            if len(shape.points) >= 3:
+                _group(groups, pen_of(shape))[2].append(shape)
+        elif isinstance(shape, Line):
+            _group(groups, pen_of(shape))[1].append(shape.line())
+        else:
+            others.append(shape)
+
+    for store, rows in stored_rows.items():
+        _group_stored_lines(groups, store, np.array(rows), pen_of)
+
+    for rgba, centers in points.items():
+        pen = QPen(QColor.fromRgba(rgba), 1)
+        pen.setCosmetic(True)
+        pen.setCapStyle(Qt.SquareCap)
+        painter.setPen(pen)
+        painter.drawPoints(QPolygonF(centers))
+
+    for pen, lines, polygons in groups.values():
+        painter.setPen(pen)
+        if lines:
+            painter.drawLines(lines)
+        if polygons:
+            path = QPainterPath()
+            for polygon in polygons:
+                path.addPolygon(_polygon(polygon))
+                path.closeSubpath()
+            painter.drawPath(path)
+
+    for shape in others:
+        shape.draw(painter, None if highlight is None else pen_of(shape))
+
+
+def _shape_pen(shape):
+    return shape.create_pen()
+
+
+def _highlight_pens(color):
+    """Перо выделения для фигуры; перья общие для одной толщины линии"""
+    pens = {}
+
+    def pen_of(shape):
+        width = shape.line_thickness + 2
+        pen = pens.get(width)
+        if pen is None:
+            pen = pens[width] = QPen(color)
+            pen.setWidthF(width)
+        return pen
+
+    return pen_of
+
+
+def _group(groups, pen):
+    """Группа (перо, отрезки, многоугольники) для пера"""
+    group = groups.get(id(pen))
+    if group is None:
+        group = groups[id(pen)] = (pen, [], [])
+    return group
+
+
+def _group_stored_lines(groups, store, rows, pen_of=_shape_pen):
+    numbers = store.line_styles[rows]
+    for number in np.unique(numbers).tolist():
+        style = store.styles[number]
+        selected = rows[numbers == number]
+        if (
+            pen_of is _shape_pen
+            and style.dash_auto_mode
+            and style.line_type in DASHED_LINE_TYPES
+        ):
+            # Перо автоштриха зависит от длины каждого отрезка
+            for row in selected.tolist():
+                shape = StoredLine(store, row)
+                _group(groups, pen_of(shape))[1].append(shape.line())
+            continue
+        pen = pen_of(StoredLine(store, int(selected[0])))
+        segments = store.line_segments()
+        _group(groups, pen)[1].extend([segments[row] for row in selected.tolist()])
+
+
+def _polygon(shape):
+    if type(shape) is StoredPolygon:
+        vertices = shape._store.polygon_vertices(shape._row).tolist()
+        return QPolygonF([QPointF(x, y) for x, y in vertices])
+    return QPolygonF(shape.points)
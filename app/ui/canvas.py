@@ -1,7 +1,17 @@
 import math
+import numpy as np
 from PySide6.QtWidgets import QWidget, QInputDialog, QMessageBox
-from PySide6.QtGui import QPainter, QColor, QPen, QCursor, QImage
-from PySide6.QtCore import Qt, QPoint, QPointF, QRectF, QSizeF, Signal
+from PySide6.QtGui import (
+    QPainter,
+    QColor,
+    QPen,
+    QCursor,
+    QImage,
+    QPixmap,
+    QTransform,
+    QPolygonF,
+)
+from PySide6.QtCore import Qt, QPoint, QPointF, QRect, QRectF, QSizeF, Signal
 from app.objects.line import Line
 from app.objects.circle import Circle, CircleByThreePoints
 from app.utils.handle_input import handle_manual_input
@@ -9,6 +19,13 @@ from app.objects.arc import ArcByThreePoints, ArcByRadiusChord
 from app.objects.polygon import Polygon
 from app.objects.rectangle import Rectangle
 from app.objects.spline import BezierSpline, SegmentSpline
+from app.utils.shape_list import ShapeList
+from app.utils.spatial_index import SpatialIndex
+from app.utils.object_snap import ObjectSnap
+from app.utils.intersections import find_intersections
+from app.utils.undo_stack import UndoStack, RemoveShapes
+from app.ui.tile_cache import TileCache
+from app.ui.batch_renderer import draw_shapes
 from app.config.config import *
 
 
@@ -16,6 +33,12 @@ class Canvas(QWidget):
     zPressed = Signal()
     shapeAdded = Signal()
     shapeRemoved = Signal()
+    # Подробные уведомления об изменении списка фигур для дерева объектов
+    shapesInserted = Signal(int, int)  # индекс первой фигуры, количество
+    shapesRemoved = Signal(int, list)  # индекс первой фигуры, удалённые фигуры
+    shapesReset = Signal()
+    shapeChanged = Signal(object)
+    selectionChanged = Signal()
 
     def __init__(self, parent):
         super().__init__(parent)
@@ -23,7 +46,18 @@ class Canvas(QWidget):
         self.parent = parent
         self.backgroundColor = QColor(255, 255, 255)
         self.currentColor = QColor(0, 0, 0)
-        self.shapes = []
+        self.shapes = ShapeList()
+        self.shape_index = SpatialIndex()
+        self.object_snap = ObjectSnap(self.shape_index)
+        self.shapes.subscribe(self.onShapesChanged)
+        self.history = UndoStack(self)
+        self.tile_cache = TileCache()
+        # Слой выбранных фигур: плитки с подсвеченными фигурами выбора
+        self.selection_tiles = TileCache()
+        self._selected_items = None
+        self._tile_excluded_shape = None
+        self._scene_pixmap = None
+        self._scene_key = None
         self.current_shape = None
         self.drawingMode = "line"
         self.lineType = "solid"
@@ -58,9 +92,20 @@ class Canvas(QWidget):
         self.setFocusPolicy(Qt.StrongFocus)
 
         self.highlighted_shape_index = None
+        # Номера выбранных фигур в self.shapes
+        self.selected_indices = set()
+        self._selection_version = 0
+        # id(фигуры) -> номер в self.shapes, строится по требованию
+        self._shape_positions = None
+        # Рамка выбора в экранных координатах
+        self.selection_origin = None
+        self.selection_corner = None
         self.show_grid = True
         self.grid_size = GRID_SIZE
         self.snap_grid = SNAP_GRID
+        self.snap_objects = SNAP_OBJECTS
+        # Текущая точка объектной привязки (вид, x, y) или None
+        self.snap_point = None
 
     def create_pen(self):
         pen = QPen()
@@ -90,10 +135,309 @@ class Canvas(QWidget):
         self.temp_point = None
         self.update()
 
+    def onShapesChanged(self, event, index, shapes):
+        """Поддерживает пространственный индекс и плитки в соответствии с self.shapes"""
+        self._shape_positions = None
+        self.updateSelectionIndices(event, index, len(shapes))
+        if event == "insert":
+            after = self.shapes[index - 1] if index > 0 else None
+            end = index + len(shapes)
+            before = self.shapes[end] if end < len(self.shapes) else None
+            for shape in shapes:
+                self.shape_index.insert(shape, before=before, after=after)
+                self.invalidateShapeTiles(shape)
+                after = shape
+            self.shapesInserted.emit(index, len(shapes))
+        elif event == "remove":
+            for shape in shapes:
+                self.invalidateShapeTiles(shape)
+                self.shape_index.remove(shape)
+                self.object_snap.discard(shape)
+            self.shapesRemoved.emit(index, list(shapes))
+        else:
+            self.shape_index.rebuild(self.shapes)
+            self.object_snap.clear()
+            self.tile_cache.clear()
+            self.selection_tiles.clear()
+            self._scene_pixmap = None
+            self.shapesReset.emit()
+
+    def refreshShape(self, shape):
+        """Обновляет закэшированные габариты фигуры после её изменения"""
+        self.invalidateShapeTiles(shape)
+        shape.invalidate()
+        self.shape_index.update(shape)
+        self.object_snap.discard(shape)
+        self.invalidateShapeTiles(shape)
+        self.shapeChanged.emit(shape)
+        self.update()
+
+    def invalidateShapeTiles(self, shape):
+        """Сбрасывает плитки, на которых отрисована фигура"""
+        if shape in self.shape_index:
+            bounds = self.shape_index.bounds(shape)
+            self.tile_cache.invalidate(bounds)
+            self.selection_tiles.invalidate(bounds)
+            self._selected_items = None
+            self._scene_pixmap = None
+
     def highlightShape(self, index):
-        self.highlighted_shape_index = index
+        self.selectShapes([] if index is None else [index])
+
+    def selectShapes(self, indices, add=False):
+        """Выбирает фигуры с номерами indices; add - добавить к текущему выбору"""
+        indices = set(indices)
+        if add:
+            indices |= self.selected_indices
+        self.selected_indices = indices
+        # Отдельно подсвечивается и показывается в дереве только одна
+        # выбранная фигура
+        self.highlighted_shape_index = (
+            next(iter(indices)) if len(indices) == 1 else None
+        )
+        self._selection_version += 1
+        self.invalidateSelectionTiles()
+        self.selectionChanged.emit()
         self.repaint()
 
+    def invalidateSelectionTiles(self):
+        """Сбрасывает слой выбора после изменения набора выбранных фигур"""
+        self.selection_tiles.clear()
+        self._selected_items = None
+
+    def selectedShapes(self):
+        return [self.shapes[index] for index in sorted(self.selected_indices)]
+
+    def updateSelectionIndices(self, event, index, count):
+        """Сдвигает номера выбранных фигур при изменении списка фигур"""
+        if not self.selected_indices:
+            return
+        if event == "insert":
+            selected = {i + count if i >= index else i for i in self.selected_indices}
+        elif event == "remove":
+            selected = {
+                i - count if i >= index + count else i
+                for i in self.selected_indices
+                if not index <= i < index + count
+            }
+        else:
+            selected = set()
+        # При сдвиге номеров выбраны те же фигуры и слой выбора остаётся
+        if len(selected) != len(self.selected_indices):
+            self.invalidateSelectionTiles()
+        self.selected_indices = selected
+        self.highlighted_shape_index = (
+            next(iter(selected)) if len(selected) == 1 else None
+        )
+        self._selection_version += 1
+
+    def deleteSelection(self):
+        """Удаляет выбранные фигуры и возвращает их"""
+        items = [(index, self.shapes[index]) for index in self.selected_indices]
+        # Разрозненные участки удаляются со сбросом списка, поэтому шаг
+        # истории записывается явно
+        with self.history.suspended():
+            removed = self.shapes.remove_indices(self.selected_indices)
+        if removed:
+            self.history.push(RemoveShapes("Удаление", items))
+            self.shapeRemoved.emit()
+        self.selectShapes([])
+        return removed
+
+    def shapePosition(self, shape):
+        """Номер фигуры в self.shapes"""
+        if self._shape_positions is None:
+            self._shape_positions = {
+                id(shape): index for index, shape in enumerate(self.shapes)
+            }
+        return self._shape_positions[id(shape)]
+
+    def shapesInRect(self, rect, crossing=False):
+        """Номера фигур, выбираемых логическим прямоугольником rect.
+
+        Рамкой (crossing=False) выбираются фигуры, целиком лежащие внутри
+        прямоугольника, секущей рамкой - ещё и пересекающие его границу.
+        Кандидаты выбираются через пространственный индекс.
+        """
+        rect = rect.normalized()
+        left, top, right, bottom = rect.left(), rect.top(), rect.right(), rect.bottom()
+
+        def inside(bounds):
+            x1, y1, x2, y2 = bounds
+            return left <= x1 and x2 <= right and top <= y1 and y2 <= bottom
+
+        found = set()
+        for shape, padded in self.shape_index.query_items(rect):
+            if padded is None:
+                continue
+            # Габариты индекса расширены на толщину линии: если внутри они,
+            # то внутри и сама фигура, точные габариты нужны только у границы
+            if not inside(padded):
+                bounds = shape.bounding_rect()
+                if bounds is None:
+                    continue
+                if not inside(bounds.getCoords()) and not (
+                    crossing and shape.intersects_rect(rect)
+                ):
+                    continue
+            found.add(self.shapePosition(shape))
+        return found
+
+    def shapeAt(self, pos, tolerance=None):
+        """Фигура, линия которой ближе всего к логической точке pos, или None.
+
+        tolerance - допуск в логических единицах, по умолчанию PICK_TOLERANCE
+        пикселей экрана. Кандидаты выбираются через пространственный индекс,
+        при равном расстоянии побеждает фигура, нарисованная позже.
+        """
+        if tolerance is None:
+            tolerance = PICK_TOLERANCE / self.scale
+        x, y = pos.x(), pos.y()
+        rect = QRectF(x - tolerance, y - tolerance, 2 * tolerance, 2 * tolerance)
+        found = None
+        best = tolerance
+        for shape in self.shape_index.query(rect):
+            distance = shape.distance_to_point(x, y)
+            distance -= (getattr(shape, "line_thickness", 0) or 0) / 2
+            if distance <= best:
+                found = shape
+                best = max(distance, 0)
+        return found
+
+    def intersections(self, rect=None):
+        """Точки пересечения фигур чертежа или только внутри логического rect.
+
+        Возвращает (points, indices): массив K x 2 точек и массив K x 2
+        номеров пересекающихся фигур в self.shapes.
+        """
+        if rect is None:
+            return find_intersections(self.shapes)
+        shapes = self.shape_index.query(rect)
+        points, owners = find_intersections(shapes, rect)
+        positions = np.array(
+            [self.shapePosition(shape) for shape in shapes], dtype=np.int64
+        )
+        return points, positions[owners].reshape(-1, 2)
+
+    def selectShapeAt(self, pos):
+        """Выделяет фигуру под логической точкой pos или снимает выделение"""
+        shape = self.shapeAt(pos)
+        self.highlightShape(self.shapePosition(shape) if shape is not None else None)
+
+    def startSelection(self, pos, add=False):
+        """Щелчок в режиме выбора: фигура под курсором или начало рамки.
+
+        pos - точка в экранных координатах, add - изменить текущий выбор
+        вместо замены (щелчок по выбранной фигуре снимает с неё выбор)
+        """
+        shape = self.shapeAt(self.mapToLogicalCoordinates(pos))
+        if shape is None:
+            self.selection_origin = QPoint(pos)
+            self.selection_corner = QPoint(pos)
+            return
+        index = self.shapePosition(shape)
+        if not add:
+            self.selectShapes([index])
+        elif index in self.selected_indices:
+            self.selectShapes(self.selected_indices - {index})
+        else:
+            self.selectShapes([index], add=True)
+
+    def finishSelection(self, pos, add=False):
+        """Выбирает фигуры рамкой от selection_origin до экранной точки pos.
+
+        Рамка слева направо выбирает фигуры, лежащие внутри неё, справа
+        налево - ещё и пересекающие её.
+        """
+        origin = self.selection_origin
+        self.selection_origin = None
+        self.selection_corner = None
+        if (pos - origin).manhattanLength() < PICK_TOLERANCE:
+            if not add:
+                self.selectShapes([])
+            self.update()
+            return
+        # При повёрнутом виде выбор идёт по габаритам повёрнутой рамки
+        inverse_transform, _ = self.transform.inverted()
+        rect = inverse_transform.mapRect(QRectF(QRect(origin, pos).normalized()))
+        crossing = pos.x() < origin.x()
+        self.selectShapes(self.shapesInRect(rect, crossing), add=add)
+
+    def drawSnapMarker(self, painter):
+        """Значок и название текущей точки объектной привязки"""
+        if self.snap_point is None:
+            return
+        kind, x, y = self.snap_point
+        center = self.transform.map(QPointF(x, y))
+        size = 6
+        painter.save()
+        painter.resetTransform()
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor(0, 160, 0), 2))
+        painter.setBrush(Qt.NoBrush)
+        cx, cy = center.x(), center.y()
+        if kind in ("endpoint", "vertex"):
+            painter.drawRect(QRectF(cx - size, cy - size, 2 * size, 2 * size))
+        elif kind == "midpoint":
+            painter.drawPolygon(
+                QPolygonF(
+                    [
+                        QPointF(cx, cy - size),
+                        QPointF(cx + size, cy + size),
+                        QPointF(cx - size, cy + size),
+                    ]
+                )
+            )
+        elif kind == "center":
+            painter.drawEllipse(center, size, size)
+        elif kind == "quadrant":
+            painter.drawPolygon(
+                QPolygonF(
+                    [
+                        QPointF(cx, cy - size),
+                        QPointF(cx + size, cy),
+                        QPointF(cx, cy + size),
+                        QPointF(cx - size, cy),
+                    ]
+                )
+            )
+        else:
+            painter.drawLine(
+                QPointF(cx - size, cy - size), QPointF(cx + size, cy + size)
+            )
+            painter.drawLine(
+                QPointF(cx - size, cy + size), QPointF(cx + size, cy - size)
+            )
+            if kind == "nearest":
+                painter.drawLine(
+                    QPointF(cx - size, cy - size), QPointF(cx + size, cy - size)
+                )
+                painter.drawLine(
+                    QPointF(cx - size, cy + size), QPointF(cx + size, cy + size)
+                )
+        painter.drawText(
+            QPointF(cx + size + 4, cy + size + 12), OBJECT_SNAP_NAMES.get(kind, kind)
+        )
+        painter.restore()
+
+    def drawSelectionBox(self, painter):
+        if self.selection_origin is None:
+            return
+        if self.selection_corner.x() < self.selection_origin.x():
+            pen = QPen(QColor(0, 150, 0), 1, Qt.DashLine)
+            brush = QColor(0, 150, 0, 40)
+        else:
+            pen = QPen(QColor(0, 0, 255), 1, Qt.SolidLine)
+            brush = QColor(0, 0, 255, 40)
+        painter.save()
+        painter.resetTransform()
+        painter.setPen(pen)
+        painter.setBrush(brush)
+        painter.drawRect(
+            QRect(self.selection_origin, self.selection_corner).normalized()
+        )
+        painter.restore()
+
     def setDrawingMode(self, mode):
         if self.drawingMode == "spline_bezier" and self.current_shape:
             if isinstance(self.current_shape, BezierSpline):
@@ -126,36 +470,12 @@ class Canvas(QWidget):
     def paintEvent(self, event):
         painter = QPainter(self)
 
-        if not self.backgroundImage.isNull():
-            painter.drawImage(self.rect(), self.backgroundImage)
-        else:
-            painter.fillRect(self.rect(), self.backgroundColor)
+        self.transform = self.viewTransform()
+        painter.drawPixmap(0, 0, self.scenePixmap())
 
         painter.setRenderHint(QPainter.Antialiasing)
-        painter.setRenderHint(QPainter.SmoothPixmapTransform)
         painter.save()
-
-        painter.translate(
-            self.width() / 2 + self.offset.x(), self.height() / 2 + self.offset.y()
-        )
-        painter.scale(self.scale, self.scale)
-        painter.rotate(self.rotation)
-        painter.scale(1, -1)
-
-        self.transform = painter.transform()
-
-        self.drawGrid(painter)
-
-        for index, shape in enumerate(self.shapes):
-            if index == self.highlighted_shape_index:
-                painter.save()
-                pen = QPen(Qt.red)
-                pen.setWidthF(shape.line_thickness + 2)
-                painter.setPen(pen)
-                shape.draw(painter)
-                painter.restore()
-            else:
-                shape.draw(painter)
+        painter.setTransform(self.transform)
 
         temp_pen = QPen()
         temp_pen.setWidthF(self.lineThickness)
@@ -177,11 +497,163 @@ class Canvas(QWidget):
 
         painter.restore()
 
+        self.drawSelectionBox(painter)
+        self.drawSnapMarker(painter)
+
         painter.resetTransform()
         painter.setPen(Qt.black)
 
         self.drawOverlayText(painter)
 
+    def viewTransform(self):
+        """Преобразование из логических координат в экранные"""
+        origin = self.viewOrigin()
+        transform = QTransform()
+        transform.translate(origin.x(), origin.y())
+        transform.scale(self.scale, self.scale)
+        transform.rotate(self.rotation)
+        transform.scale(1, -1)
+        return transform
+
+    def highlightedShape(self):
+        if self.highlighted_shape_index is not None:
+            if 0 <= self.highlighted_shape_index < len(self.shapes):
+                return self.shapes[self.highlighted_shape_index]
+        return None
+
+    def scenePixmap(self):
+        """Нижний слой: фон, сетка и построенные фигуры.
+
+        Слой кэшируется для текущего вида и перерисовывается только при
+        изменении вида, сетки, выделения или фигур, поэтому движение мыши
+        при построении перерисовывает лишь слой предпросмотра.
+        """
+        highlighted_shape = self.highlightedShape()
+        key = (
+            self.size(),
+            self.devicePixelRatioF(),
+            self.viewOrigin(),
+            self.scale,
+            self.rotation,
+            self.show_grid,
+            self.show_axes,
+            self.grid_size,
+            id(highlighted_shape),
+            self._selection_version,
+        )
+        if self._scene_pixmap is not None and key == self._scene_key:
+            return self._scene_pixmap
+
+        pixel_ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(self.size() * pixel_ratio)
+        pixmap.setDevicePixelRatio(pixel_ratio)
+        painter = QPainter(pixmap)
+
+        if not self.backgroundImage.isNull():
+            painter.drawImage(self.rect(), self.backgroundImage)
+        else:
+            painter.fillRect(self.rect(), self.backgroundColor)
+
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.setTransform(self.transform)
+
+        self.drawGrid(painter)
+        self.drawShapeTiles(painter, self.viewOrigin(), highlighted_shape)
+        if len(self.selected_indices) > 1:
+            self.drawTiles(
+                painter,
+                self.selection_tiles,
+                self.viewOrigin(),
+                self.drawSelectedShapes,
+            )
+
+        if highlighted_shape is not None:
+            pen = QPen(Qt.red)
+            pen.setWidthF(highlighted_shape.line_thickness + 2)
+            painter.setPen(pen)
+            highlighted_shape.draw(painter, pen)
+
+        painter.end()
+        self._scene_pixmap = pixmap
+        self._scene_key = key
+        return pixmap
+
+    def drawSelectedShapes(self, painter, rect):
+        """Подсвечивает выбранные фигуры, габариты которых пересекают rect.
+
+        Рисуется в плитки слоя выбора, поэтому при панорамировании фигуры
+        не перерисовываются.
+        """
+        shapes, extents, bounds = self.selectedItems()
+        rows = np.flatnonzero(
+            (bounds[:, 2] >= rect.left())
+            & (bounds[:, 0] <= rect.right())
+            & (bounds[:, 3] >= rect.top())
+            & (bounds[:, 1] <= rect.bottom())
+        ).tolist()
+        draw_shapes(
+            painter,
+            [shapes[row] for row in rows],
+            [extents[row] for row in rows],
+            highlight=QColor(Qt.red),
+        )
+
+    def selectedItems(self):
+        """Выбранные фигуры в порядке отрисовки, их габариты и массив габаритов.
+
+        Фигуры без габаритов попадают в массив бесконечным прямоугольником.
+        """
+        if self._selected_items is None:
+            shapes = self.selectedShapes()
+            extents = [self.shape_index.extents(shape) for shape in shapes]
+            unbounded = (-math.inf, -math.inf, math.inf, math.inf)
+            bounds = np.array(
+                [unbounded if item is None else item for item in extents], dtype=float
+            ).reshape(-1, 4)
+            self._selected_items = shapes, extents, bounds
+        return self._selected_items
+
+    def viewOrigin(self):
+        """Положение начала логических координат на экране (целые пиксели)"""
+        return QPoint(
+            self.width() // 2 + self.offset.x(), self.height() // 2 + self.offset.y()
+        )
+
+    def drawShapeTiles(self, painter, origin, excluded_shape=None):
+        """Выводит фигуры из кэша плиток, дорисовывая недостающие плитки.
+
+        excluded_shape (выделенная фигура) в плитки не попадает и рисуется
+        поверх них отдельно.
+        """
+        if excluded_shape is not self._tile_excluded_shape:
+            for shape in (self._tile_excluded_shape, excluded_shape):
+                if shape is not None:
+                    self.invalidateShapeTiles(shape)
+            self._tile_excluded_shape = excluded_shape
+
+        self.drawTiles(painter, self.tile_cache, origin, self.drawShapes)
+
+    def drawTiles(self, painter, cache, origin, draw):
+        """Выводит видимые плитки кэша, дорисовывая недостающие функцией draw"""
+        cache.set_view(self.scale, self.rotation, self.devicePixelRatioF())
+        painter.save()
+        painter.resetTransform()
+        for tx, ty, position in cache.visible_tiles(self.rect(), origin):
+            painter.drawImage(position, cache.tile(tx, ty, draw))
+        painter.restore()
+
+    def drawShapes(self, painter, rect):
+        """Рисует фигуры, габариты которых пересекают логический прямоугольник"""
+        items = [
+            item
+            for item in self.shape_index.query_items(rect)
+            if item[0] is not self._tile_excluded_shape
+        ]
+        draw_shapes(
+            painter, [shape for shape, _ in items], [bounds for _, bounds in items]
+        )
+
     def mousePressEvent(self, event):
         if event.button() == Qt.LeftButton:
             logicalPos = self.mapToLogicalCoordinates(event.pos())
@@ -190,7 +662,13 @@ class Canvas(QWidget):
             self.temp_point = coord
             self.cursor_position = coord
 
-            if self.drawingMode == "line":
+            if self.drawingMode == "select":
+                # Выбор идёт по точке под курсором, без привязки к сетке
+                self.startSelection(
+                    event.pos(), bool(event.modifiers() & Qt.ShiftModifier)
+                )
+
+            elif self.drawingMode == "line":
                 if not self.points:
                     self.points = [coord]
                 else:
@@ -388,23 +866,27 @@ class Canvas(QWidget):
                 self.create_shape(self.current_shape)
 
             elif self.drawingMode == "spline_bezier" and len(self.points) >= 3:
-                if self.current_shape and isinstance(self.current_shape, BezierSpline):
-                    self.current_shape.is_completed = True
-                    self.current_shape.is_editing = False
-                    new_spline = BezierSpline(
-                        self.current_shape.points.copy(),
-                        self.lineType,
-                        self.lineThickness,
-                        dash_parameters=self.dash_parameters,
-                        dash_auto_mode=self.dash_auto_mode,
-                        color=self.currentColor,
-                    )
-                    new_spline.is_completed = True
-                    new_spline.is_editing = False
-                    self.shapes.append(new_spline)
-                    self.shapeAdded.emit()
+                # Сплайн добавляется двумя фигурами; отменяются они вместе
+                with self.history.group("Построение"):
+                    if self.current_shape and isinstance(
+                        self.current_shape, BezierSpline
+                    ):
+                        self.current_shape.is_completed = True
+                        self.current_shape.is_editing = False
+                        new_spline = BezierSpline(
+                            self.current_shape.points.copy(),
+                            self.lineType,
+                            self.lineThickness,
+                            dash_parameters=self.dash_parameters,
+                            dash_auto_mode=self.dash_auto_mode,
+                            color=self.currentColor,
+                        )
+                        new_spline.is_completed = True
+                        new_spline.is_editing = False
+                        self.shapes.append(new_spline)
+                        self.shapeAdded.emit()
 
-                self.create_shape(self.current_shape)
+                    self.create_shape(self.current_shape)
 
             elif self.drawingMode == "spline_segments" and len(self.points) >= 2:
                 self.current_shape = SegmentSpline(
@@ -439,7 +921,11 @@ class Canvas(QWidget):
             self.temp_point = coord
             self.cursor_position = coord
 
-            if self.drawingMode == "line" and self.points:
+            if self.drawingMode == "select":
+                if self.selection_origin is not None:
+                    self.selection_corner = event.pos()
+
+            elif self.drawingMode == "line" and self.points:
                 if len(self.points) == 1:
                     self.current_shape = Line(
                         self.points[0],
@@ -480,8 +966,8 @@ class Canvas(QWidget):
             elif self.drawingMode == "spline_bezier":
                 if self.current_shape and isinstance(self.current_shape, BezierSpline):
                     if self.current_shape.editing_index is not None:
-                        self.current_shape.points[self.current_shape.editing_index] = (
-                            coord
+                        self.moveSplinePoint(
+                            self.current_shape, self.current_shape.editing_index, coord
                         )
                         self.points = self.current_shape.points
 
@@ -505,12 +991,34 @@ class Canvas(QWidget):
 
             self.update()
 
+    def moveSplinePoint(self, spline, index, point):
+        """Перемещает контрольную точку сплайна при перетаскивании.
+
+        Для сплайна, уже добавленного на чертёж, всё перетаскивание до
+        отпускания кнопки записывается в историю одним шагом.
+        """
+        if spline not in self.shape_index:
+            spline.points[index] = point
+            spline.invalidate()
+            return
+        captured = self.history.capture([spline])
+        spline.points[index] = point
+        self.refreshShape(spline)
+        self.history.recordChanges(
+            "Перемещение точки", captured, merge_key=("move_point", id(spline), index)
+        )
+
     def mouseReleaseEvent(self, event):
+        self.history.seal()
         if event.button() == Qt.MiddleButton:
             self.panning = False
             self.setCursor(QCursor(Qt.ArrowCursor))
         elif event.button() == Qt.LeftButton:
-            if self.drawingMode == "spline_bezier":
+            if self.drawingMode == "select" and self.selection_origin is not None:
+                self.finishSelection(
+                    event.pos(), bool(event.modifiers() & Qt.ShiftModifier)
+                )
+            elif self.drawingMode == "spline_bezier":
                 if self.current_shape and isinstance(self.current_shape, BezierSpline):
                     self.current_shape.editing_index = None
 
@@ -546,18 +1054,29 @@ class Canvas(QWidget):
             return QPointF(pos)
 
     def getCoordinate(self, pos):
-        if self.coordinateSystem == "cartesian":
-            if self.snap_grid == True:
-                x = round(pos.x() / self.grid_size) * self.grid_size
-                y = round(pos.y() / self.grid_size) * self.grid_size
-                return QPointF(x, y)
+        """Точка построения для логической точки курсора pos.
+
+        Объектная привязка имеет приоритет над привязкой к сетке. В полярной
+        системе сетка - окружности через grid_size и лучи через
+        POLAR_SNAP_ANGLE градусов.
+        """
+        self.snap_point = None
+        if self.snap_objects and self.drawingMode != "select":
+            self.snap_point = self.object_snap.snap(
+                pos.x(), pos.y(), SNAP_APERTURE / self.scale
+            )
+            if self.snap_point is not None:
+                return QPointF(self.snap_point[1], self.snap_point[2])
+        if not self.snap_grid:
             return pos
-        elif self.coordinateSystem == "polar":
-            r = math.hypot(pos.x(), pos.y())
-            theta = math.atan2(pos.y(), pos.x())
-            x = r * math.cos(theta)
-            y = r * math.sin(theta)
-            return QPointF(x, y)
+        if self.coordinateSystem == "polar":
+            r = round(math.hypot(pos.x(), pos.y()) / self.grid_size) * self.grid_size
+            theta = math.degrees(math.atan2(pos.y(), pos.x()))
+            theta = math.radians(round(theta / POLAR_SNAP_ANGLE) * POLAR_SNAP_ANGLE)
+            return QPointF(r * math.cos(theta), r * math.sin(theta))
+        x = round(pos.x() / self.grid_size) * self.grid_size
+        y = round(pos.y() / self.grid_size) * self.grid_size
+        return QPointF(x, y)
 
     def calculate_regular_polygon(self, center, radius_point, num_sides, mode):
         radius = math.hypot(
@@ -606,6 +1125,8 @@ class Canvas(QWidget):
             self.radius_point = None
             self.start_point = None
             self.numSides = 0
+            self.selection_origin = None
+            self.snap_point = None
             if isinstance(self.current_shape, BezierSpline):
                 self.current_shape.is_editing = False
                 self.current_shape.editing_index = None
@@ -615,13 +1136,35 @@ class Canvas(QWidget):
                 self.parent.statusBar.showMessage("Отмена текущего построения")
 
         if event.key() == Qt.Key_Z:
-            if self.shapes:
-                self.shapes.pop()
+            command = self.history.undo()
             self.update()
             if hasattr(self, "parent") and hasattr(self.parent, "statusBar"):
-                self.parent.statusBar.showMessage("Отмена предыдущего построения")
+                self.parent.statusBar.showMessage(
+                    f"Отменено: {command.text}" if command else "Нечего отменять"
+                )
             self.zPressed.emit()
 
+        if event.key() == Qt.Key_Y:
+            command = self.history.redo()
+            self.update()
+            if hasattr(self, "parent") and hasattr(self.parent, "statusBar"):
+                self.parent.statusBar.showMessage(
+                    f"Повторено: {command.text}" if command else "Нечего повторять"
+                )
+
+        if event.key() == Qt.Key_F3:
+            self.snap_objects = not self.snap_objects
+            self.snap_point = None
+            self.update()
+            if hasattr(self, "parent") and hasattr(self.parent, "statusBar"):
+                state = "включена" if self.snap_objects else "выключена"
+                self.parent.statusBar.showMessage(f"Объектная привязка {state}")
+
+        if event.key() == Qt.Key_Delete and self.selected_indices:
+            count = len(self.deleteSelection())
+            if hasattr(self, "parent") and hasattr(self.parent, "statusBar"):
+                self.parent.statusBar.showMessage(f"Удалено объектов: {count}")
+
         if event.key() == Qt.Key_V:
             self.handle_manual_input()
         elif event.key() == Qt.Key_Right and event.modifiers() & Qt.ControlModifier:
@@ -654,10 +1197,8 @@ class Canvas(QWidget):
         else:
             super().keyPressEvent(event)
 
-    def drawGrid(self, painter):
-        if not self.show_grid:
-            return
-
+    def visibleLogicalRect(self):
+        """Видимая область холста в логических координатах"""
         viewRect = self.rect()
 
         corners = [
@@ -670,6 +1211,17 @@ class Canvas(QWidget):
         right = max(corner.x() for corner in corners)
         top = max(corner.y() for corner in corners)
         bottom = min(corner.y() for corner in corners)
+        return QRectF(QPointF(left, bottom), QPointF(right, top))
+
+    def drawGrid(self, painter):
+        if not self.show_grid:
+            return
+
+        visible = self.visibleLogicalRect()
+        left = visible.left()
+        right = visible.right()
+        top = visible.bottom()
+        bottom = visible.top()
 
         modified_size = self.grid_size * (
             10 ** round(-math.log10(self.scale) - math.log10(self.grid_size) + 2)
@@ -939,7 +1491,9 @@ class Canvas(QWidget):
         y_pos = self.height() - 10
         painter.drawText(int(x_pos), int(y_pos), mode_text)
 
-        if self.highlighted_shape_index is not None:
+        if len(self.selected_indices) > 1:
+            painter.drawText(10, 20, f"Выбрано объектов: {len(self.selected_indices)}")
+        elif self.highlighted_shape_index is not None:
             if 0 <= self.highlighted_shape_index < len(self.shapes):
                 highlight_text = f"Выбран объект {self.highlighted_shape_index + 1}"
                 highlight_x_pos = 10
@@ -0,0 +1,457 @@
+import bisect
+from contextlib import contextmanager
+from operator import attrgetter
+from PySide6.QtCore import Qt, QAbstractItemModel, QModelIndex
+from PySide6.QtGui import QBrush, QColor, QFont, QIcon, QLinearGradient
+from app.objects.line import Line
+from app.objects.circle import Circle, CircleByThreePoints
+from app.objects.arc import ArcByThreePoints, ArcByRadiusChord
+from app.objects.polygon import Polygon
+from app.objects.rectangle import Rectangle
+from app.objects.spline import BezierSpline, SegmentSpline
+from app.config.config import PRIMARY_COLOR, TREE_FETCH_BATCH
+
+SHAPE_NAMES = {
+    "Line": "Линия",
+    "Circle": "Окружность (центр и радиус)",
+    "Rectangle": "Прямоугольник",
+    "Polygon": "Многоугольник",
+    "CircleByThreePoints": "Окружность (3 точки)",
+    "ArcByThreePoints": "Дуга (3 точки)",
+    "ArcByRadiusChord": "Дуга (радиус и хорда)",
+    "BezierSpline": "Сплайн Безье",
+    "SegmentSpline": "Сплайн по отрезкам",
+}
+
+SHAPE_ICONS = {
+    "Line": "resources/icons/дерево_линия.png",
+    "Circle": "resources/icons/окружность_по_центру_и_радиусу.png",
+    "Rectangle": "resources/icons/дерево_прямоугольник.png",
+    "Polygon": "resources/icons/дерево_многоугольник.png",
+    "CircleByThreePoints": "resources/icons/окружность_по_трём_точкам.png",
+    "ArcByThreePoints": "resources/icons/дуга_по_трём_точкам.png",
+    "ArcByRadiusChord": "resources/icons/дуга_по_радиусу_и_хорде.png",
+    "BezierSpline": "resources/icons/сплайн_безье.png",
+    "SegmentSpline": "resources/icons/сплайн_по_отрезкам.png",
+}
+
+LINE_TYPE_NAMES = {
+    "solid": "Сплошная",
+    "dash": "Штриховая",
+    "dash_dot": "Штрих-пунктирная",
+    "dash_dot_dot": "Штрих-пунктирная с двумя точками",
+}
+
+
+def _point_text(point):
+    return f"({point.x():.2f}, {point.y():.2f})"
+
+
+def _point_rows(points, label, property_prefix):
+    return [
+        (f"{label} {i + 1}: {_point_text(p)}", f"{property_prefix}_{i}")
+        for i, p in enumerate(points)
+    ]
+
+
+def shape_properties(shape):
+    """Строки свойств фигуры для дерева: (текст, имя свойства или None)"""
+    rows = []
+    if hasattr(shape, "line_type"):
+        line_type_text = LINE_TYPE_NAMES.get(shape.line_type, shape.line_type)
+        rows.append((f"Тип линии: {line_type_text}", "line_type"))
+    if hasattr(shape, "line_thickness"):
+        rows.append((f"Толщина линии: {shape.line_thickness:.2f}", "line_thickness"))
+
+    if isinstance(shape, Line):
+        rows.append((f"Начало: {_point_text(shape.start_point)}", "start_point"))
+        rows.append((f"Конец: {_point_text(shape.end_point)}", "end_point"))
+        rows.append((f"Длина: {shape.get_total_length():.2f}", None))
+    elif isinstance(shape, Circle):
+        rows.append((f"Центр: {_point_text(shape.center)}", "center"))
+        rows.append((f"Радиус: {shape.radius:.2f}", "radius"))
+        rows.append((f"Длина окружности: {shape.get_total_length():.2f}", None))
+    elif isinstance(shape, Rectangle):
+        rect = shape.rect
+        rows.append((f"Верхний левый угол: {_point_text(rect.topLeft())}", "top_left"))
+        rows.append((f"Ширина: {rect.width():.2f}", "width"))
+        rows.append((f"Высота: {rect.height():.2f}", "height"))
+        rows.append((f"Периметр: {shape.get_total_length():.2f}", None))
+    elif isinstance(shape, Polygon):
+        rows.extend(_point_rows(shape.points, "Вершина", "point"))
+        rows.append((f"Периметр: {shape.get_total_length():.2f}", None))
+    elif isinstance(shape, CircleByThreePoints):
+        rows.extend(_point_rows(shape.points, "Точка", "point"))
+        rows.append((f"Длина окружности: {shape.get_total_length():.2f}", None))
+    elif isinstance(shape, ArcByThreePoints):
+        rows.extend(_point_rows(shape.points, "Точка", "point"))
+        rows.append((f"Длина дуги: {shape.get_total_length():.2f}", None))
+    elif isinstance(shape, ArcByRadiusChord):
+        rows.append((f"Центр: {_point_text(shape.center)}", "center"))
+        rows.append(
+            (f"Точка радиуса: {_point_text(shape.radius_point)}", "radius_point")
+        )
+        rows.append((f"Точка хорды: {_point_text(shape.chord_point)}", "chord_point"))
+        rows.append((f"Длина дуги: {shape.get_total_length():.2f}", None))
+    elif isinstance(shape, BezierSpline):
+        rows.extend(_point_rows(shape.points, "Контрольная точка", "control_point"))
+        rows.append((f"Длина сплайна: {shape.get_total_length():.2f}", None))
+    elif isinstance(shape, SegmentSpline):
+        rows.extend(_point_rows(shape.points, "Точка", "point"))
+        rows.append((f"Длина сплайна: {shape.get_total_length():.2f}", None))
+    else:
+        rows.append(("Нет дополнительной информации", None))
+    return rows
+
+
+class GroupNode:
+    """Группа фигур одного типа; children - фигуры в порядке холста"""
+
+    __slots__ = ("shape_type", "children", "fetched")
+    parent = None
+
+    def __init__(self, shape_type):
+        self.shape_type = shape_type
+        self.children = []
+        self.fetched = 0
+
+
+class ShapeNode:
+    """Фигура холста; children - строки свойств, None до первого раскрытия"""
+
+    __slots__ = ("parent", "shape", "index", "children", "fetched")
+
+    def __init__(self, parent, shape, index):
+        self.parent = parent
+        self.shape = shape
+        self.index = index
+        self.children = None
+        self.fetched = 0
+
+
+class PropertyNode:
+    __slots__ = ("parent", "text", "property_name")
+
+    def __init__(self, parent, text, property_name):
+        self.parent = parent
+        self.text = text
+        self.property_name = property_name
+
+
+_node_index = attrgetter("index")
+
+
+class ConstructionTreeModel(QAbstractItemModel):
+    """Модель дерева объектов, читающая фигуры прямо из Canvas.shapes.
+
+    Верхний уровень - группы по типу фигуры, ниже - фигуры в порядке холста,
+    ещё ниже - свойства фигуры. Строки групп и фигур отдаются представлению
+    порциями по TREE_FETCH_BATCH через canFetchMore/fetchMore, свойства
+    фигуры вычисляются только при её первом раскрытии.
+    """
+
+    def __init__(self, canvas, is_dark_theme=lambda: False, parent=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.is_dark_theme = is_dark_theme
+        self._groups = []
+        self._group_by_type = {}
+        # id(фигуры) -> ShapeNode
+        self._nodes = {}
+        self._icons = {}
+        # Представление может запросить догрузку строк прямо из обработчиков
+        # beginInsertRows/beginRemoveRows, пока структура модели меняется
+        self._changing = False
+
+        gradient = QLinearGradient(0, 0, 100, 0)
+        base_color = QColor(PRIMARY_COLOR)
+        gradient.setColorAt(0.0, base_color.lighter(150))
+        gradient.setColorAt(1.0, base_color)
+        self._shape_brush = QBrush(gradient)
+        self._group_font = QFont("Consolas", 10, QFont.Bold)
+        self._property_font = QFont("Consolas", 9)
+
+        canvas.shapesInserted.connect(self.onShapesInserted)
+        canvas.shapesRemoved.connect(self.onShapesRemoved)
+        canvas.shapesReset.connect(self.reset)
+        canvas.shapeChanged.connect(self.onShapeChanged)
+        self.reset()
+
+    # Интерфейс QAbstractItemModel
+
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0 or row >= self.rowCount(parent):
+            return QModelIndex()
+        node = self._node(parent)
+        children = self._groups if node is None else node.children
+        return self.createIndex(row, 0, children[row])
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        node = self._node(index)
+        if node is None or node.parent is None:
+            return QModelIndex()
+        return self._index(node.parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self._node(parent)
+        if node is None:
+            return len(self._groups)
+        if isinstance(node, PropertyNode):
+            return 0
+        return node.fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None:
+            return bool(self._groups)
+        return not isinstance(node, PropertyNode)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        if self._changing or node is None or isinstance(node, PropertyNode):
+            return False
+        return node.children is None or node.fetched < len(node.children)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if self._changing or node is None or isinstance(node, PropertyNode):
+            return
+        if node.children is None:
+            node.children = [
+                PropertyNode(node, text, property_name)
+                for text, property_name in shape_properties(node.shape)
+            ]
+        self._fetchRows(parent, node, TREE_FETCH_BATCH)
+
+    def _fetchRows(self, parent, node, count):
+        """Делает видимыми ещё count строк узла"""
+        count = min(len(node.children) - node.fetched, count)
+        if count > 0:
+            with self._changingRows():
+                self.beginInsertRows(parent, node.fetched, node.fetched + count - 1)
+                node.fetched += count
+                self.endInsertRows()
+
+    @contextmanager
+    def _changingRows(self):
+        changing, self._changing = self._changing, True
+        try:
+            yield
+        finally:
+            self._changing = changing
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def data(self, index, role=Qt.DisplayRole):
+        node = self._node(index)
+        if node is None:
+            return None
+        if role == Qt.DisplayRole:
+            if isinstance(node, GroupNode):
+                return SHAPE_NAMES.get(node.shape_type, node.shape_type)
+            if isinstance(node, ShapeNode):
+                shape_type = node.shape.type_name()
+                return f"{SHAPE_NAMES.get(shape_type, shape_type)} {node.index + 1}"
+            return node.text
+        if role == Qt.UserRole:
+            if isinstance(node, ShapeNode):
+                return {"index": node.index}
+            if isinstance(node, PropertyNode) and node.property_name is not None:
+                return {"property": node.property_name}
+            return None
+        if isinstance(node, GroupNode):
+            return self._groupData(node, role)
+        if isinstance(node, ShapeNode):
+            return self._shape_brush if role == Qt.BackgroundRole else None
+        if role == Qt.FontRole:
+            return self._property_font
+        if role == Qt.ForegroundRole and self.is_dark_theme():
+            return QColor("#ffffff")
+        return None
+
+    def _groupData(self, node, role):
+        is_dark_theme = self.is_dark_theme()
+        if role == Qt.DecorationRole:
+            icon = self._icons.get(node.shape_type)
+            if icon is None:
+                icon = self._icons[node.shape_type] = QIcon(
+                    SHAPE_ICONS.get(node.shape_type, "icons/default.png")
+                )
+            return icon
+        if role == Qt.BackgroundRole:
+            return QBrush(QColor("#2E2E2E") if is_dark_theme else QColor("#E0E0E0"))
+        if role == Qt.ForegroundRole:
+            return QColor("#FFFFFF") if is_dark_theme else QColor("#000000")
+        if role == Qt.FontRole:
+            return self._group_font
+        return None
+
+    # Доступ к строкам по фигурам холста
+
+    def groupTypes(self):
+        return [group.shape_type for group in self._groups]
+
+    def groupIndex(self, shape_type):
+        group = self._group_by_type.get(shape_type)
+        return self._index(group) if group is not None else QModelIndex()
+
+    def shapeIndex(self, index):
+        """Индекс модели для фигуры холста с номером index.
+
+        Строки группы не догружаются: для фигуры, строка которой ещё не
+        загружена, возвращается недействительный индекс.
+        """
+        if not 0 <= index < len(self.canvas.shapes):
+            return QModelIndex()
+        node = self._nodes.get(id(self.canvas.shapes[index]))
+        if node is None:
+            return QModelIndex()
+        row = self._row(node)
+        if row >= node.parent.fetched:
+            return QModelIndex()
+        return self.createIndex(row, 0, node)
+
+    # Синхронизация со списком фигур холста
+
+    def reset(self):
+        self.beginResetModel()
+        self._groups = []
+        self._group_by_type = {}
+        self._nodes = {}
+        for index, shape in enumerate(self.canvas.shapes):
+            group = self._group_by_type.get(shape.type_name())
+            if group is None:
+                group = self._group_by_type[shape.type_name()] = GroupNode(
+                    shape.type_name()
+                )
+                self._groups.append(group)
+            node = ShapeNode(group, shape, index)
+            group.children.append(node)
+            self._nodes[id(shape)] = node
+        self.endResetModel()
+
+    def onShapesInserted(self, index, count):
+        with self._changingRows():
+            self._shiftIndices(index, count)
+            # Полностью загруженные группы догружают добавленные в конец фигуры,
+            # чтобы новая фигура сразу появилась в раскрытой группе
+            complete = [
+                group
+                for group in self._groups
+                if group.fetched and group.fetched == len(group.children)
+            ]
+            shapes = self.canvas.shapes
+            for position in range(index, index + count):
+                shape = shapes[position]
+                group = self._group_by_type.get(shape.type_name())
+                if group is None:
+                    row = len(self._groups)
+                    self.beginInsertRows(QModelIndex(), row, row)
+                    group = self._group_by_type[shape.type_name()] = GroupNode(
+                        shape.type_name()
+                    )
+                    self._groups.append(group)
+                    self.endInsertRows()
+                node = ShapeNode(group, shape, position)
+                self._nodes[id(shape)] = node
+                row = bisect.bisect_left(group.children, position, key=_node_index)
+                if row < group.fetched:
+                    self.beginInsertRows(self._index(group), row, row)
+                    group.children.insert(row, node)
+                    group.fetched += 1
+                    self.endInsertRows()
+                else:
+                    group.children.insert(row, node)
+            for group in complete:
+                self._fetchRows(self._index(group), group, TREE_FETCH_BATCH)
+
+    def onShapesRemoved(self, index, shapes):
+        with self._changingRows():
+            for shape in shapes:
+                node = self._nodes.pop(id(shape), None)
+                if node is None:
+                    continue
+                group = node.parent
+                row = self._row(node)
+                if row < group.fetched:
+                    self.beginRemoveRows(self._index(group), row, row)
+                    del group.children[row]
+                    group.fetched -= 1
+                    self.endRemoveRows()
+                else:
+                    del group.children[row]
+                if not group.children:
+                    row = self._groups.index(group)
+                    self.beginRemoveRows(QModelIndex(), row, row)
+                    del self._groups[row]
+                    del self._group_by_type[group.shape_type]
+                    self.endRemoveRows()
+            self._shiftIndices(index + len(shapes), -len(shapes))
+
+    def onShapeChanged(self, shape):
+        node = self._nodes.get(id(shape))
+        if node is None or node.children is None:
+            return
+        with self._changingRows():
+            parent = self._index(node)
+            rows = shape_properties(shape)
+            complete = node.fetched == len(node.children)
+            visible = min(node.fetched, len(rows))
+            if visible < node.fetched:
+                self.beginRemoveRows(parent, visible, node.fetched - 1)
+                del node.children[visible:]
+                node.fetched = visible
+                self.endRemoveRows()
+            # Узлы видимых строк обновляются на месте: на них ссылаются индексы
+            # представления
+            for child, (text, property_name) in zip(node.children, rows):
+                child.text = text
+                child.property_name = property_name
+            node.children[visible:] = [
+                PropertyNode(node, text, property_name)
+                for text, property_name in rows[visible:]
+            ]
+            if visible:
+                self.dataChanged.emit(
+                    self.index(0, 0, parent), self.index(visible - 1, 0, parent)
+                )
+            if complete:
+                self._fetchRows(parent, node, TREE_FETCH_BATCH)
+
+    def _shiftIndices(self, start, delta):
+        """Сдвигает номера фигур, начиная с номера start, на delta"""
+        for group in self._groups:
+            children = group.children
+            row = bisect.bisect_left(children, start, key=_node_index)
+            for position in range(row, len(children)):
+                children[position].index += delta
+            if row < group.fetched:
+                parent = self._index(group)
+                self.dataChanged.emit(
+                    self.index(row, 0, parent),
+                    self.index(group.fetched - 1, 0, parent),
+                    [Qt.DisplayRole, Qt.UserRole],
+                )
+
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else None
+
+    def _index(self, node):
+        return self.createIndex(self._row(node), 0, node)
+
+    def _row(self, node):
+        if isinstance(node, GroupNode):
+            return self._groups.index(node)
+        if isinstance(node, ShapeNode):
+            return bisect.bisect_left(node.parent.children, node.index, key=_node_index)
+        return node.parent.children.index(node)
@@ -1,7 +1,7 @@
 from PySide6.QtWidgets import (
+    QAbstractItemView,
     QDockWidget,
-    QTreeWidget,
-    QTreeWidgetItem,
+    QTreeView,
     QMenu,
     QInputDialog,
     QMessageBox,
@@ -11,8 +11,8 @@ from PySide6.QtWidgets import (
     QPushButton,
     QHBoxLayout,
 )
-from PySide6.QtGui import QAction, QColor, QBrush, QIcon, QLinearGradient, QPalette
-from PySide6.QtCore import Qt, QPointF, QRectF, QSizeF
+from PySide6.QtGui import QAction, QColor, QPalette
+from PySide6.QtCore import Qt, QPointF, QRectF, QSizeF, QModelIndex
 from PySide6.QtGui import QFont
 from app.objects.line import Line
 from app.objects.circle import Circle, CircleByThreePoints
@@ -20,7 +20,7 @@ from app.objects.arc import ArcByThreePoints, ArcByRadiusChord
 from app.objects.polygon import Polygon
 from app.objects.rectangle import Rectangle
 from app.objects.spline import BezierSpline, SegmentSpline
-from PySide6.QtWidgets import QTreeWidgetItemIterator
+from app.ui.construction_model import ConstructionTreeModel
 from app.config.config import *
 
 
@@ -45,49 +45,49 @@ class ConstructionTree(QDockWidget):
         title_label.setFont(QFont("Consolas", 12))
         header_layout.addWidget(title_label)
 
-        self.treeWidget = QTreeWidget()
-        self.treeWidget.setHeaderHidden(True)
-        self.treeWidget.setAlternatingRowColors(True)
-        self.treeWidget.setFont(QFont("Arial", 10))
+        self.model = ConstructionTreeModel(canvas, self.isDarkTheme, self)
+        self.treeView = QTreeView()
+        self.treeView.setModel(self.model)
+        self.treeView.setHeaderHidden(True)
+        self.treeView.setAlternatingRowColors(True)
+        self.treeView.setUniformRowHeights(True)
+        self.treeView.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.treeView.setFont(QFont("Arial", 10))
 
         self.main_layout.addWidget(header_widget)
         # self.main_layout.addWidget(self.buttons_widget)
-        self.main_layout.addWidget(self.treeWidget)
+        self.main_layout.addWidget(self.treeView)
 
         self.setWidget(self.main_widget)
 
-        self.canvas.shapeAdded.connect(self.updateConstructionTree)
-        self.canvas.shapeRemoved.connect(self.updateConstructionTree)
-        self.canvas.zPressed.connect(self.updateConstructionTree)
-        self.treeWidget.itemClicked.connect(self.onTreeItemClicked)
-        self.treeWidget.itemDoubleClicked.connect(self.onTreeItemDoubleClicked)
-        self.treeWidget.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.treeWidget.customContextMenuRequested.connect(self.onTreeContextMenu)
+        # Раскрытые группы сохраняются при полном сбросе модели
+        self._expanded_groups = []
+        self.model.modelAboutToBeReset.connect(self.saveExpandState)
+        self.model.modelReset.connect(self.restoreExpandState)
+        self.canvas.shapesInserted.connect(self.highlightCurrentItem)
+        self.canvas.selectionChanged.connect(self.highlightCurrentItem)
+        self.model.rowsInserted.connect(self.onTreeRowsInserted)
+        self.treeView.clicked.connect(self.onTreeItemClicked)
+        self.treeView.doubleClicked.connect(self.onTreeItemDoubleClicked)
+        self.treeView.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.treeView.customContextMenuRequested.connect(self.onTreeContextMenu)
 
         self.updateThemeStyles()
 
-        self.updateConstructionTree()
+        self.highlightCurrentItem()
 
     def saveExpandState(self):
-        expanded_states = {}
-        iterator = QTreeWidgetItemIterator(self.treeWidget)
-        while iterator.value():
-            item = iterator.value()
-            # Сохраняем состояние только для групп
-            if item.childCount() > 0:
-                expanded_states[item.text(0)] = item.isExpanded()
-            iterator += 1
-        return expanded_states
-
-    def restoreExpandState(self, expanded_states):
-        if not expanded_states:
-            return
-        iterator = QTreeWidgetItemIterator(self.treeWidget)
-        while iterator.value():
-            item = iterator.value()
-            if item.text(0) in expanded_states and item.childCount() > 0:
-                item.setExpanded(expanded_states[item.text(0)])
-            iterator += 1
+        self._expanded_groups = [
+            shape_type
+            for shape_type in self.model.groupTypes()
+            if self.treeView.isExpanded(self.model.groupIndex(shape_type))
+        ]
+
+    def restoreExpandState(self):
+        for shape_type in self._expanded_groups:
+            index = self.model.groupIndex(shape_type)
+            if index.isValid():
+                self.treeView.expand(index)
 
     def updateThemeStyles(self):
         palette = QPalette()
@@ -99,16 +99,16 @@ class ConstructionTree(QDockWidget):
         on_surface = QColor("#000000")
         self.setStyleSheet(
             f"""
-            QTreeWidget {{
+            QTreeView {{
                 border: 1px solid #cccccc;
                 border-radius: 4px;
                 background-color: white;
             }}
-            QTreeWidget::item {{
+            QTreeView::item {{
                 padding: 4px;
                 border-bottom: 1px solid white;
             }}
-            QTreeWidget::item:selected {{
+            QTreeView::item:selected {{
                 background: #e3f2fd;
                 color: #1976d2;
             }}
@@ -122,7 +122,7 @@ class ConstructionTree(QDockWidget):
             QPushButton:hover {{
                 background-color: #1976d2;
             }}
-            QTreeWidget::item:has-children {{
+            QTreeView::item:has-children {{
                 background-color: white;
                 border-left: 4px solid {primary.name()};
                 margin: 2px;
@@ -130,346 +130,84 @@ class ConstructionTree(QDockWidget):
         """
         )
 
-    def saveExpandState(self):
-        expanded_states = {}
-
-        iterator = QTreeWidgetItemIterator(self.treeWidget)
-        while iterator.value():
-            item = iterator.value()
-            expanded_states[item.text(0)] = item.isExpanded()
-            iterator += 1
-        return expanded_states
-
-    def restoreExpandState(self, expanded_states):
-        if not expanded_states:
-            return
-
-        iterator = QTreeWidgetItemIterator(self.treeWidget)
-        while iterator.value():
-            item = iterator.value()
-            if item.text(0) in expanded_states:
-                item.setExpanded(expanded_states[item.text(0)])
-            else:
-                item.setExpanded(False)
-            iterator += 1
-
-    def updateConstructionTree(self):
-        expanded_states = self.saveExpandState()
-        self.treeWidget.clear()
-
-        shape_names = {
-            "Line": "Линия",
-            "Circle": "Окружность (центр и радиус)",
-            "Rectangle": "Прямоугольник",
-            "Polygon": "Многоугольник",
-            "CircleByThreePoints": "Окружность (3 точки)",
-            "ArcByThreePoints": "Дуга (3 точки)",
-            "ArcByRadiusChord": "Дуга (радиус и хорда)",
-            "BezierSpline": "Сплайн Безье",
-            "SegmentSpline": "Сплайн по отрезкам",
-        }
-
-        shape_icons = {
-            "Line": "resources/icons/дерево_линия.png",
-            "Circle": "resources/icons/окружность_по_центру_и_радиусу.png",
-            "Rectangle": "resources/icons/дерево_прямоугольник.png",
-            "Polygon": "resources/icons/дерево_многоугольник.png",
-            "CircleByThreePoints": "resources/icons/окружность_по_трём_точкам.png",
-            "ArcByThreePoints": "resources/icons/дуга_по_трём_точкам.png",
-            "ArcByRadiusChord": "resources/icons/дуга_по_радиусу_и_хорде.png",
-            "BezierSpline": "resources/icons/сплайн_безье.png",
-            "SegmentSpline": "resources/icons/сплайн_по_отрезкам.png",
-        }
-
-        line_type_names = {
-            "solid": "Сплошная",
-            "dash": "Штриховая",
-            "dash_dot": "Штрих-пунктирная",
-            "dash_dot_dot": "Штрих-пунктирная с двумя точками",
-        }
-
-        is_dark_theme = (
+    def isDarkTheme(self):
+        return (
             self.parent.is_dark_theme
             if hasattr(self.parent, "is_dark_theme")
             else False
         )
 
-        # Группировка объектов по типам
-        grouped_shapes = {}
-        for idx, shape in enumerate(self.canvas.shapes):
-            shape_type = type(shape).__name__
-            if shape_type not in grouped_shapes:
-                grouped_shapes[shape_type] = []
-            grouped_shapes[shape_type].append((idx, shape))
-
-        # Создание групп
-        for group_type in grouped_shapes:
-            group_item = QTreeWidgetItem([shape_names.get(group_type, group_type)])
-            group_item.setIcon(
-                0, QIcon(shape_icons.get(group_type, "icons/default.png"))
-            )
-            group_item.setBackground(
-                0, QBrush(QColor("#2E2E2E") if is_dark_theme else "#E0E0E0")
-            )
-            group_item.setForeground(
-                0, QColor("#FFFFFF") if is_dark_theme else QColor("#000000")
-            )
-            group_item.setFont(0, QFont("Consolas", 10, QFont.Bold))
-            self.treeWidget.addTopLevelItem(group_item)
-
-            # Добавление объектов в группы
-            for index, shape in grouped_shapes[group_type]:
-                shape_type = type(shape).__name__
-                item_text = f"{shape_names.get(shape_type, shape_type)} {index + 1}"
-                tree_item = QTreeWidgetItem([item_text])
-
-                # Настройка иконки
-                # icon = QIcon(shape_icons.get(shape_type, "icons/default.png"))
-                # tree_item.setIcon(0, icon)
-
-                # Градиентный фон для элемента
-                gradient = QLinearGradient(0, 0, 100, 0)
-                base_color = QColor(PRIMARY_COLOR)
-                gradient.setColorAt(0.0, base_color.lighter(150))
-                gradient.setColorAt(1.0, base_color)
-                tree_item.setBackground(0, QBrush(gradient))
-
-                # Сохраняем данные об объекте
-                tree_item.setData(0, Qt.UserRole, {"index": index})
-
-                # Добавление в группу
-                group_item.addChild(tree_item)
-
-                # Создание дочерних элементов (аналогично оригинальному коду)
-                def create_child_item(
-                    parent, text, index=None, property_name=None, is_editable=True
-                ):
-                    item = QTreeWidgetItem([text])
-                    if is_editable and index is not None:
-                        item.setData(
-                            0, Qt.UserRole, {"index": index, "property": property_name}
-                        )
-                        item.setFlags(item.flags() | Qt.ItemIsEditable)
-                    parent.addChild(item)
-                    item.setFont(0, QFont("Consolas", 9))
-                    if is_dark_theme:
-                        item.setForeground(0, QColor("#ffffff"))
-                    return item
-
-                if hasattr(shape, "line_type"):
-                    line_type_text = line_type_names.get(
-                        shape.line_type, shape.line_type
-                    )
-                    create_child_item(
-                        tree_item, f"Тип линии: {line_type_text}", index, "line_type"
-                    )
-
-                if hasattr(shape, "line_thickness"):
-                    create_child_item(
-                        tree_item,
-                        f"Толщина линии: {shape.line_thickness:.2f}",
-                        index,
-                        "line_thickness",
-                    )
-
-                # Здесь добавляются специфичные для типа фигуры параметры
-                # (оставшаяся часть кода создания дочерних элементов из оригинального метода)
-
-                if isinstance(shape, Line):
-                    create_child_item(
-                        tree_item,
-                        f"Начало: ({shape.start_point.x():.2f}, {shape.start_point.y():.2f})",
-                        index,
-                        "start_point",
-                    )
-                    create_child_item(
-                        tree_item,
-                        f"Конец: ({shape.end_point.x():.2f}, {shape.end_point.y():.2f})",
-                        index,
-                        "end_point",
-                    )
-                    create_child_item(
-                        tree_item,
-                        f"Длина: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                elif isinstance(shape, Circle):
-                    create_child_item(
-                        tree_item,
-                        f"Центр: ({shape.center.x():.2f}, {shape.center.y():.2f})",
-                        index,
-                        "center",
-                    )
-                    create_child_item(
-                        tree_item, f"Радиус: {shape.radius:.2f}", index, "radius"
-                    )
-                    create_child_item(
-                        tree_item,
-                        f"Длина окружности: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                elif isinstance(shape, Rectangle):
-                    rect = shape.rect
-                    topLeft = rect.topLeft()
-                    create_child_item(
-                        tree_item,
-                        f"Верхний левый угол: ({topLeft.x():.2f}, {topLeft.y():.2f})",
-                        index,
-                        "top_left",
-                    )
-                    create_child_item(
-                        tree_item, f"Ширина: {rect.width():.2f}", index, "width"
-                    )
-                    create_child_item(
-                        tree_item, f"Высота: {rect.height():.2f}", index, "height"
-                    )
-                    create_child_item(
-                        tree_item,
-                        f"Периметр: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                elif isinstance(shape, Polygon):
-                    for i, p in enumerate(shape.points):
-                        create_child_item(
-                            tree_item,
-                            f"Вершина {i + 1}: ({p.x():.2f}, {p.y():.2f})",
-                            index,
-                            f"point_{i}",
-                        )
-                    create_child_item(
-                        tree_item,
-                        f"Периметр: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                elif isinstance(shape, CircleByThreePoints):
-                    for i, p in enumerate(shape.points):
-                        create_child_item(
-                            tree_item,
-                            f"Точка {i + 1}: ({p.x():.2f}, {p.y():.2f})",
-                            index,
-                            f"point_{i}",
-                        )
-                    create_child_item(
-                        tree_item,
-                        f"Длина окружности: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                elif isinstance(shape, ArcByThreePoints):
-                    for i, p in enumerate(shape.points):
-                        create_child_item(
-                            tree_item,
-                            f"Точка {i + 1}: ({p.x():.2f}, {p.y():.2f})",
-                            index,
-                            f"point_{i}",
-                        )
-                    create_child_item(
-                        tree_item,
-                        f"Длина дуги: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                elif isinstance(shape, ArcByRadiusChord):
-                    create_child_item(
-                        tree_item,
-                        f"Центр: ({shape.center.x():.2f}, {shape.center.y():.2f})",
-                        index,
-                        "center",
-                    )
-                    create_child_item(
-                        tree_item,
-                        f"Точка радиуса: ({shape.radius_point.x():.2f}, {shape.radius_point.y():.2f})",
-                        index,
-                        "radius_point",
-                    )
-                    create_child_item(
-                        tree_item,
-                        f"Точка хорды: ({shape.chord_point.x():.2f}, {shape.chord_point.y():.2f})",
-                        index,
-                        "chord_point",
-                    )
-                    create_child_item(
-                        tree_item,
-                        f"Длина дуги: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                elif isinstance(shape, BezierSpline):
-                    for i, p in enumerate(shape.points):
-                        create_child_item(
-                            tree_item,
-                            f"Контрольная точка {i + 1}: ({p.x():.2f}, {p.y():.2f})",
-                            index,
-                            f"control_point_{i}",
-                        )
-                    create_child_item(
-                        tree_item,
-                        f"Длина сплайна: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                elif isinstance(shape, SegmentSpline):
-                    for i, p in enumerate(shape.points):
-                        create_child_item(
-                            tree_item,
-                            f"Точка {i + 1}: ({p.x():.2f}, {p.y():.2f})",
-                            index,
-                            f"point_{i}",
-                        )
-                    create_child_item(
-                        tree_item,
-                        f"Длина сплайна: {shape.get_total_length():.2f}",
-                        is_editable=False,
-                    )
-
-                else:
-                    create_child_item(
-                        tree_item, "Нет дополнительной информации", is_editable=False
-                    )
+    def updateConstructionTree(self):
+        """Полностью перестраивает дерево по списку фигур холста"""
+        self.model.reset()
+        self.highlightCurrentItem()
 
-        # Восстановление состояния развернутости
-        self.restoreExpandState(expanded_states)
+    def highlightCurrentItem(self):
+        """Делает текущей строку фигуры, выделенной на холсте.
 
-        # Подсветка текущего элемента
-        if self.canvas.highlighted_shape_index is not None:
-            iterator = QTreeWidgetItemIterator(self.treeWidget)
-            while iterator.value():
-                item = iterator.value()
-                data = item.data(0, Qt.UserRole)
-                if data and data.get("index") == self.canvas.highlighted_shape_index:
-                    self.treeWidget.setCurrentItem(item)
-                    break
-                iterator += 1
+        Строки не догружаются: если строка фигуры ещё не загружена, текущая
+        строка снимается, а выделение переносится в дерево, когда
+        пользователь раскроет группу или прокрутит её до этой строки.
+        """
+        index = self.canvas.highlighted_shape_index
+        model_index = QModelIndex()
+        if index is not None:
+            model_index = self.model.shapeIndex(index)
+        if model_index.isValid():
+            self.treeView.setCurrentIndex(model_index)
+        elif self.treeView.currentIndex().isValid():
+            self.treeView.setCurrentIndex(model_index)
+
+    def onTreeRowsInserted(self, parent, first, last):
+        index = self.canvas.highlighted_shape_index
+        if index is None:
+            return
+        model_index = self.model.shapeIndex(index)
+        # Строка выделенной фигуры только что загрузилась
+        if (
+            model_index.isValid()
+            and first <= model_index.row() <= last
+            and model_index.parent() == parent
+        ):
+            self.treeView.setCurrentIndex(model_index)
+
+    def itemShapeIndex(self, item):
+        """Индекс фигуры, к которой относится элемент дерева, или None"""
+        while item.isValid():
+            data = item.data(Qt.UserRole)
+            if data is not None and "index" in data:
+                return data["index"]
+            item = item.parent()
+        return None
 
     def onTreeItemClicked(self, item):
-        data = item.data(0, Qt.UserRole)
-        if data is not None and "index" in data:
-            index = data["index"]
+        index = self.itemShapeIndex(item)
+        if index is not None:
             if 0 <= index < len(self.canvas.shapes):
-                self.canvas.highlighted_shape_index = index
-                self.canvas.repaint()
+                self.canvas.highlightShape(index)
 
-    def onTreeItemDoubleClicked(self, item, column):
-        data = item.data(0, Qt.UserRole)
+    def onTreeItemDoubleClicked(self, item):
+        data = item.data(Qt.UserRole)
         if data is not None:
-            index = data.get("index")
+            index = self.itemShapeIndex(item)
             property_name = data.get("property")
             if index is not None and property_name is not None:
                 if 0 <= index < len(self.canvas.shapes):
                     shape = self.canvas.shapes[index]
+                    captured = self.canvas.history.capture([shape])
                     self.editShapeProperty(shape, property_name)
-                    self.canvas.update()
-                    self.updateConstructionTree()
+                    self.canvas.refreshShape(shape)
+                    self.canvas.history.recordChanges("Изменение свойства", captured)
 
     def onTreeContextMenu(self, position):
-        item = self.treeWidget.itemAt(position)
-        if item:
-            data = item.data(0, Qt.UserRole)
+        item = self.treeView.indexAt(position)
+        if item.isValid():
+            data = item.data(Qt.UserRole)
             if data is not None and "index" in data and "property" not in data:
+                selected = self.canvas.selected_indices
+                if len(selected) > 1 and data["index"] in selected:
+                    self.showSelectionMenu(position)
+                    return
                 menu = QMenu()
                 edit_action = QAction("Редактировать", self)
                 edit_action.triggered.connect(
@@ -494,11 +232,82 @@ class ConstructionTree(QDockWidget):
                 menu.addAction(rotate_action)
                 menu.addSeparator()
                 menu.addAction(thickness_action)
-                menu.exec(self.treeWidget.viewport().mapToGlobal(position))
+                menu.exec(self.treeView.viewport().mapToGlobal(position))
+
+    def showSelectionMenu(self, position):
+        """Контекстное меню для нескольких выбранных на холсте фигур"""
+        count = len(self.canvas.selected_indices)
+        menu = QMenu()
+        delete_action = QAction(f"Удалить выбранные ({count})", self)
+        delete_action.triggered.connect(self.deleteSelectedShapes)
+        rotate_action = QAction("Повернуть выбранные", self)
+        rotate_action.triggered.connect(self.rotateSelectedShapes)
+        thickness_action = QAction("Изменить толщину выбранных", self)
+        thickness_action.triggered.connect(self.changeSelectedThickness)
+
+        menu.addAction(delete_action)
+        menu.addAction(rotate_action)
+        menu.addSeparator()
+        menu.addAction(thickness_action)
+        menu.exec(self.treeView.viewport().mapToGlobal(position))
+
+    def deleteSelectedShapes(self):
+        count = len(self.canvas.deleteSelection())
+        self.parent.statusBar.showMessage(f"Удалено объектов: {count}")
+
+    def changeSelectedThickness(self):
+        """Задаёт одну толщину линии всем выбранным фигурам"""
+        shapes = self.canvas.selectedShapes()
+        if not shapes:
+            return
+        thickness, ok = QInputDialog.getDouble(
+            self,
+            "Толщина линии",
+            "Введите толщину линии:",
+            shapes[-1].line_thickness,
+            0.1,
+            10.0,
+            1,
+        )
+        if ok:
+            captured = self.canvas.history.capture(shapes)
+            for shape in shapes:
+                shape.line_thickness = thickness
+                self.canvas.refreshShape(shape)
+            self.canvas.history.recordChanges("Изменение толщины", captured)
+
+    def rotateSelectedShapes(self):
+        """Поворачивает выбранные фигуры вокруг центра их общих габаритов"""
+        shapes = self.canvas.selectedShapes()
+        if not shapes:
+            return
+        angle, ok = QInputDialog.getDouble(
+            self,
+            "Поворот фигур",
+            "Введите угол поворота в градусах\n(положительный - против часовой стрелки):",
+            0,
+            -360,
+            360,
+            1,
+        )
+        if not ok:
+            return
+
+        bounds = QRectF()
+        for shape in shapes:
+            rect = shape.bounding_rect()
+            if rect is not None:
+                bounds = bounds.united(rect)
+        center = bounds.center()
+        captured = self.canvas.history.capture(shapes)
+        for shape in shapes:
+            shape.rotate_around_point(angle, center)
+            self.canvas.refreshShape(shape)
+        self.canvas.history.recordChanges("Поворот", captured)
 
     def changeShapeThickness(self, item):
         """Изменяет толщину линии выбранной фигуры"""
-        data = item.data(0, Qt.UserRole)
+        data = item.data(Qt.UserRole)
         if data is not None and "index" in data:
             index = data["index"]
             if 0 <= index < len(self.canvas.shapes):
@@ -516,12 +325,13 @@ class ConstructionTree(QDockWidget):
                     )
 
                     if ok:
+                        captured = self.canvas.history.capture([shape])
                         shape.line_thickness = thickness
-                        self.canvas.update()
-                        self.updateConstructionTree()
+                        self.canvas.refreshShape(shape)
+                        self.canvas.history.recordChanges("Изменение толщины", captured)
 
     def rotateShape(self, item):
-        data = item.data(0, Qt.UserRole)
+        data = item.data(Qt.UserRole)
         if data is not None and "index" in data:
             index = data["index"]
             if 0 <= index < len(self.canvas.shapes):
@@ -557,16 +367,18 @@ class ConstructionTree(QDockWidget):
                 else:
                     return
 
+                captured = self.canvas.history.capture([shape])
                 shape.rotate_around_point(angle, center)
-                self.canvas.update()
-                self.updateConstructionTree()
+                self.canvas.refreshShape(shape)
+                self.canvas.history.recordChanges("Поворот", captured)
 
     def editShape(self, item):
-        data = item.data(0, Qt.UserRole)
+        data = item.data(Qt.UserRole)
         if data is not None and "index" in data:
             index = data["index"]
             if 0 <= index < len(self.canvas.shapes):
                 shape = self.canvas.shapes[index]
+                captured = self.canvas.history.capture([shape])
                 self.editGeneralShapeProperties(shape)
                 # TODO: wtf?
                 if isinstance(shape, Line):
@@ -593,17 +405,17 @@ class ConstructionTree(QDockWidget):
                         "Редактировать",
                         "Редактирование этого типа фигур не поддерживается.",
                     )
-                self.canvas.update()
-                self.updateConstructionTree()
+                self.canvas.refreshShape(shape)
+                self.canvas.history.recordChanges("Редактирование", captured)
 
     def deleteShape(self, item):
-        data = item.data(0, Qt.UserRole)
+        data = item.data(Qt.UserRole)
         if data is not None and "index" in data:
             index = data["index"]
             if 0 <= index < len(self.canvas.shapes):
-                item_text = item.text(0)
+                item_text = item.data()
+                # Номера выбранных фигур сдвигает Canvas.updateSelectionIndices
                 del self.canvas.shapes[index]
-                self.canvas.highlighted_shape_index = None
                 self.canvas.shapeRemoved.emit()
                 self.canvas.update()
                 self.parent.statusBar.showMessage(f"Удален объект: {item_text}")
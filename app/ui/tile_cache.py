@@ -0,0 +1,110 @@
+import math
+from collections import OrderedDict
+from PySide6.QtGui import QImage, QPainter, QTransform
+from PySide6.QtCore import Qt, QPoint, QRectF
+from app.config.config import TILE_SIZE, TILE_CACHE_LIMIT
+
+
+class TileCache:
+    """Кэш растровых плиток с отрисованными фигурами холста.
+
+    Плитки строятся в пиксельной системе, привязанной к началу координат
+    холста, поэтому при панорамировании они остаются валидными и только
+    перерисовываются в новом месте. Ключ плитки - (вид, tx, ty), где вид
+    задаётся масштабом, поворотом и плотностью пикселей экрана.
+    """
+
+    def __init__(self, tile_size=TILE_SIZE, limit=TILE_CACHE_LIMIT):
+        self.tile_size = tile_size
+        self.limit = limit
+        self._tiles = OrderedDict()
+        self._view = None
+        self._view_transform = QTransform()
+
+    def __len__(self):
+        return len(self._tiles)
+
+    def set_view(self, scale, rotation, pixel_ratio=1.0):
+        view = (scale, rotation, pixel_ratio)
+        if view == self._view:
+            return
+        self._view = view
+        transform = QTransform()
+        transform.scale(scale, scale)
+        transform.rotate(rotation)
+        transform.scale(1, -1)
+        self._view_transform = transform
+
+    def clear(self):
+        self._tiles.clear()
+
+    def invalidate(self, rect=None):
+        """Удаляет плитки, задевающие логический прямоугольник rect.
+
+        Без rect удаляются все плитки. Плитки других видов удаляются всегда,
+        так как пересчитывать для них область нет смысла.
+        """
+        if rect is None or self._view is None:
+            self._tiles.clear()
+            return
+        x0, y0, x1, y1 = self._tile_range(self._view_transform.mapRect(rect))
+        for key in list(self._tiles):
+            view, tx, ty = key
+            if view != self._view or (x0 <= tx <= x1 and y0 <= ty <= y1):
+                del self._tiles[key]
+
+    def visible_tiles(self, device_rect, origin):
+        """Плитки, покрывающие device_rect, и их положение на экране"""
+        size = self.tile_size
+        x0, y0, x1, y1 = self._tile_range(
+            QRectF(device_rect).translated(-origin.x(), -origin.y())
+        )
+        return [
+            (tx, ty, QPoint(origin.x() + tx * size, origin.y() + ty * size))
+            for ty in range(y0, y1 + 1)
+            for tx in range(x0, x1 + 1)
+        ]
+
+    def tile(self, tx, ty, draw_shapes):
+        """Возвращает плитку, при необходимости отрисовывая её.
+
+        draw_shapes(painter, rect) рисует фигуры, попадающие в логический
+        прямоугольник rect, painter уже настроен на координаты холста.
+        """
+        key = (self._view, tx, ty)
+        image = self._tiles.get(key)
+        if image is not None:
+            self._tiles.move_to_end(key)
+            return image
+
+        size = self.tile_size
+        pixel_ratio = self._view[2]
+        image = QImage(
+            math.ceil(size * pixel_ratio),
+            math.ceil(size * pixel_ratio),
+            QImage.Format_ARGB32_Premultiplied,
+        )
+        image.setDevicePixelRatio(pixel_ratio)
+        image.fill(Qt.transparent)
+
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(-tx * size, -ty * size)
+        painter.setTransform(self._view_transform, True)
+        inverse, _ = painter.transform().inverted()
+        draw_shapes(painter, inverse.mapRect(QRectF(0, 0, size, size)))
+        painter.end()
+
+        self._tiles[key] = image
+        while len(self._tiles) > self.limit:
+            self._tiles.popitem(last=False)
+        return image
+
+    def _tile_range(self, rect):
+        size = self.tile_size
+        return (
+            math.floor(rect.left() / size),
+            math.floor(rect.top() / size),
+            math.floor(rect.right() / size),
+            math.floor(rect.bottom() / size),
+        )
@@ -0,0 +1,103 @@
+import threading
+from types import SimpleNamespace
+from PySide6.QtCore import QObject, QThread, Signal
+from PySide6.QtGui import QColor
+from app.utils.handle_dxf import iter_dxf_shapes
+
+
+class _DxfImportWorker(QObject):
+    """Выполняет iter_dxf_shapes в потоке импорта"""
+
+    shapesReady = Signal(list)
+    progress = Signal(int, int)
+    failed = Signal(str)
+    done = Signal()
+
+    def __init__(self, filename, settings, cancelled):
+        super().__init__()
+        self.filename = filename
+        self.settings = settings
+        self.cancelled = cancelled
+
+    def run(self):
+        try:
+            for shapes, done, total in iter_dxf_shapes(self.filename, self.settings):
+                if self.cancelled.is_set():
+                    break
+                if shapes:
+                    self.shapesReady.emit(shapes)
+                self.progress.emit(done, total)
+        except Exception as e:
+            self.failed.emit(str(e))
+        self.done.emit()
+
+
+class DxfImport(QObject):
+    """Фоновый импорт DXF-файла.
+
+    Чтение и преобразование сущностей идут в отдельном потоке, готовые фигуры
+    приходят в поток интерфейса порциями через shapesLoaded. После cancel()
+    поток останавливается на ближайшей порции, а уже отправленные им порции
+    отбрасываются; отменённый импорт больше не испускает сигналов.
+    """
+
+    shapesLoaded = Signal(list)
+    progress = Signal(int, int)
+    finished = Signal()
+    failed = Signal(str)
+
+    def __init__(self, filename, canvas, parent=None):
+        super().__init__(parent)
+        self.filename = filename
+        self._cancelled = threading.Event()
+        self._error = None
+        # Поток импорта не обращается к холсту: нужные настройки копируются
+        settings = SimpleNamespace(
+            lineThickness=canvas.lineThickness,
+            currentColor=QColor(canvas.currentColor),
+            dash_parameters=dict(canvas.dash_parameters),
+            dash_auto_mode=canvas.dash_auto_mode,
+        )
+        self._thread = QThread(self)
+        self._worker = _DxfImportWorker(filename, settings, self._cancelled)
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._thread.finished.connect(self._worker.deleteLater)
+        self._worker.shapesReady.connect(self._onShapesReady)
+        self._worker.progress.connect(self._onProgress)
+        self._worker.failed.connect(self._onFailed)
+        self._worker.done.connect(self._onDone)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def isCancelled(self):
+        return self._cancelled.is_set()
+
+    def wait(self):
+        """Дожидается завершения потока импорта"""
+        self._thread.quit()
+        self._thread.wait()
+
+    def _onShapesReady(self, shapes):
+        if not self.isCancelled():
+            self.shapesLoaded.emit(shapes)
+
+    def _onProgress(self, done, total):
+        if not self.isCancelled():
+            self.progress.emit(done, total)
+
+    def _onFailed(self, message):
+        self._error = message
+
+    def _onDone(self):
+        self.wait()
+        if not self.isCancelled():
+            if self._error is not None:
+                self.failed.emit(self._error)
+            else:
+                self.finished.emit()
+        self.deleteLater()
@@ -0,0 +1,71 @@
+from PySide6.QtCore import QObject, QThread, Signal
+from app.utils.handle_dxf import DxfExporter
+
+
+class _DxfSaveWorker(QObject):
+    """Выполняет DxfExporter.save в потоке сохранения"""
+
+    done = Signal()
+
+    def __init__(self, exporter, filename):
+        super().__init__()
+        self.exporter = exporter
+        self.filename = filename
+        self.error = None
+
+    def run(self):
+        try:
+            self.exporter.save(self.filename)
+        except Exception as e:
+            self.error = str(e)
+        self.done.emit()
+
+
+class DxfSave(QObject):
+    """Фоновое сохранение фигур в DXF.
+
+    Данные фигур снимаются в конструкторе (DxfExporter.add_shapes), поэтому
+    после создания объекта фигуры можно изменять. Документ строится и
+    записывается в отдельном потоке через временный файл, так что на диске
+    остаётся либо прежний файл, либо новый целиком. По окончании
+    испускается finished или failed, затем объект удаляет себя.
+    """
+
+    finished = Signal()
+    failed = Signal(str)
+
+    def __init__(self, shapes, filename, parent=None):
+        super().__init__(parent)
+        self.filename = filename
+        self._completed = False
+        exporter = DxfExporter()
+        exporter.add_shapes(shapes)
+        self._thread = QThread(self)
+        self._worker = _DxfSaveWorker(exporter, filename)
+        self._worker.moveToThread(self._thread)
+        self._thread.started.connect(self._worker.run)
+        self._worker.done.connect(self._onDone)
+
+    def start(self):
+        self._thread.start()
+
+    def wait(self):
+        """Дожидается записи файла; возвращает True, если она удалась"""
+        self._thread.quit()
+        self._thread.wait()
+        self._onDone()
+        return self._worker.error is None
+
+    def _onDone(self):
+        # Вызывается и сигналом потока, и из wait(): результат сообщается один раз
+        if self._completed:
+            return
+        self._completed = True
+        self._thread.quit()
+        self._thread.wait()
+        if self._worker.error is not None:
+            self.failed.emit(self._worker.error)
+        else:
+            self.finished.emit()
+        self._worker.deleteLater()
+        self.deleteLater()
@@ -1,5 +1,16 @@
+import bisect
 import ezdxf
+import io
+import itertools
 import math
+import mmap
+import multiprocessing
+import os
+import re
+import tempfile
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from ezdxf.addons import iterdxf
 from PySide6.QtCore import QPointF, QRectF
 from PySide6.QtGui import QColor
 from app.objects.line import Line
@@ -8,218 +19,425 @@ from app.objects.arc import ArcByThreePoints, ArcByRadiusChord
 from app.objects.polygon import Polygon
 from app.objects.rectangle import Rectangle
 from app.objects.spline import BezierSpline, SegmentSpline
+from app.objects.shape_store import ShapeStore, StyleTable, StoredLine, StoredPolygon
+from app.config.config import (
+    DXF_IMPORT_CHUNK_SIZE,
+    DXF_STREAMING_IMPORT_SIZE,
+    DXF_PARALLEL_IMPORT_SIZE,
+    DXF_IMPORT_PROCESSES,
+)
+
+# Типы сущностей, которые умеет преобразовывать convert_dxf_to_shape
+DXF_IMPORT_TYPES = ("LINE", "CIRCLE", "ARC", "LWPOLYLINE", "POLYLINE", "SPLINE")
+
+# Разметка ASCII DXF для деления секции ENTITIES на участки. Строка "0" перед
+# строкой с буквами - всегда код группы, а не значение: после значения идёт
+# числовой код
+_DXF_SECTION = re.compile(
+    rb"(?:\A|\n)[ \t]*0[ \t]*\r?\nSECTION[ \t]*\r?\n"
+    rb"[ \t]*2[ \t]*\r?\n(HEADER|ENTITIES)[ \t]*\r?\n"
+)
+_DXF_ENDSEC = re.compile(rb"\n[ \t]*0[ \t]*\r?\nENDSEC[ \t]*\r?\n")
+# Начало сущности; VERTEX, SEQEND и ATTRIB относятся к предыдущей сущности
+_DXF_ENTITY = re.compile(
+    rb"\n[ \t]*0[ \t]*\r?\n(?=[A-Z_])(?!VERTEX|SEQEND|ATTRIB|ENDSEC)"
+)
+
+
+# Стандартные цвета ACI
+ACI_COLORS = {
+    0: (0, 0, 0),
+    1: (255, 0, 0),
+    2: (255, 255, 0),
+    3: (0, 255, 0),
+    4: (0, 255, 255),
+    5: (0, 0, 255),
+    6: (255, 0, 255),
+    7: (255, 255, 255),
+    8: (128, 128, 128),
+    9: (192, 192, 192),
+}
+_RGB_TO_ACI = {rgb: aci for aci, rgb in ACI_COLORS.items()}
+
+# Стандартные веса линий DXF, сотые доли миллиметра
+DXF_LINEWEIGHTS = (
+    0,
+    5,
+    9,
+    13,
+    15,
+    18,
+    20,
+    25,
+    30,
+    35,
+    40,
+    50,
+    53,
+    60,
+    70,
+    80,
+    90,
+    100,
+    106,
+    120,
+    140,
+    158,
+    200,
+    211,
+)
+
+DXF_LINE_TYPES = {
+    "solid": "CONTINUOUS",
+    "dash": "DASHED",
+    "dash_dot": "DASHDOT",
+    "dash_dot_dot": "DASHDOT2",
+}
 
 
 def save_to_dxf(shapes, filename):
-    doc = ezdxf.new("R12")
-    msp = doc.modelspace()
-
-    thickness_layers = {}
-    for shape in shapes:
-        if hasattr(shape, "line_thickness") and shape.line_thickness > 0:
-            thickness = shape.line_thickness
-            if thickness not in thickness_layers:
-                layer_name = f"Thickness_{thickness}"
-                layer = doc.layers.add(layer_name)
-                layer.lineweight = thickness * 100
-                thickness_layers[thickness] = layer_name
-
-    ensure_line_types_exist(doc)
-
-    for shape in shapes:
-        dxfattribs = get_dxf_attributes(shape)
-
-        if hasattr(shape, "line_thickness") and shape.line_thickness > 0:
-            thickness = shape.line_thickness
-            dxfattribs["layer"] = thickness_layers.get(thickness, "0")
-
-        if isinstance(shape, Line):
-            msp.add_line(
-                (shape.start_point.x(), shape.start_point.y()),
-                (shape.end_point.x(), shape.end_point.y()),
-                dxfattribs=dxfattribs,
-            )
+    exporter = DxfR12Exporter()
+    exporter.add_shapes(shapes)
+    exporter.save(filename)
+    return True
 
-        elif isinstance(shape, Circle):
-            msp.add_circle(
-                (shape.center.x(), shape.center.y()),
-                shape.radius,
-                dxfattribs=dxfattribs,
-            )
 
-        elif isinstance(shape, CircleByThreePoints):
-            center, radius = shape.calculate_circle()
-            if center and radius:
-                msp.add_circle((center.x(), center.y()), radius, dxfattribs=dxfattribs)
-
-        elif isinstance(shape, ArcByThreePoints):
-            center, radius, start_angle, span_angle = shape.calculate_arc()
-            if center and radius:
-                start_angle_deg = start_angle % 360
-                span_angle = (
-                    span_angle % 360 if span_angle >= 0 else (span_angle % 360) + 360
-                )
-                end_angle_deg = (start_angle_deg + span_angle) % 360
-                if end_angle_deg < start_angle_deg:
-                    end_angle_deg += 360
-                msp.add_arc(
-                    (center.x(), center.y()),
-                    radius,
-                    start_angle_deg,
-                    end_angle_deg,
-                    dxfattribs=dxfattribs,
-                )
+def save_to_dxf_advanced(shapes, filename):
+    exporter = DxfExporter()
+    exporter.add_shapes(shapes)
+    exporter.save(filename)
+    return True
 
-        elif isinstance(shape, ArcByRadiusChord):
-            radius, start_angle, span_angle = shape.calculate_arc()
-            start_angle_deg = start_angle % 360
-            span_angle = (
-                span_angle % 360 if span_angle >= 0 else (span_angle % 360) + 360
-            )
-            end_angle_deg = (start_angle_deg + span_angle) % 360
-            if end_angle_deg < start_angle_deg:
-                end_angle_deg += 360
-            msp.add_arc(
-                (shape.center.x(), shape.center.y()),
-                radius,
-                start_angle_deg,
-                end_angle_deg,
-                dxfattribs=dxfattribs,
-            )
 
-        elif isinstance(shape, Rectangle):
-            rect = shape.rect
-            points = [
-                (rect.topLeft().x(), rect.topLeft().y()),
-                (rect.topRight().x(), rect.topRight().y()),
-                (rect.bottomRight().x(), rect.bottomRight().y()),
-                (rect.bottomLeft().x(), rect.bottomLeft().y()),
-            ]
-            polyline = msp.add_polyline(points, dxfattribs=dxfattribs)
-            polyline.is_closed = True
-
-        elif isinstance(shape, Polygon):
-            points = [(point.x(), point.y()) for point in shape.points]
-            if points:
-                polyline = msp.add_polyline(points, dxfattribs=dxfattribs)
-                polyline.is_closed = (
-                    True if len(points) > 1 and points[0] == points[-1] else False
-                )
+_NO_OPTIONS = {}
 
-        elif isinstance(shape, BezierSpline):
-            if len(shape.points) >= 2:
-                t_values = [i / 100 for i in range(101)]
-                polyline_points = []
-                for t in t_values:
-                    point = shape.bezier_point(t)
-                    polyline_points.append((point.x(), point.y()))
-                msp.add_polyline(polyline_points, dxfattribs=dxfattribs)
-
-        elif isinstance(shape, SegmentSpline):
-            spline_points = shape.generate_spline_points()
-            if spline_points:
-                points = [(point.x(), point.y()) for point in spline_points]
-                msp.add_polyline(points, dxfattribs=dxfattribs)
-
-    doc.saveas(filename)
-    return True
 
+def _line_entity(shape):
+    x1, y1, x2, y2 = shape.segment()
+    return "add_line", ((x1, y1), (x2, y2)), _NO_OPTIONS
 
-def save_to_dxf_advanced(shapes, filename):
-    doc = ezdxf.new("R2000")
-    doc.header["$LWDISPLAY"] = 1
-    msp = doc.modelspace()
 
-    ensure_line_types_exist(doc)
+def _circle_entity(shape):
+    return (
+        "add_circle",
+        ((shape.center.x(), shape.center.y()), shape.radius),
+        _NO_OPTIONS,
+    )
 
-    for shape in shapes:
-        dxfattribs = get_dxf_attributes_advanced(shape)
 
-        if isinstance(shape, Line):
-            msp.add_line(
-                (shape.start_point.x(), shape.start_point.y()),
-                (shape.end_point.x(), shape.end_point.y()),
-                dxfattribs=dxfattribs,
-            )
+def _circle_by_three_points_entity(shape):
+    center, radius = shape.calculate_circle()
+    if center and radius:
+        return "add_circle", ((center.x(), center.y()), radius), _NO_OPTIONS
+    return None
 
-        elif isinstance(shape, Circle):
-            msp.add_circle(
-                (shape.center.x(), shape.center.y()),
-                shape.radius,
-                dxfattribs=dxfattribs,
-            )
 
-        elif isinstance(shape, CircleByThreePoints):
-            center, radius = shape.calculate_circle()
-            if center and radius:
-                msp.add_circle((center.x(), center.y()), radius, dxfattribs=dxfattribs)
-
-        elif isinstance(shape, ArcByThreePoints):
-            center, radius, start_angle, span_angle = shape.calculate_arc()
-            if center and radius:
-                start_angle_deg = start_angle % 360
-                span_angle = (
-                    span_angle % 360 if span_angle >= 0 else (span_angle % 360) + 360
-                )
-                end_angle_deg = (start_angle_deg + span_angle) % 360
-                if end_angle_deg < start_angle_deg:
-                    end_angle_deg += 360
-                msp.add_arc(
-                    (center.x(), center.y()),
-                    radius,
-                    start_angle_deg,
-                    end_angle_deg,
-                    dxfattribs=dxfattribs,
-                )
+def _arc_by_three_points_entity(shape):
+    center, radius, start_angle, span_angle = shape.calculate_arc()
+    if center and radius:
+        angles = dxf_arc_angles(start_angle, span_angle)
+        return "add_arc", ((center.x(), center.y()), radius, *angles), _NO_OPTIONS
+    return None
 
-        elif isinstance(shape, ArcByRadiusChord):
-            radius, start_angle, span_angle = shape.calculate_arc()
-            start_angle_deg = start_angle % 360
-            span_angle = (
-                span_angle % 360 if span_angle >= 0 else (span_angle % 360) + 360
-            )
-            end_angle_deg = (start_angle_deg + span_angle) % 360
-            if end_angle_deg < start_angle_deg:
-                end_angle_deg += 360
-            msp.add_arc(
-                (shape.center.x(), shape.center.y()),
-                radius,
-                start_angle_deg,
-                end_angle_deg,
-                dxfattribs=dxfattribs,
-            )
 
-        elif isinstance(shape, Rectangle):
-            rect = shape.rect
-            points = [
-                (rect.topLeft().x(), rect.topLeft().y()),
-                (rect.topRight().x(), rect.topRight().y()),
-                (rect.bottomRight().x(), rect.bottomRight().y()),
-                (rect.bottomLeft().x(), rect.bottomLeft().y()),
-                (rect.topLeft().x(), rect.topLeft().y()),
-            ]
-            msp.add_lwpolyline(points, dxfattribs=dxfattribs)
-
-        elif isinstance(shape, Polygon):
-            points = [(point.x(), point.y()) for point in shape.points]
-            if points:
-                if len(points) > 1 and points[0] != points[-1]:
-                    points.append(points[0])
-                msp.add_lwpolyline(points, dxfattribs=dxfattribs)
-
-        elif isinstance(shape, BezierSpline):
-            if len(shape.points) >= 2:
-                control_points = [(p.x(), p.y(), 0) for p in shape.points]
-                msp.add_spline(control_points, dxfattribs=dxfattribs)
-
-        elif isinstance(shape, SegmentSpline):
-            spline_points = shape.generate_spline_points()
-            if spline_points:
-                points = [(point.x(), point.y()) for point in spline_points]
-                msp.add_lwpolyline(points, dxfattribs=dxfattribs)
-
-    doc.saveas(filename)
-    return True
+def _arc_by_radius_chord_entity(shape):
+    radius, start_angle, span_angle = shape.calculate_arc()
+    center = (shape.center.x(), shape.center.y())
+    angles = dxf_arc_angles(start_angle, span_angle)
+    return "add_arc", (center, radius, *angles), _NO_OPTIONS
+
+
+def dxf_arc_angles(start_angle, span_angle):
+    """Начальный и конечный углы дуги DXF (против часовой стрелки, градусы)"""
+    start_angle_deg = start_angle % 360
+    span_angle = span_angle % 360 if span_angle >= 0 else (span_angle % 360) + 360
+    end_angle_deg = (start_angle_deg + span_angle) % 360
+    if end_angle_deg < start_angle_deg:
+        end_angle_deg += 360
+    return start_angle_deg, end_angle_deg
+
+
+def _rectangle_corners(shape):
+    rect = shape.rect
+    return [
+        (rect.topLeft().x(), rect.topLeft().y()),
+        (rect.topRight().x(), rect.topRight().y()),
+        (rect.bottomRight().x(), rect.bottomRight().y()),
+        (rect.bottomLeft().x(), rect.bottomLeft().y()),
+    ]
+
+
+def _r12_rectangle_entity(shape):
+    return "add_polyline2d", (_rectangle_corners(shape),), {"close": True}
+
+
+def _r12_polygon_entity(shape):
+    return _r12_polygon_points_entity(shape.coordinates())
+
+
+def _r12_polygon_points_entity(points):
+    if points:
+        closed = len(points) > 1 and points[0] == points[-1]
+        return "add_polyline2d", (points,), {"close": closed}
+    return None
+
+
+def _r12_bezier_spline_entity(shape):
+    if len(shape.points) >= 2:
+        points = [tuple(p) for p in shape.polyline().tolist()]
+        return "add_polyline2d", (points,), _NO_OPTIONS
+    return None
+
+
+def _r12_segment_spline_entity(shape):
+    spline_points = shape.spline_points()
+    if spline_points:
+        points = [(point.x(), point.y()) for point in spline_points]
+        return "add_polyline2d", (points,), _NO_OPTIONS
+    return None
+
+
+def _rectangle_entity(shape):
+    points = _rectangle_corners(shape)
+    return "add_lwpolyline", (points + points[:1],), _NO_OPTIONS
+
+
+def _polygon_entity(shape):
+    return _polygon_points_entity(shape.coordinates())
+
+
+def _polygon_points_entity(points):
+    if points:
+        if len(points) > 1 and points[0] != points[-1]:
+            points.append(points[0])
+        return "add_lwpolyline", (points,), _NO_OPTIONS
+    return None
+
+
+def _bezier_spline_entity(shape):
+    if len(shape.points) >= 2:
+        control_points = [(p.x(), p.y(), 0) for p in shape.points]
+        return "add_spline", (control_points,), _NO_OPTIONS
+    return None
+
+
+def _segment_spline_entity(shape):
+    spline_points = shape.spline_points()
+    if spline_points:
+        points = [(point.x(), point.y()) for point in spline_points]
+        return "add_lwpolyline", (points,), _NO_OPTIONS
+    return None
+
+
+# Реестры функций, снимающих с фигуры данные сущности DXF, для DxfExporter
+_DXF_COMMON_ENTITIES = {
+    Line: _line_entity,
+    Circle: _circle_entity,
+    CircleByThreePoints: _circle_by_three_points_entity,
+    ArcByThreePoints: _arc_by_three_points_entity,
+    ArcByRadiusChord: _arc_by_radius_chord_entity,
+}
+DXF_R12_ENTITIES = {
+    **_DXF_COMMON_ENTITIES,
+    Rectangle: _r12_rectangle_entity,
+    Polygon: _r12_polygon_entity,
+    BezierSpline: _r12_bezier_spline_entity,
+    SegmentSpline: _r12_segment_spline_entity,
+}
+DXF_R2000_ENTITIES = {
+    **_DXF_COMMON_ENTITIES,
+    Rectangle: _rectangle_entity,
+    Polygon: _polygon_entity,
+    BezierSpline: _bezier_spline_entity,
+    SegmentSpline: _segment_spline_entity,
+}
+
+
+class DxfExporter:
+    """Экспорт фигур в DXF R2000 в два этапа.
+
+    add_shapes в потоке интерфейса снимает с фигур данные для записи:
+    функция из реестра entities по типу фигуры возвращает кортеж
+    (метод пространства модели, аргументы, именованные аргументы) из чисел
+    и кортежей, а атрибуты DXF считаются один раз на стиль (стили
+    интернированы, см. Style). Для подклассов (StoredLine, StoredPolygon)
+    функция ищется по MRO один раз на тип, фигуры без неё пропускаются.
+    Отрезки и ломаные хранилищ (StoredLine, StoredPolygon) снимаются не по
+    одной: подряд идущие фигуры одного хранилища копируются из его массивов
+    целиком (см. _StoredRows), а записи для них строятся уже в save.
+    save строит документ только по снятым данным, поэтому его можно
+    выполнять в другом потоке, пока фигуры на холсте изменяются.
+    """
+
+    dxfversion = "R2000"
+    entities = DXF_R2000_ENTITIES
+    polygon_entity = staticmethod(_polygon_points_entity)
+
+    def __init__(self):
+        self.records = []
+        self._attributes = {}
+        self._type_entities = {}
+
+    def style_attributes(self, style):
+        return get_dxf_attributes_advanced(style)
+
+    def new_document(self):
+        doc = ezdxf.new(self.dxfversion)
+        doc.header["$LWDISPLAY"] = 1
+        ensure_line_types_exist(doc)
+        return doc
+
+    def add_shapes(self, shapes):
+        records = self.records
+        type_entities = self._type_entities
+        stored = []
+        rows = None
+        for shape in shapes:
+            shape_type = type(shape)
+            if shape_type is StoredLine or shape_type is StoredPolygon:
+                if (
+                    rows is None
+                    or rows.shape_type is not shape_type
+                    or rows.store is not shape._store
+                ):
+                    rows = _StoredRows(shape_type, shape._store)
+                    records.append(rows)
+                    stored.append(rows)
+                rows.rows.append(shape._row)
+                continue
+            rows = None
+            if shape_type in type_entities:
+                entity = type_entities[shape_type]
+            else:
+                entity = type_entities[shape_type] = self._entity(shape_type)
+            if entity is None:
+                continue
+            record = entity(shape)
+            if record is None:
+                continue
+            records.append((record, self.dxfattribs(shape.style)))
+        for rows in stored:
+            rows.copy(self)
+
+    def dxfattribs(self, style):
+        """Атрибуты DXF стиля; считаются один раз на стиль"""
+        dxfattribs = self._attributes.get(style)
+        if dxfattribs is None:
+            dxfattribs = self._attributes[style] = self.style_attributes(style)
+        return dxfattribs
+
+    def save(self, filename):
+        """Записывает снятые фигуры в файл через временный файл рядом с ним"""
+        doc = self.new_document()
+        msp = doc.modelspace()
+        # ezdxf копирует dxfattribs, поэтому общий словарь стиля не меняется
+        for item in self.records:
+            if isinstance(item, _StoredRows):
+                entries = item.records(self)
+            else:
+                entries = (item,)
+            for (method, args, options), dxfattribs in entries:
+                getattr(msp, method)(*args, dxfattribs=dxfattribs, **options)
+        save_dxf_document(doc, filename)
+
+    def _entity(self, shape_type):
+        for cls in shape_type.__mro__:
+            if cls in self.entities:
+                return self.entities[cls]
+        return None
+
+
+class DxfR12Exporter(DxfExporter):
+    """Экспорт в DXF R12: толщина линии передаётся слоем Thickness_<толщина>"""
+
+    dxfversion = "R12"
+    entities = DXF_R12_ENTITIES
+    polygon_entity = staticmethod(_r12_polygon_points_entity)
+
+    def __init__(self):
+        super().__init__()
+        self.layers = {}
+
+    def style_attributes(self, style):
+        attributes = get_dxf_attributes(style)
+        if style.line_thickness > 0:
+            layer_name = f"Thickness_{style.line_thickness}"
+            self.layers[layer_name] = style.line_thickness * 100
+            attributes["layer"] = layer_name
+        return attributes
+
+    def new_document(self):
+        doc = ezdxf.new(self.dxfversion)
+        for layer_name, lineweight in self.layers.items():
+            layer = doc.layers.add(layer_name)
+            layer.lineweight = lineweight
+        ensure_line_types_exist(doc)
+        return doc
+
+
+class _StoredRows:
+    """Подряд идущие в экспорте фигуры одного хранилища ShapeStore.
+
+    add_shapes собирает номера строк, copy снимает их данные копиями
+    массивов хранилища (по операции NumPy на участок), records в save
+    превращает копии в записи вида DxfExporter.records.
+    """
+
+    def __init__(self, shape_type, store):
+        self.shape_type = shape_type
+        self.store = store
+        self.rows = []
+
+    def copy(self, exporter):
+        store = self.store
+        rows = np.array(self.rows, dtype=np.int64)
+        if self.shape_type is StoredPolygon:
+            self.sizes = store.polygon_sizes[rows]
+            ends = np.cumsum(self.sizes)
+            # Номера вершин всех ломаных участка подряд
+            shifts = np.repeat(
+                store.polygon_offsets[rows] - ends + self.sizes, self.sizes
+            )
+            self.vertices = store.vertices[shifts + np.arange(len(shifts))]
+            self.numbers = store.polygon_styles[rows]
+        else:
+            self.coords = store.line_coords[rows]
+            self.numbers = store.line_styles[rows]
+        self.attributes = {
+            number: exporter.dxfattribs(store.styles[number])
+            for number in np.unique(self.numbers).tolist()
+        }
+        self.store = self.rows = None
+
+    def records(self, exporter):
+        attributes = self.attributes
+        numbers = self.numbers.tolist()
+        if self.shape_type is StoredPolygon:
+            parts = np.split(self.vertices, np.cumsum(self.sizes)[:-1])
+            for vertices, number in zip(parts, numbers):
+                record = exporter.polygon_entity(
+                    [tuple(point) for point in vertices.tolist()]
+                )
+                if record is not None:
+                    yield record, attributes[number]
+            return
+        for (x1, y1, x2, y2), number in zip(self.coords.tolist(), numbers):
+            yield ("add_line", ((x1, y1), (x2, y2)), _NO_OPTIONS), attributes[number]
+
+
+def save_dxf_document(doc, filename):
+    """Сохраняет документ атомарно: файл filename либо прежний, либо новый целиком"""
+    directory = os.path.dirname(os.path.abspath(filename))
+    descriptor, temp_filename = tempfile.mkstemp(
+        prefix=".", suffix=".tmp", dir=directory
+    )
+    os.close(descriptor)
+    try:
+        doc.saveas(temp_filename)
+        os.replace(temp_filename, filename)
+    except BaseException:
+        os.remove(temp_filename)
+        raise
 
 
 def ensure_line_types_exist(doc):
@@ -233,95 +451,47 @@ def ensure_line_types_exist(doc):
 
 
 def get_dxf_attributes(shape):
+    """Атрибуты DXF R12 фигуры или стиля (Style)"""
     attributes = {}
     if hasattr(shape, "color"):
         color_index = convert_qcolor_to_aci(shape.color)
         if color_index is not None:
             attributes["color"] = color_index
-    if hasattr(shape, "line_type"):
-        line_type = shape.line_type
-        if line_type == "solid":
-            attributes["linetype"] = "CONTINUOUS"
-        elif line_type == "dash":
-            attributes["linetype"] = "DASHED"
-        elif line_type == "dash_dot":
-            attributes["linetype"] = "DASHDOT"
-        elif line_type == "dash_dot_dot":
-            attributes["linetype"] = "DASHDOT2"
+    if hasattr(shape, "line_type") and shape.line_type in DXF_LINE_TYPES:
+        attributes["linetype"] = DXF_LINE_TYPES[shape.line_type]
     return attributes
 
 
 def get_dxf_attributes_advanced(shape):
+    """Атрибуты DXF R2000 фигуры или стиля (Style)"""
     attributes = {"layer": "0"}
-    if hasattr(shape, "color"):
-        color_index = convert_qcolor_to_aci(shape.color)
-        if color_index is not None:
-            attributes["color"] = color_index
-    if hasattr(shape, "line_type"):
-        line_type = shape.line_type
-        if line_type == "solid":
-            attributes["linetype"] = "CONTINUOUS"
-        elif line_type == "dash":
-            attributes["linetype"] = "DASHED"
-        elif line_type == "dash_dot":
-            attributes["linetype"] = "DASHDOT"
-        elif line_type == "dash_dot_dot":
-            attributes["linetype"] = "DASHDOT2"
+    attributes.update(get_dxf_attributes(shape))
     if hasattr(shape, "line_thickness") and shape.line_thickness > 0:
-        thickness_mm = shape.line_thickness
-        std_thicknesses = [
-            0,
-            5,
-            9,
-            13,
-            15,
-            18,
-            20,
-            25,
-            30,
-            35,
-            40,
-            50,
-            53,
-            60,
-            70,
-            80,
-            90,
-            100,
-            106,
-            120,
-            140,
-            158,
-            200,
-            211,
-        ]
-        thickness_100mm = int(thickness_mm * 100)
-        closest_std = min(std_thicknesses, key=lambda x: abs(x - thickness_100mm))
-        attributes["lineweight"] = closest_std
+        attributes["lineweight"] = nearest_dxf_lineweight(shape.line_thickness)
     return attributes
 
 
+def nearest_dxf_lineweight(thickness_mm):
+    """Ближайший к толщине thickness_mm стандартный вес линии DXF"""
+    thickness_100mm = int(thickness_mm * 100)
+    index = bisect.bisect_left(DXF_LINEWEIGHTS, thickness_100mm)
+    if index == len(DXF_LINEWEIGHTS):
+        return DXF_LINEWEIGHTS[-1]
+    if index == 0:
+        return DXF_LINEWEIGHTS[0]
+    lower, upper = DXF_LINEWEIGHTS[index - 1], DXF_LINEWEIGHTS[index]
+    return lower if thickness_100mm - lower <= upper - thickness_100mm else upper
+
+
 def convert_qcolor_to_aci(qcolor):
     if qcolor is None:
         return 256
     r, g, b = qcolor.red(), qcolor.green(), qcolor.blue()
-    standard_colors = {
-        (0, 0, 0): 0,
-        (255, 0, 0): 1,
-        (255, 255, 0): 2,
-        (0, 255, 0): 3,
-        (0, 255, 255): 4,
-        (0, 0, 255): 5,
-        (255, 0, 255): 6,
-        (255, 255, 255): 7,
-        (128, 128, 128): 8,
-        (192, 192, 192): 9,
-    }
-    if (r, g, b) in standard_colors:
-        return standard_colors[(r, g, b)]
+    if (r, g, b) in _RGB_TO_ACI:
+        return _RGB_TO_ACI[(r, g, b)]
     min_distance = float("inf")
     closest_index = 7
-    for (sr, sg, sb), index in standard_colors.items():
+    for (sr, sg, sb), index in _RGB_TO_ACI.items():
         distance = math.sqrt((r - sr) ** 2 + (g - sg) ** 2 + (b - sb) ** 2)
         if distance < min_distance:
             min_distance = distance
@@ -330,39 +500,15 @@ def convert_qcolor_to_aci(qcolor):
 
 
 def convert_aci_to_qcolor(aci):
-    basic_aci_to_rgb = {
-        0: (0, 0, 0),
-        1: (255, 0, 0),
-        2: (255, 255, 0),
-        3: (0, 255, 0),
-        4: (0, 255, 255),
-        5: (0, 0, 255),
-        6: (255, 0, 255),
-        7: (255, 255, 255),
-        8: (128, 128, 128),
-        9: (192, 192, 192),
-    }
-    r, g, b = basic_aci_to_rgb.get(aci, (0, 0, 0))
+    r, g, b = ACI_COLORS.get(aci, (0, 0, 0))
     return QColor(r, g, b)
 
 
 def read_from_dxf(filename, DrawingArea):
     try:
-        doc = ezdxf.readfile(filename)
-        msp = doc.modelspace()
-        entities = list(msp)
-
-        flatten_z_coordinates(entities)
-        normalize_dxf_entities(entities)
-
-        scale_factor = calculate_dynamic_scale_factor(entities, target_size=1000)
-        scale_dxf_entities(entities, scale_factor)
-
         loaded_shapes = []
-        for entity in entities:
-            shape = convert_dxf_to_shape(entity, DrawingArea)
-            if shape:
-                loaded_shapes.append(shape)
+        for shapes, done, total in iter_dxf_shapes(filename, DrawingArea):
+            loaded_shapes.extend(shapes)
         return loaded_shapes
     except ezdxf.DXFError as e:
         print(f"DXF Error: {str(e)}")
@@ -372,91 +518,344 @@ def read_from_dxf(filename, DrawingArea):
         return []
 
 
-def calculate_dynamic_scale_factor(entities, target_size):
-    """Calculate a scaling factor to fit the design within the target size."""
-    min_x = min(
-        entity.dxf.start[0] for entity in entities if hasattr(entity.dxf, "start")
+def iter_dxf_shapes(
+    filename,
+    DrawingArea,
+    chunk_size=DXF_IMPORT_CHUNK_SIZE,
+    streaming=None,
+    parallel=None,
+):
+    """Читает DXF-файл и выдаёт фигуры порциями: (фигуры, обработано, всего).
+
+    Первая порция пустая и выдаётся сразу после чтения файла, чтобы был
+    известен общий объём. Отрезки и ломаные каждой порции хранятся в своём
+    ShapeStore с общей таблицей стилей, поэтому отданные фигуры генератор
+    больше не изменяет и их можно передавать в другой поток.
+
+    В потоковом режиме (streaming) документ целиком не загружается: файл
+    читается дважды через ezdxf.addons.iterdxf, сначала для габаритов,
+    затем для преобразования, и в памяти одновременно находится только одна
+    сущность. Пока идёт первый проход, общий объём неизвестен: каждые
+    chunk_size сущностей выдаётся пустая порция с total = 0, чтобы импорт
+    можно было отменить и во время этого прохода. По умолчанию режим
+    включается для файлов не меньше DXF_STREAMING_IMPORT_SIZE байт.
+
+    В параллельном режиме (parallel) секция ENTITIES делится на участки по
+    chunk_size сущностей, которые разбираются в пуле процессов (см.
+    iter_dxf_shapes_parallel). По умолчанию режим включается для файлов не
+    меньше DXF_PARALLEL_IMPORT_SIZE байт на многоядерной машине; потоковый
+    режим важнее параллельного.
+    """
+    size = os.path.getsize(filename)
+    if streaming is None:
+        streaming = size >= DXF_STREAMING_IMPORT_SIZE
+    if parallel is None:
+        parallel = size >= DXF_PARALLEL_IMPORT_SIZE and (os.cpu_count() or 1) > 1
+    if parallel and not streaming:
+        chunks = split_dxf_entities(filename, chunk_size)
+        # Двоичный DXF так не делится и читается обычным образом
+        if chunks is not None:
+            yield from iter_dxf_shapes_parallel(filename, DrawingArea, *chunks)
+            return
+    if streaming:
+        extents = None
+        total = 0
+        entities = iterdxf.modelspace(filename, types=DXF_IMPORT_TYPES)
+        while True:
+            # Сущности считаются по ходу прохода: zip берёт следующее
+            # значение счётчика только после очередной сущности
+            counter = itertools.count()
+            chunk = itertools.islice(entities, chunk_size)
+            extents = dxf_extents(
+                (entity for entity, _ in zip(chunk, counter)), extents
+            )
+            count = next(counter)
+            total += count
+            if count < chunk_size:
+                break
+            yield [], 0, 0
+        entities = iterdxf.modelspace(filename, types=DXF_IMPORT_TYPES)
+    else:
+        doc = ezdxf.readfile(filename)
+        entities = doc.modelspace()
+        extents = dxf_extents(entities)
+        total = len(entities)
+
+    # Документ не изменяется: центрирование и масштаб применяются
+    # при преобразовании каждой сущности
+    transform = DxfTransform.fit(extents, target_size=1000)
+
+    yield [], 0, total
+    styles = StyleTable()
+    store = ShapeStore(styles)
+    shapes = []
+    done = 0
+    for entity in entities:
+        shape = convert_dxf_to_shape(entity, DrawingArea, store, transform)
+        if shape:
+            shapes.append(shape)
+        done += 1
+        if done % chunk_size == 0:
+            yield shapes, done, total
+            # Отрезки и ломаные хранятся в общих массивах, а не отдельными объектами
+            store = ShapeStore(styles)
+            shapes = []
+    if done % chunk_size:
+        yield shapes, done, total
+
+
+def iter_dxf_shapes_parallel(filename, DrawingArea, header, chunks, total):
+    """Параллельный вариант iter_dxf_shapes для участков split_dxf_entities.
+
+    Каждый процесс пула сам читает свой участок файла и возвращает записи
+    dxf_entity_record с габаритами участка: объекты ezdxf и Qt между
+    процессами не передаются. Пока участки разбираются, выдаются пустые
+    порции с ходом разбора. Когда известны общие габариты, записи в исходном
+    порядке превращаются в фигуры, по порции на участок.
+    """
+    yield [], 0, total
+    results = [None] * len(chunks)
+    done = 0
+    # spawn, а не fork: импорт идёт из потока приложения Qt
+    pool = ProcessPoolExecutor(
+        DXF_IMPORT_PROCESSES, mp_context=multiprocessing.get_context("spawn")
     )
-    min_y = min(
-        entity.dxf.start[1] for entity in entities if hasattr(entity.dxf, "start")
+    try:
+        futures = {
+            pool.submit(_read_dxf_chunk, filename, header, start, stop): number
+            for number, (start, stop, count) in enumerate(chunks)
+        }
+        for future in as_completed(futures):
+            number = futures[future]
+            results[number] = future.result()
+            done += chunks[number][2]
+            yield [], done, total
+    finally:
+        # При отмене импорта участки, которые ещё не начаты, не разбираются
+        pool.shutdown(cancel_futures=True)
+
+    extents = [chunk_extents for _, chunk_extents in results if chunk_extents]
+    if extents:
+        min_xs, min_ys, max_xs, max_ys = zip(*extents)
+        extents = min(min_xs), min(min_ys), max(max_xs), max(max_ys)
+    transform = DxfTransform.fit(extents or None, target_size=1000)
+
+    styles = StyleTable()
+    for number, (records, _) in enumerate(results):
+        results[number] = None
+        store = ShapeStore(styles)
+        shapes = []
+        for record in records:
+            shape = shape_from_record(record, DrawingArea, store, transform)
+            if shape:
+                shapes.append(shape)
+        yield shapes, total, total
+
+
+def split_dxf_entities(filename, chunk_size):
+    """Делит секцию ENTITIES ASCII-файла DXF на участки по chunk_size сущностей.
+
+    Возвращает (заголовок, [(начало, конец, сущностей), ...], всего сущностей)
+    или None, если секция не найдена (например, у двоичного DXF). Заголовок -
+    байты файла до конца секции HEADER, по нему определяются версия и
+    кодировка. Границы ставятся только перед основными сущностями, поэтому
+    VERTEX и SEQEND остаются на участке своей POLYLINE.
+    """
+    with open(filename, "rb") as file, mmap.mmap(
+        file.fileno(), 0, access=mmap.ACCESS_READ
+    ) as data:
+        header = b""
+        for section in _DXF_SECTION.finditer(data):
+            if section.group(1) == b"ENTITIES":
+                break
+            header_end = _DXF_ENDSEC.search(data, section.end() - 1)
+            if header_end is None:
+                return None
+            header = data[: header_end.end()]
+        else:
+            return None
+        section_end = _DXF_ENDSEC.search(data, section.end() - 1)
+        if section_end is None:
+            return None
+        stop = section_end.start() + 1
+
+        starts = []
+        total = 0
+        for match in _DXF_ENTITY.finditer(data, section.end() - 1, stop):
+            if total % chunk_size == 0:
+                starts.append(match.start() + 1)
+            total += 1
+    if not starts:
+        return None
+    ends = starts[1:] + [stop]
+    counts = [chunk_size] * (len(starts) - 1) + [total - chunk_size * (len(starts) - 1)]
+    return header, list(zip(starts, ends, counts)), total
+
+
+def _read_dxf_chunk(filename, header, start, stop):
+    """Записи и габариты сущностей участка [start, stop) файла (в процессе пула)"""
+    with open(filename, "rb") as file:
+        file.seek(start)
+        data = file.read(stop - start)
+    # Участок оформляется как отдельный DXF из заголовка и секции ENTITIES.
+    # single_pass_modelspace разбирает сущность, только встретив следующую,
+    # поэтому за последней сущностью участка идёт пустая запись EOF
+    stream = io.BytesIO(
+        header
+        + b"  0\nSECTION\n  2\nENTITIES\n"
+        + data
+        + b"  0\nEOF\n  0\nENDSEC\n  0\nEOF\n"
     )
-    max_x = max(entity.dxf.end[0] for entity in entities if hasattr(entity.dxf, "end"))
-    max_y = max(entity.dxf.end[1] for entity in entities if hasattr(entity.dxf, "end"))
+    entities = list(iterdxf.single_pass_modelspace(stream, types=DXF_IMPORT_TYPES))
+    records = [dxf_entity_record(entity) for entity in entities]
+    return [record for record in records if record], dxf_extents(entities)
 
-    width = max_x - min_x
-    height = max_y - min_y
-    max_dimension = max(width, height)
 
-    if max_dimension == 0:
-        return 1
+class DxfTransform:
+    """Перенос центра чертежа в начало координат с равномерным масштабированием"""
 
-    return target_size / max_dimension
+    __slots__ = ("scale", "center_x", "center_y")
 
+    def __init__(self, scale=1.0, center_x=0.0, center_y=0.0):
+        self.scale = scale
+        self.center_x = center_x
+        self.center_y = center_y
 
-def flatten_z_coordinates(entities):
-    """Set all Z-coordinates to 0.0."""
-    for entity in entities:
-        if hasattr(entity.dxf, "start"):
-            entity.dxf.start = (entity.dxf.start[0], entity.dxf.start[1], 0.0)
-        if hasattr(entity.dxf, "end"):
-            entity.dxf.end = (entity.dxf.end[0], entity.dxf.end[1], 0.0)
+    @classmethod
+    def fit(cls, extents, target_size):
+        """Преобразование, вписывающее габариты extents в квадрат target_size"""
+        if extents is None:
+            return cls()
+        min_x, min_y, max_x, max_y = extents
+        max_dimension = max(max_x - min_x, max_y - min_y)
+        scale = target_size / max_dimension if max_dimension else 1
+        return cls(scale, (min_x + max_x) / 2, (min_y + max_y) / 2)
 
+    def point(self, x, y):
+        return ((x - self.center_x) * self.scale, (y - self.center_y) * self.scale)
 
-def normalize_dxf_entities(entities):
-    """Center the design around the origin (0, 0)."""
-    min_x = min(
-        entity.dxf.start[0] for entity in entities if hasattr(entity.dxf, "start")
-    )
-    min_y = min(
-        entity.dxf.start[1] for entity in entities if hasattr(entity.dxf, "start")
-    )
-    max_x = max(entity.dxf.end[0] for entity in entities if hasattr(entity.dxf, "end"))
-    max_y = max(entity.dxf.end[1] for entity in entities if hasattr(entity.dxf, "end"))
+    def qpoint(self, x, y):
+        return QPointF(
+            (x - self.center_x) * self.scale, (y - self.center_y) * self.scale
+        )
 
-    center_x = (min_x + max_x) / 2
-    center_y = (min_y + max_y) / 2
+    def length(self, value):
+        return value * self.scale
 
-    for entity in entities:
-        if hasattr(entity.dxf, "start"):
-            entity.dxf.start = (
-                entity.dxf.start[0] - center_x,
-                entity.dxf.start[1] - center_y,
-                entity.dxf.start[2],
-            )
-        if hasattr(entity.dxf, "end"):
-            entity.dxf.end = (
-                entity.dxf.end[0] - center_x,
-                entity.dxf.end[1] - center_y,
-                entity.dxf.end[2],
-            )
 
+def dxf_extents(entities, extents=None):
+    """Габариты (min_x, min_y, max_x, max_y) сущностей за один проход или None.
 
-def scale_dxf_entities(entities, scale_factor):
-    """Scale the coordinates by a given factor."""
+    Заданные extents расширяются, так габариты можно накапливать по частям.
+    """
+    if extents is None:
+        min_x = min_y = math.inf
+        max_x = max_y = -math.inf
+    else:
+        min_x, min_y, max_x, max_y = extents
     for entity in entities:
-        if hasattr(entity.dxf, "start"):
-            entity.dxf.start = (
-                entity.dxf.start[0] * scale_factor,
-                entity.dxf.start[1] * scale_factor,
-                entity.dxf.start[2],
-            )
-        if hasattr(entity.dxf, "end"):
-            entity.dxf.end = (
-                entity.dxf.end[0] * scale_factor,
-                entity.dxf.end[1] * scale_factor,
-                entity.dxf.end[2],
-            )
-
-
-def convert_dxf_to_shape(entity, DrawingArea):
-    shape_attributes = extract_dxf_attributes(entity, DrawingArea)
+        for x, y in dxf_extent_points(entity):
+            if x < min_x:
+                min_x = x
+            if x > max_x:
+                max_x = x
+            if y < min_y:
+                min_y = y
+            if y > max_y:
+                max_y = y
+    if min_x > max_x:
+        return None
+    return min_x, min_y, max_x, max_y
+
+
+def dxf_extent_points(entity):
+    """Точки, габариты которых покрывают сущность"""
+    dxftype = entity.dxftype()
+    if dxftype == "LINE":
+        start, end = entity.dxf.start, entity.dxf.end
+        return ((start.x, start.y), (end.x, end.y))
+    if dxftype in ("CIRCLE", "ARC"):
+        center, radius = entity.dxf.center, entity.dxf.radius
+        return (
+            (center.x - radius, center.y - radius),
+            (center.x + radius, center.y + radius),
+        )
+    if dxftype == "LWPOLYLINE":
+        return entity.get_points("xy")
+    if dxftype == "POLYLINE":
+        return [(v.dxf.location.x, v.dxf.location.y) for v in entity.vertices]
+    if dxftype == "SPLINE":
+        return [(p[0], p[1]) for p in entity.control_points]
+    return ()
+
+
+def convert_dxf_to_shape(entity, DrawingArea, store=None, transform=None):
+    record = dxf_entity_record(entity)
+    if record is None:
+        return None
+    return shape_from_record(record, DrawingArea, store, transform)
+
+
+def dxf_entity_record(entity):
+    """Сущность в виде кортежа (тип, атрибуты, геометрия) или None.
+
+    Запись состоит из чисел, строк и списков, поэтому передаётся между
+    процессами. Атрибуты - результат dxf_entity_attributes, координаты
+    геометрии исходные, без DxfTransform.
+    """
+    dxftype = entity.dxftype()
+    if dxftype == "LINE":
+        start, end = entity.dxf.start, entity.dxf.end
+        geometry = (start.x, start.y, end.x, end.y)
+    elif dxftype == "CIRCLE":
+        center = entity.dxf.center
+        geometry = (center.x, center.y, entity.dxf.radius)
+    elif dxftype == "ARC":
+        center = entity.dxf.center
+        geometry = (
+            center.x,
+            center.y,
+            entity.dxf.radius,
+            entity.dxf.start_angle,
+            entity.dxf.end_angle,
+        )
+    elif dxftype == "LWPOLYLINE":
+        geometry = ([(x, y) for x, y in entity.vertices()], entity.closed)
+    elif dxftype == "POLYLINE":
+        coords = [(v.dxf.location.x, v.dxf.location.y) for v in entity.vertices]
+        geometry = (coords, entity.is_closed)
+    elif dxftype == "SPLINE":
+        geometry = [(p[0], p[1]) for p in entity.control_points]
+    else:
+        return None
+    return dxftype, dxf_entity_attributes(entity), geometry
+
+
+def shape_from_record(record, DrawingArea, store=None, transform=None):
+    """Фигура по записи dxf_entity_record"""
+    dxftype, attributes, geometry = record
+    shape_attributes = resolve_dxf_attributes(attributes, DrawingArea)
+    if transform is None:
+        transform = DxfTransform()
+
+    if dxftype == "LINE" and store is not None:
+        style = store.styles.intern(
+            shape_attributes["line_type"],
+            shape_attributes["line_thickness"],
+            DrawingArea.dash_parameters,
+            DrawingArea.dash_auto_mode,
+            shape_attributes["color"],
+        )
+        x1, y1, x2, y2 = geometry
+        x1, y1 = transform.point(x1, y1)
+        x2, y2 = transform.point(x2, y2)
+        return store.add_line(x1, y1, x2, y2, style)
 
-    if entity.dxftype() == "LINE":
-        start_point = QPointF(entity.dxf.start[0], entity.dxf.start[1])
-        end_point = QPointF(entity.dxf.end[0], entity.dxf.end[1])
+    elif dxftype == "LINE":
+        x1, y1, x2, y2 = geometry
         return Line(
-            start_point,
-            end_point,
+            transform.qpoint(x1, y1),
+            transform.qpoint(x2, y2),
             shape_attributes["line_type"],
             shape_attributes["line_thickness"],
             dash_parameters=DrawingArea.dash_parameters,
@@ -464,12 +863,11 @@ def convert_dxf_to_shape(entity, DrawingArea):
             color=shape_attributes["color"],
         )
 
-    elif entity.dxftype() == "CIRCLE":
-        center = QPointF(entity.dxf.center[0], entity.dxf.center[1])
-        radius = entity.dxf.radius
+    elif dxftype == "CIRCLE":
+        x, y, radius = geometry
         return Circle(
-            center,
-            radius,
+            transform.qpoint(x, y),
+            transform.length(radius),
             shape_attributes["line_type"],
             shape_attributes["line_thickness"],
             dash_parameters=DrawingArea.dash_parameters,
@@ -477,11 +875,10 @@ def convert_dxf_to_shape(entity, DrawingArea):
             color=shape_attributes["color"],
         )
 
-    elif entity.dxftype() == "ARC":
-        center = QPointF(entity.dxf.center[0], entity.dxf.center[1])
-        radius = entity.dxf.radius
-        start_angle = entity.dxf.start_angle
-        end_angle = entity.dxf.end_angle
+    elif dxftype == "ARC":
+        x, y, radius, start_angle, end_angle = geometry
+        center = transform.qpoint(x, y)
+        radius = transform.length(radius)
         start_rad = math.radians(start_angle)
         end_rad = math.radians(end_angle)
         radius_point = QPointF(
@@ -503,20 +900,15 @@ def convert_dxf_to_shape(entity, DrawingArea):
             color=shape_attributes["color"],
         )
 
-    elif entity.dxftype() in ["LWPOLYLINE", "POLYLINE"]:
-        points = []
-        if entity.dxftype() == "LWPOLYLINE":
-            points = [QPointF(v[0], v[1]) for v in entity.vertices()]
-        else:
-            points = [
-                QPointF(v.dxf.location[0], v.dxf.location[1]) for v in entity.vertices
-            ]
-        if len(points) < 2:
+    elif dxftype in ["LWPOLYLINE", "POLYLINE"]:
+        coords, closed = geometry
+        coords = [transform.point(x, y) for x, y in coords]
+        if len(coords) < 2:
             return None
-        closed = entity.is_closed if entity.dxftype() == "POLYLINE" else entity.closed
-        if closed and len(points) > 1 and points[0] == points[-1]:
-            points = points[:-1]
-        if len(points) == 4 and is_rectangle(points):
+        if closed and len(coords) > 1 and coords[0] == coords[-1]:
+            coords = coords[:-1]
+        points = [QPointF(x, y) for x, y in coords] if len(coords) == 4 else None
+        if points and is_rectangle(points):
             min_x = min(p.x() for p in points)
             min_y = min(p.y() for p in points)
             max_x = max(p.x() for p in points)
@@ -530,8 +922,17 @@ def convert_dxf_to_shape(entity, DrawingArea):
                 dash_auto_mode=DrawingArea.dash_auto_mode,
                 color=shape_attributes["color"],
             )
+        if store is not None:
+            style = store.styles.intern(
+                shape_attributes["line_type"],
+                shape_attributes["line_thickness"],
+                DrawingArea.dash_parameters,
+                DrawingArea.dash_auto_mode,
+                shape_attributes["color"],
+            )
+            return store.add_polygon(coords, style)
         return Polygon(
-            points,
+            points or [QPointF(x, y) for x, y in coords],
             shape_attributes["line_type"],
             shape_attributes["line_thickness"],
             dash_parameters=DrawingArea.dash_parameters,
@@ -539,8 +940,8 @@ def convert_dxf_to_shape(entity, DrawingArea):
             color=shape_attributes["color"],
         )
 
-    elif entity.dxftype() == "SPLINE":
-        control_points = [QPointF(p[0], p[1]) for p in entity.control_points]
+    elif dxftype == "SPLINE":
+        control_points = [transform.qpoint(x, y) for x, y in geometry]
         return BezierSpline(
             control_points,
             shape_attributes["line_type"],
@@ -568,25 +969,45 @@ def is_rectangle(points, tolerance=1e-6):
 
 
 def extract_dxf_attributes(entity, DrawingArea):
-    attributes = {
-        "line_type": "solid",
-        "line_thickness": DrawingArea.lineThickness,
-        "color": DrawingArea.currentColor,
-    }
+    return resolve_dxf_attributes(dxf_entity_attributes(entity), DrawingArea)
+
+
+def dxf_entity_attributes(entity):
+    """Атрибуты сущности без настроек холста: (тип линии, толщина, цвет ACI).
+
+    Толщина и цвет равны None, если в сущности не заданы.
+    """
+    line_type = "solid"
+    line_thickness = None
+    color = None
     if hasattr(entity.dxf, "lineweight") and entity.dxf.lineweight > 0:
-        attributes["line_thickness"] = entity.dxf.lineweight / 100.0
+        line_thickness = entity.dxf.lineweight / 100.0
     elif hasattr(entity.dxf, "thickness") and entity.dxf.thickness > 0:
-        attributes["line_thickness"] = entity.dxf.thickness
+        line_thickness = entity.dxf.thickness
     if hasattr(entity.dxf, "color") and entity.dxf.color != 256:
-        attributes["color"] = convert_aci_to_qcolor(entity.dxf.color)
+        color = entity.dxf.color
     if hasattr(entity.dxf, "linetype"):
         linetype = entity.dxf.linetype
         if linetype == "CONTINUOUS":
-            attributes["line_type"] = "solid"
+            line_type = "solid"
         elif linetype == "DASHED":
-            attributes["line_type"] = "dash"
+            line_type = "dash"
         elif linetype == "DASHDOT":
-            attributes["line_type"] = "dash_dot"
+            line_type = "dash_dot"
         elif linetype in ["DASHDOT2", "DIVIDE"]:
-            attributes["line_type"] = "dash_dot_dot"
-    return attributes
+            line_type = "dash_dot_dot"
+    return line_type, line_thickness, color
+
+
+def resolve_dxf_attributes(attributes, DrawingArea):
+    """Атрибуты фигуры из dxf_entity_attributes с настройками холста"""
+    line_type, line_thickness, color = attributes
+    return {
+        "line_type": line_type,
+        "line_thickness": (
+            DrawingArea.lineThickness if line_thickness is None else line_thickness
+        ),
+        "color": (
+            DrawingArea.currentColor if color is None else convert_aci_to_qcolor(color)
+        ),
+    }
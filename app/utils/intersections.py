@@ -0,0 +1,397 @@
+import math
+import numpy as np
+from app.config.config import INTERSECTION_MAX_CELLS
+
+# Участки контура фигуры (Geometry.outline()):
+#   ("segment", x1, y1, x2, y2) - отрезок;
+#   ("arc", cx, cy, radius, start_angle, span_angle) - дуга, углы в градусах,
+#   от start_angle против часовой стрелки; окружность - дуга на 360 градусов.
+
+EPSILON = 1e-9
+
+
+def angle_on_arc(angle, start_angle, span_angle):
+    """Лежит ли направление angle (в градусах) на дуге"""
+    if span_angle >= 360:
+        return True
+    offset = (angle - start_angle) % 360
+    return offset <= span_angle + EPSILON or offset >= 360 - EPSILON
+
+
+def _on_arc(arc, x, y):
+    _, cx, cy, _, start_angle, span_angle = arc
+    return angle_on_arc(
+        math.degrees(math.atan2(y - cy, x - cx)), start_angle, span_angle
+    )
+
+
+def segment_segment(first, second):
+    """Точки пересечения двух отрезков"""
+    _, x1, y1, x2, y2 = first
+    _, x3, y3, x4, y4 = second
+    dx1, dy1 = x2 - x1, y2 - y1
+    dx2, dy2 = x4 - x3, y4 - y3
+    denominator = dx1 * dy2 - dy1 * dx2
+    if abs(denominator) < EPSILON:
+        # Параллельные отрезки пересечением не считаются
+        return []
+    t = ((x3 - x1) * dy2 - (y3 - y1) * dx2) / denominator
+    u = ((x3 - x1) * dy1 - (y3 - y1) * dx1) / denominator
+    if -EPSILON <= t <= 1 + EPSILON and -EPSILON <= u <= 1 + EPSILON:
+        return [(x1 + t * dx1, y1 + t * dy1)]
+    return []
+
+
+def segment_arc(segment, arc):
+    """Точки пересечения отрезка и дуги"""
+    _, x1, y1, x2, y2 = segment
+    _, cx, cy, radius, _, _ = arc
+    dx, dy = x2 - x1, y2 - y1
+    fx, fy = x1 - cx, y1 - cy
+    a = dx * dx + dy * dy
+    if a < EPSILON:
+        return []
+    b = 2 * (fx * dx + fy * dy)
+    c = fx * fx + fy * fy - radius * radius
+    discriminant = b * b - 4 * a * c
+    if discriminant < 0:
+        return []
+    root = math.sqrt(discriminant)
+    points = []
+    for t in {(-b - root) / (2 * a), (-b + root) / (2 * a)}:
+        if -EPSILON <= t <= 1 + EPSILON:
+            x, y = x1 + t * dx, y1 + t * dy
+            if _on_arc(arc, x, y):
+                points.append((x, y))
+    return points
+
+
+def arc_arc(first, second):
+    """Точки пересечения двух дуг (окружностей)"""
+    _, x1, y1, r1, _, _ = first
+    _, x2, y2, r2, _, _ = second
+    dx, dy = x2 - x1, y2 - y1
+    distance = math.hypot(dx, dy)
+    if distance < EPSILON or distance > r1 + r2 or distance < abs(r1 - r2):
+        return []
+    a = (r1 * r1 - r2 * r2 + distance * distance) / (2 * distance)
+    h = math.sqrt(max(r1 * r1 - a * a, 0.0))
+    mx = x1 + a * dx / distance
+    my = y1 + a * dy / distance
+    candidates = {
+        (mx + h * dy / distance, my - h * dx / distance),
+        (mx - h * dy / distance, my + h * dx / distance),
+    }
+    return [
+        (x, y) for x, y in candidates if _on_arc(first, x, y) and _on_arc(second, x, y)
+    ]
+
+
+def intersect(first, second):
+    """Точки пересечения двух участков контура"""
+    if first[0] == "segment":
+        if second[0] == "segment":
+            return segment_segment(first, second)
+        return segment_arc(first, second)
+    if second[0] == "segment":
+        return segment_arc(second, first)
+    return arc_arc(first, second)
+
+
+def nearest_point(part, x, y):
+    """Ближайшая к (x, y) точка участка контура"""
+    if part[0] == "segment":
+        _, x1, y1, x2, y2 = part
+        dx, dy = x2 - x1, y2 - y1
+        length_squared = dx * dx + dy * dy
+        if length_squared == 0:
+            return x1, y1
+        t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / length_squared))
+        return x1 + t * dx, y1 + t * dy
+    _, cx, cy, radius, start_angle, span_angle = part
+    angle = math.degrees(math.atan2(y - cy, x - cx))
+    if not angle_on_arc(angle, start_angle, span_angle):
+        # Ближайшая точка дуги - один из её концов
+        ends = [
+            (
+                cx + radius * math.cos(math.radians(end)),
+                cy + radius * math.sin(math.radians(end)),
+            )
+            for end in (start_angle, start_angle + span_angle)
+        ]
+        return min(ends, key=lambda point: math.hypot(point[0] - x, point[1] - y))
+    return (
+        cx + radius * math.cos(math.radians(angle)),
+        cy + radius * math.sin(math.radians(angle)),
+    )
+
+
+def part_bounds(part):
+    """Габариты участка контура (left, top, right, bottom) без учёта углов дуги"""
+    if part[0] == "segment":
+        _, x1, y1, x2, y2 = part
+        return min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2)
+    _, cx, cy, radius, _, _ = part
+    return cx - radius, cy - radius, cx + radius, cy + radius
+
+
+# Пакетный поиск пересечений (NumPy)
+
+
+def outline_arrays(shapes):
+    """Контуры фигур в виде массивов.
+
+    Возвращает (segments, segment_owners, arcs, arc_owners): отрезки -
+    массив N x 4 (x1, y1, x2, y2), дуги - массив M x 5 (cx, cy, radius,
+    start_angle, span_angle), owners - номера фигур в shapes.
+    """
+    segments, segment_owners, arcs, arc_owners = [], [], [], []
+    for number, shape in enumerate(shapes):
+        for part in shape.outline():
+            if part[0] == "segment":
+                segments.append(part[1:])
+                segment_owners.append(number)
+            else:
+                arcs.append(part[1:])
+                arc_owners.append(number)
+    return (
+        np.array(segments, dtype=float).reshape(-1, 4),
+        np.array(segment_owners, dtype=np.int64),
+        np.array(arcs, dtype=float).reshape(-1, 5),
+        np.array(arc_owners, dtype=np.int64),
+    )
+
+
+def _angles_on_arcs(x, y, arcs):
+    angles = np.degrees(np.arctan2(y - arcs[:, 1], x - arcs[:, 0]))
+    offsets = (angles - arcs[:, 3]) % 360
+    return (
+        (arcs[:, 4] >= 360)
+        | (offsets <= arcs[:, 4] + EPSILON)
+        | (offsets >= 360 - EPSILON)
+    )
+
+
+def batch_segment_segment(first, second):
+    """Пересечения пар отрезков first[i], second[i] (массивы N x 4).
+
+    Возвращает (points, pair): точки пересечения и номера их пар.
+    """
+    p = first[:, :2]
+    r = first[:, 2:] - p
+    s = second[:, 2:] - second[:, :2]
+    qp = second[:, :2] - p
+    denominator = r[:, 0] * s[:, 1] - r[:, 1] * s[:, 0]
+    parallel = np.abs(denominator) < EPSILON
+    denominator = np.where(parallel, 1.0, denominator)
+    t = (qp[:, 0] * s[:, 1] - qp[:, 1] * s[:, 0]) / denominator
+    u = (qp[:, 0] * r[:, 1] - qp[:, 1] * r[:, 0]) / denominator
+    valid = (
+        ~parallel
+        & (t >= -EPSILON)
+        & (t <= 1 + EPSILON)
+        & (u >= -EPSILON)
+        & (u <= 1 + EPSILON)
+    )
+    pair = np.flatnonzero(valid)
+    return p[pair] + t[pair, None] * r[pair], pair
+
+
+def batch_segment_arc(segments, arcs):
+    """Пересечения пар отрезок segments[i] - дуга arcs[i]"""
+    start = segments[:, :2]
+    delta = segments[:, 2:] - start
+    offset = start - arcs[:, :2]
+    a = np.einsum("ij,ij->i", delta, delta)
+    b = 2 * np.einsum("ij,ij->i", offset, delta)
+    c = np.einsum("ij,ij->i", offset, offset) - arcs[:, 2] ** 2
+    discriminant = b * b - 4 * a * c
+    solvable = (a >= EPSILON) & (discriminant >= 0)
+    a = np.where(solvable, a, 1.0)
+    root = np.sqrt(np.where(solvable, discriminant, 0.0))
+    points, pairs = [], []
+    # Касание даёт один корень: второй отбрасывается
+    for t, valid in (
+        ((-b - root) / (2 * a), solvable),
+        ((-b + root) / (2 * a), solvable & (root > EPSILON)),
+    ):
+        valid = valid & (t >= -EPSILON) & (t <= 1 + EPSILON)
+        pair = np.flatnonzero(valid)
+        found = start[pair] + t[pair, None] * delta[pair]
+        on_arc = _angles_on_arcs(found[:, 0], found[:, 1], arcs[pair])
+        points.append(found[on_arc])
+        pairs.append(pair[on_arc])
+    return np.concatenate(points), np.concatenate(pairs)
+
+
+def batch_arc_arc(first, second):
+    """Пересечения пар дуг first[i], second[i]"""
+    delta = second[:, :2] - first[:, :2]
+    distance = np.hypot(delta[:, 0], delta[:, 1])
+    r1, r2 = first[:, 2], second[:, 2]
+    solvable = (
+        (distance >= EPSILON) & (distance <= r1 + r2) & (distance >= np.abs(r1 - r2))
+    )
+    distance = np.where(solvable, distance, 1.0)
+    a = (r1 * r1 - r2 * r2 + distance * distance) / (2 * distance)
+    h = np.sqrt(np.maximum(r1 * r1 - a * a, 0.0))
+    unit = delta / distance[:, None]
+    middle = first[:, :2] + a[:, None] * unit
+    normal = np.column_stack((unit[:, 1], -unit[:, 0]))
+    points, pairs = [], []
+    for sign, valid in ((1, solvable), (-1, solvable & (h > EPSILON))):
+        pair = np.flatnonzero(valid)
+        found = middle[pair] + sign * h[pair, None] * normal[pair]
+        on_arcs = _angles_on_arcs(
+            found[:, 0], found[:, 1], first[pair]
+        ) & _angles_on_arcs(found[:, 0], found[:, 1], second[pair])
+        points.append(found[on_arcs])
+        pairs.append(pair[on_arcs])
+    return np.concatenate(points), np.concatenate(pairs)
+
+
+def _part_bounds(segments, arcs):
+    """Габариты участков (left, top, right, bottom): сначала отрезки, затем дуги"""
+    segment_bounds = np.column_stack(
+        (
+            np.minimum(segments[:, 0], segments[:, 2]),
+            np.minimum(segments[:, 1], segments[:, 3]),
+            np.maximum(segments[:, 0], segments[:, 2]),
+            np.maximum(segments[:, 1], segments[:, 3]),
+        )
+    )
+    radius = arcs[:, 2:3]
+    arc_bounds = np.hstack((arcs[:, :2] - radius, arcs[:, :2] + radius))
+    return np.vstack((segment_bounds.reshape(-1, 4), arc_bounds.reshape(-1, 4)))
+
+
+def candidate_pairs(bounds, owners, max_cells=INTERSECTION_MAX_CELLS):
+    """Пары участков разных фигур с пересекающимися габаритами.
+
+    Широкая фаза - равномерная сетка с ячейкой по медианному размеру
+    участка. Участки, занимающие больше max_cells ячеек, сравниваются
+    со всеми участками напрямую по габаритам.
+    """
+    count = len(bounds)
+    if count < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    sizes = np.maximum(bounds[:, 2] - bounds[:, 0], bounds[:, 3] - bounds[:, 1])
+    cell = max(float(np.median(sizes)), EPSILON)
+    x0 = np.floor(bounds[:, 0] / cell).astype(np.int64)
+    y0 = np.floor(bounds[:, 1] / cell).astype(np.int64)
+    nx = np.floor(bounds[:, 2] / cell).astype(np.int64) - x0 + 1
+    ny = np.floor(bounds[:, 3] / cell).astype(np.int64) - y0 + 1
+    cells = nx * ny
+    gridded = np.flatnonzero(cells <= max_cells)
+    oversized = np.flatnonzero(cells > max_cells)
+
+    # Все (участок, ячейка) для участков сетки
+    part = np.repeat(gridded, cells[gridded])
+    first_entry = np.cumsum(cells[gridded]) - cells[gridded]
+    k = np.arange(len(part)) - np.repeat(first_entry, cells[gridded])
+    cx = x0[part] + k % nx[part]
+    cy = y0[part] + k // nx[part]
+    order = np.lexsort((cy, cx))
+    cx, cy, part = cx[order], cy[order], part[order]
+
+    # Пары внутри каждой ячейки: каждый элемент - со всеми следующими
+    changed = (cx[1:] != cx[:-1]) | (cy[1:] != cy[:-1])
+    run_starts = np.flatnonzero(np.r_[True, changed])
+    run_ends = np.r_[run_starts[1:], len(part)]
+    run_of = np.repeat(np.arange(len(run_starts)), run_ends - run_starts)
+    following = run_ends[run_of] - np.arange(len(part)) - 1
+    left = np.repeat(np.arange(len(part)), following)
+    step = np.arange(len(left)) - np.repeat(np.cumsum(following) - following, following)
+    pairs = [np.column_stack((part[left], part[left + step + 1]))]
+
+    for index in oversized:
+        others = np.flatnonzero(
+            (bounds[:, 0] <= bounds[index, 2])
+            & (bounds[:, 2] >= bounds[index, 0])
+            & (bounds[:, 1] <= bounds[index, 3])
+            & (bounds[:, 3] >= bounds[index, 1])
+        )
+        pairs.append(np.column_stack((np.full(len(others), index), others)))
+
+    pairs = np.concatenate(pairs)
+    pairs.sort(axis=1)
+    a, b = pairs[:, 0], pairs[:, 1]
+    keep = (
+        (owners[a] != owners[b])
+        & (bounds[a, 0] <= bounds[b, 2])
+        & (bounds[a, 2] >= bounds[b, 0])
+        & (bounds[a, 1] <= bounds[b, 3])
+        & (bounds[a, 3] >= bounds[b, 1])
+    )
+    pairs = pairs[keep]
+    # Участок, попавший в несколько общих ячеек, даёт повторы пары
+    keys = np.unique(pairs[:, 0] * count + pairs[:, 1])
+    return np.column_stack((keys // count, keys % count))
+
+
+def find_intersections(shapes, rect=None):
+    """Все точки пересечения контуров разных фигур.
+
+    rect - необязательный QRectF: ищутся только точки внутри него.
+    Возвращает (points, owners): массив K x 2 точек и массив K x 2 номеров
+    пересекающихся фигур в shapes. Пересечения участков одной фигуры
+    (например, соседних сторон многоугольника) не учитываются.
+    """
+    segments, segment_owners, arcs, arc_owners = outline_arrays(shapes)
+    bounds = _part_bounds(segments, arcs)
+    owners = np.concatenate((segment_owners, arc_owners))
+    if rect is not None:
+        rect = rect.normalized()
+        inside = (
+            (bounds[:, 0] <= rect.right())
+            & (bounds[:, 2] >= rect.left())
+            & (bounds[:, 1] <= rect.bottom())
+            & (bounds[:, 3] >= rect.top())
+        )
+    else:
+        inside = np.ones(len(bounds), dtype=bool)
+    selected = np.flatnonzero(inside)
+    pairs = selected[candidate_pairs(bounds[selected], owners[selected])]
+
+    parts_segments = len(segments)
+    a, b = pairs[:, 0], pairs[:, 1]
+    a_segment = a < parts_segments
+    b_segment = b < parts_segments
+    points, found = [], []
+
+    both = a_segment & b_segment
+    found_points, pair = batch_segment_segment(segments[a[both]], segments[b[both]])
+    points.append(found_points)
+    found.append(pairs[both][pair])
+
+    mixed = a_segment & ~b_segment
+    found_points, pair = batch_segment_arc(
+        segments[a[mixed]], arcs[b[mixed] - parts_segments]
+    )
+    points.append(found_points)
+    found.append(pairs[mixed][pair])
+
+    neither = ~a_segment & ~b_segment
+    found_points, pair = batch_arc_arc(
+        arcs[a[neither] - parts_segments], arcs[b[neither] - parts_segments]
+    )
+    points.append(found_points)
+    found.append(pairs[neither][pair])
+
+    points = np.concatenate(points).reshape(-1, 2)
+    found = owners[np.concatenate(found).reshape(-1, 2)]
+    if rect is not None:
+        inside = (
+            (points[:, 0] >= rect.left())
+            & (points[:, 0] <= rect.right())
+            & (points[:, 1] >= rect.top())
+            & (points[:, 1] <= rect.bottom())
+        )
+        points, found = points[inside], found[inside]
+    # Точка в общей вершине двух сторон многоугольника находится дважды
+    found.sort(axis=1)
+    _, unique = np.unique(
+        np.column_stack((found, np.round(points, 9))), axis=0, return_index=True
+    )
+    unique.sort()
+    return points[unique], found[unique]
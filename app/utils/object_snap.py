@@ -0,0 +1,99 @@
+import math
+from PySide6.QtCore import QRectF
+from app.utils.intersections import intersect, nearest_point, part_bounds
+from app.config.config import SNAP_MAX_SHAPES
+
+
+class ObjectSnap:
+    """Объектная привязка к фигурам холста.
+
+    Кандидаты ищутся через пространственный индекс в квадрате вокруг
+    курсора. Точки привязки и контуры фигур запоминаются при первом
+    обращении; после изменения или удаления фигуры их нужно сбросить
+    через discard(). Пересечения ищутся только между ближайшими к курсору
+    фигурами (не более SNAP_MAX_SHAPES) и только у участков контура,
+    попадающих в квадрат, поэтому стоимость запроса не зависит от размера
+    чертежа.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self.max_shapes = SNAP_MAX_SHAPES
+        # id(фигуры) -> точки привязки / контур
+        self._points = {}
+        self._outlines = {}
+
+    def discard(self, shape):
+        self._points.pop(id(shape), None)
+        self._outlines.pop(id(shape), None)
+
+    def clear(self):
+        self._points.clear()
+        self._outlines.clear()
+
+    def points(self, shape):
+        points = self._points.get(id(shape))
+        if points is None:
+            points = self._points[id(shape)] = shape.snap_points()
+        return points
+
+    def outline(self, shape):
+        outline = self._outlines.get(id(shape))
+        if outline is None:
+            outline = self._outlines[id(shape)] = shape.outline()
+        return outline
+
+    def snap(self, x, y, aperture):
+        """Ближайшая к (x, y) точка привязки не дальше aperture или None.
+
+        Результат - кортеж (вид, x, y). Характерные точки и пересечения
+        имеют приоритет над привязкой к ближайшей точке линии.
+        """
+        rect = QRectF(x - aperture, y - aperture, 2 * aperture, 2 * aperture)
+        found = None
+        best = aperture
+        near = []
+        for shape in self.index.query(rect):
+            for kind, px, py in self.points(shape):
+                distance = math.hypot(px - x, py - y)
+                if distance <= best:
+                    found = (kind, px, py)
+                    best = distance
+            distance = shape.distance_to_point(x, y)
+            if distance <= aperture:
+                near.append((distance, shape))
+        if not near:
+            return found
+
+        near.sort(key=lambda item: item[0])
+        parts = [
+            self.parts_in_rect(shape, rect) for _, shape in near[: self.max_shapes]
+        ]
+        for i, first_parts in enumerate(parts):
+            for second_parts in parts[i + 1 :]:
+                for first in first_parts:
+                    for second in second_parts:
+                        for px, py in intersect(first, second):
+                            distance = math.hypot(px - x, py - y)
+                            if distance <= best:
+                                found = ("intersection", px, py)
+                                best = distance
+        if found is not None:
+            return found
+
+        px, py = min(
+            (nearest_point(part, x, y) for part in parts[0]),
+            key=lambda point: math.hypot(point[0] - x, point[1] - y),
+            default=(None, None),
+        )
+        return ("nearest", px, py) if px is not None else None
+
+    def parts_in_rect(self, shape, rect):
+        """Участки контура фигуры, габариты которых пересекают rect"""
+        left, top, right, bottom = rect.getCoords()
+        parts = []
+        for part in self.outline(shape):
+            x1, y1, x2, y2 = part_bounds(part)
+            if x1 <= right and x2 >= left and y1 <= bottom and y2 >= top:
+                parts.append(part)
+        return parts
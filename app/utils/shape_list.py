@@ -0,0 +1,142 @@
+# Удаление или вставка большего числа разрозненных участков сообщается
+# одним "reset"
+_MAX_NOTIFIED_RUNS = 32
+
+
+class ShapeList(list):
+    """Список фигур холста, сообщающий подписчикам об изменении состава.
+
+    Подписчик вызывается как ``callback(event, index, shapes)``, где event -
+    "insert", "remove" или "reset", index - позиция первой затронутой фигуры,
+    shapes - список затронутых фигур (для "reset" - пустой).
+    """
+
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self._subscribers = []
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _notify(self, event, index=0, shapes=()):
+        for callback in self._subscribers:
+            callback(event, index, list(shapes))
+
+    def _normalize_index(self, index):
+        if index < 0:
+            index += len(self)
+        return index
+
+    def append(self, shape):
+        super().append(shape)
+        self._notify("insert", len(self) - 1, [shape])
+
+    def extend(self, iterable):
+        shapes = list(iterable)
+        if not shapes:
+            return
+        start = len(self)
+        super().extend(shapes)
+        self._notify("insert", start, shapes)
+
+    def __iadd__(self, iterable):
+        self.extend(iterable)
+        return self
+
+    def insert(self, index, shape):
+        index = max(0, min(self._normalize_index(index), len(self)))
+        super().insert(index, shape)
+        self._notify("insert", index, [shape])
+
+    def pop(self, index=-1):
+        index = self._normalize_index(index)
+        shape = super().pop(index)
+        self._notify("remove", index, [shape])
+        return shape
+
+    def remove(self, shape):
+        self.pop(self.index(shape))
+
+    def clear(self):
+        super().clear()
+        self._notify("reset")
+
+    def insert_items(self, items):
+        """Вставляет пары (номер, фигура); номера - итоговые позиции фигур"""
+        items = sorted(items, key=lambda item: item[0])
+        # Подряд идущие номера вставляются одним участком; при вставке по
+        # возрастанию номеров предыдущие участки уже стоят на своих местах
+        runs = []
+        for index, shape in items:
+            if runs and runs[-1][0] + len(runs[-1][1]) == index:
+                runs[-1][1].append(shape)
+            else:
+                runs.append((index, [shape]))
+        notify = len(runs) <= _MAX_NOTIFIED_RUNS
+        for index, shapes in runs:
+            super().__setitem__(slice(index, index), shapes)
+            if notify:
+                self._notify("insert", index, shapes)
+        if not notify:
+            self._notify("reset")
+
+    def remove_indices(self, indices):
+        """Удаляет фигуры с указанными номерами и возвращает их по порядку"""
+        indices = sorted({self._normalize_index(index) for index in indices})
+        removed = [self[index] for index in indices]
+        # Подряд идущие номера удаляются одним участком, с конца списка,
+        # чтобы номера ещё не удалённых участков не сдвигались
+        runs = []
+        for index in indices:
+            if runs and runs[-1][1] == index:
+                runs[-1][1] = index + 1
+            else:
+                runs.append([index, index + 1])
+        if len(runs) > _MAX_NOTIFIED_RUNS:
+            removed_set = set(indices)
+            super().__setitem__(
+                slice(None),
+                [shape for index, shape in enumerate(self) if index not in removed_set],
+            )
+            self._notify("reset")
+            return removed
+        for start, stop in reversed(runs):
+            shapes = self[start:stop]
+            super().__delitem__(slice(start, stop))
+            self._notify("remove", start, shapes)
+        return removed
+
+    def __delitem__(self, key):
+        if isinstance(key, slice):
+            super().__delitem__(key)
+            self._notify("reset")
+            return
+        self.pop(key)
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            super().__setitem__(key, value)
+            self._notify("reset")
+            return
+        key = self._normalize_index(key)
+        old_shape = self[key]
+        super().__setitem__(key, value)
+        self._notify("remove", key, [old_shape])
+        self._notify("insert", key, [value])
+
+    def __imul__(self, count):
+        result = super().__imul__(count)
+        self._notify("reset")
+        return result
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._notify("reset")
+
+    def reverse(self):
+        super().reverse()
+        self._notify("reset")
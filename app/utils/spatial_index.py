@@ -0,0 +1,189 @@
+import math
+from PySide6.QtCore import QRectF
+from app.config.config import SPATIAL_INDEX_CELL_SIZE, SPATIAL_INDEX_MAX_CELLS
+
+
+class SpatialIndex:
+    """Равномерная сетка над фигурами холста для выборки по прямоугольнику.
+
+    Для каждой фигуры хранятся габариты с учётом толщины линии. Фигуры,
+    занимающие слишком много ячеек или не имеющие габаритов, хранятся
+    отдельно и возвращаются при любом запросе.
+    """
+
+    def __init__(self, cell_size=SPATIAL_INDEX_CELL_SIZE):
+        self.cell_size = cell_size
+        self.max_cells = SPATIAL_INDEX_MAX_CELLS
+        self._cells = {}
+        self._oversized = set()
+        # id(фигуры) -> [фигура, габариты, ячейки, ключ порядка]
+        self._entries = {}
+        self._last_order = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, shape):
+        return id(shape) in self._entries
+
+    def clear(self):
+        self._cells.clear()
+        self._oversized.clear()
+        self._entries.clear()
+        self._last_order = 0.0
+
+    def rebuild(self, shapes):
+        self.clear()
+        for shape in shapes:
+            self.insert(shape)
+
+    def bounds(self, shape):
+        """Закэшированные габариты фигуры с учётом толщины линии"""
+        extents = self.extents(shape)
+        if extents is None:
+            return None
+        left, top, right, bottom = extents
+        return QRectF(left, top, right - left, bottom - top)
+
+    def extents(self, shape):
+        """Те же габариты кортежем (left, top, right, bottom), как в query_items"""
+        entry = self._entries.get(id(shape))
+        return entry[1] if entry is not None else None
+
+    def insert(self, shape, before=None, after=None):
+        """Добавляет фигуру; before/after - соседи в порядке отрисовки"""
+        if id(shape) in self._entries:
+            self.remove(shape)
+        order = self._order_between(after, before)
+        if order is None:
+            self._renumber()
+            order = self._order_between(after, before)
+        self._place(shape, order)
+
+    def remove(self, shape):
+        entry = self._entries.pop(id(shape), None)
+        if entry is None:
+            return
+        self._unlink(id(shape), entry[2])
+
+    def update(self, shape):
+        """Пересчитывает габариты изменённой фигуры"""
+        entry = self._entries.get(id(shape))
+        if entry is None:
+            return
+        self._unlink(id(shape), entry[2])
+        self._place(shape, entry[3])
+
+    def query(self, rect):
+        """Фигуры, чьи габариты пересекают QRectF, в порядке отрисовки"""
+        return [shape for shape, _ in self.query_items(rect)]
+
+    def query_items(self, rect):
+        """То же, что query(), но в парах (фигура, габариты).
+
+        Габариты - кортеж (left, top, right, bottom) с учётом толщины линии
+        или None, если фигура их не имеет.
+        """
+        rect = rect.normalized()
+        left, top, right, bottom = rect.left(), rect.top(), rect.right(), rect.bottom()
+        ids = set(self._oversized)
+
+        x0, y0, x1, y1 = self._cell_range(left, top, right, bottom)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(self._cells):
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    cell = self._cells.get((cx, cy))
+                    if cell:
+                        ids.update(cell)
+        else:
+            for (cx, cy), cell in self._cells.items():
+                if x0 <= cx <= x1 and y0 <= cy <= y1:
+                    ids.update(cell)
+
+        found = []
+        for shape_id in ids:
+            shape, bounds, _, order = self._entries[shape_id]
+            if bounds is not None and (
+                bounds[2] < left
+                or bounds[0] > right
+                or bounds[3] < top
+                or bounds[1] > bottom
+            ):
+                continue
+            found.append((order, shape, bounds))
+        found.sort(key=lambda item: item[0])
+        return [(shape, bounds) for _, shape, bounds in found]
+
+    def _place(self, shape, order):
+        rect = shape.bounding_rect()
+        bounds = None
+        if rect is not None:
+            pad = getattr(shape, "line_thickness", 0) or 0
+            bounds = (
+                rect.left() - pad,
+                rect.top() - pad,
+                rect.right() + pad,
+                rect.bottom() + pad,
+            )
+        cells = self._cells_for(bounds)
+        shape_id = id(shape)
+        self._entries[shape_id] = [shape, bounds, cells, order]
+        if cells is None:
+            self._oversized.add(shape_id)
+        else:
+            for key in cells:
+                self._cells.setdefault(key, set()).add(shape_id)
+        self._last_order = max(self._last_order, order)
+
+    def _unlink(self, shape_id, cells):
+        if cells is None:
+            self._oversized.discard(shape_id)
+            return
+        for key in cells:
+            cell = self._cells.get(key)
+            if cell is None:
+                continue
+            cell.discard(shape_id)
+            if not cell:
+                del self._cells[key]
+
+    def _cell_range(self, left, top, right, bottom):
+        size = self.cell_size
+        return (
+            math.floor(left / size),
+            math.floor(top / size),
+            math.floor(right / size),
+            math.floor(bottom / size),
+        )
+
+    def _cells_for(self, bounds):
+        if bounds is None or not all(math.isfinite(v) for v in bounds):
+            return None
+        x0, y0, x1, y1 = self._cell_range(*bounds)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > self.max_cells:
+            return None
+        return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+    def _order_between(self, after, before):
+        low = self._order_of(after)
+        high = self._order_of(before)
+        if high is None:
+            return (low if low is not None else self._last_order) + 1.0
+        if low is None:
+            low = high - 2.0
+        middle = (low + high) / 2
+        if not low < middle < high:
+            return None
+        return middle
+
+    def _order_of(self, shape):
+        if shape is None:
+            return None
+        entry = self._entries.get(id(shape))
+        return entry[3] if entry else None
+
+    def _renumber(self):
+        entries = sorted(self._entries.values(), key=lambda entry: entry[3])
+        for number, entry in enumerate(entries, start=1):
+            entry[3] = float(number)
+        self._last_order = float(len(entries))
@@ -0,0 +1,297 @@
+from collections import deque
+from contextlib import contextmanager
+from PySide6.QtCore import QObject, QPointF, QRectF, Signal
+from app.objects.parent import GEOMETRY_ATTRIBUTES
+from app.config.config import UNDO_MEMORY_LIMIT
+
+# Приблизительная стоимость хранения в байтах: фигура, которую удерживает
+# история, и одно сохранённое значение (точка, число)
+_SHAPE_COST = 512
+_VALUE_COST = 64
+
+_GEOMETRY_ORDER = sorted(GEOMETRY_ATTRIBUTES)
+
+
+def _copy_value(value):
+    if isinstance(value, QPointF):
+        return QPointF(value)
+    if isinstance(value, QRectF):
+        return QRectF(value)
+    if isinstance(value, (int, float)) or value is None:
+        return value
+    # Список точек (или представление вершин хранилища)
+    return [QPointF(point) for point in value]
+
+
+def _value_count(value):
+    return len(value) if isinstance(value, list) else 1
+
+
+def shape_state(shape):
+    """Стиль и геометрия фигуры: (стиль, ((атрибут, значение), ...))"""
+    geometry = tuple(
+        (name, _copy_value(getattr(shape, name)))
+        for name in _GEOMETRY_ORDER
+        if hasattr(shape, name)
+    )
+    return shape.style, geometry
+
+
+def apply_shape_state(shape, state):
+    style, geometry = state
+    shape.style = style
+    for name, value in geometry:
+        setattr(shape, name, _copy_value(value))
+
+
+class InsertShapes:
+    """Добавление фигур подряд, начиная с номера index"""
+
+    merge_key = None
+
+    def __init__(self, text, index, shapes):
+        self.text = text
+        self.index = index
+        self.shapes = list(shapes)
+        self.size = _SHAPE_COST * len(self.shapes)
+
+    def undo(self, canvas):
+        canvas.shapes.remove_indices(range(self.index, self.index + len(self.shapes)))
+
+    def redo(self, canvas):
+        canvas.shapes.insert_items(
+            zip(range(self.index, self.index + len(self.shapes)), self.shapes)
+        )
+
+
+class RemoveShapes:
+    """Удаление фигур; items - пары (номер до удаления, фигура)"""
+
+    merge_key = None
+
+    def __init__(self, text, items):
+        self.text = text
+        self.items = sorted(items, key=lambda item: item[0])
+        self.size = _SHAPE_COST * len(self.items)
+
+    def undo(self, canvas):
+        canvas.shapes.insert_items(self.items)
+
+    def redo(self, canvas):
+        canvas.shapes.remove_indices([index for index, _ in self.items])
+
+
+class ModifyShapes:
+    """Изменение стиля или формы фигур.
+
+    Хранятся только изменившиеся фигуры: для каждой - состояние до и после
+    (см. shape_state). Команды с одинаковым merge_key, записанные подряд,
+    сливаются в одну: так перетаскивание точки даёт один шаг истории.
+    """
+
+    def __init__(self, text, changes, merge_key=None):
+        self.text = text
+        self.merge_key = merge_key
+        # id(фигуры) -> [фигура, до, после]
+        self.changes = {
+            id(shape): [shape, before, after] for shape, before, after in changes
+        }
+        self.size = self._estimate_size()
+
+    def _estimate_size(self):
+        size = 0
+        for _, before, after in self.changes.values():
+            size += _SHAPE_COST
+            for _, value in before[1] + after[1]:
+                size += _VALUE_COST * _value_count(value)
+        return size
+
+    def merge(self, other):
+        for key, (shape, before, after) in other.changes.items():
+            if key in self.changes:
+                self.changes[key][2] = after
+            else:
+                self.changes[key] = [shape, before, after]
+        self.size = self._estimate_size()
+
+    def undo(self, canvas):
+        for shape, before, _ in self.changes.values():
+            apply_shape_state(shape, before)
+            canvas.refreshShape(shape)
+
+    def redo(self, canvas):
+        for shape, _, after in self.changes.values():
+            apply_shape_state(shape, after)
+            canvas.refreshShape(shape)
+
+
+class CommandGroup:
+    """Несколько команд, отменяемых одним шагом"""
+
+    merge_key = None
+
+    def __init__(self, text):
+        self.text = text
+        self.commands = []
+
+    @property
+    def size(self):
+        return sum(command.size for command in self.commands)
+
+    def undo(self, canvas):
+        for command in reversed(self.commands):
+            command.undo(canvas)
+
+    def redo(self, canvas):
+        for command in self.commands:
+            command.redo(canvas)
+
+
+class UndoStack(QObject):
+    """История изменений чертежа.
+
+    Добавление и удаление фигур записываются автоматически по уведомлениям
+    списка фигур холста, изменение фигур - явно: capture() до изменения и
+    recordChanges() после него. Сброс списка фигур (новый или открытый файл)
+    очищает историю. Команды хранят изменения, а не копии чертежа; когда
+    их приблизительный объём превышает memory_limit, самые старые шаги
+    забываются.
+    """
+
+    changed = Signal()
+
+    def __init__(self, canvas, memory_limit=UNDO_MEMORY_LIMIT):
+        super().__init__(canvas)
+        self.canvas = canvas
+        self.memory_limit = memory_limit
+        self._undo = deque()
+        self._redo = []
+        self._size = 0
+        self._suspended = 0
+        self._group = None
+        self._merging = False
+        canvas.shapes.subscribe(self.onShapesChanged)
+
+    def canUndo(self):
+        return bool(self._undo)
+
+    def canRedo(self):
+        return bool(self._redo)
+
+    def memoryUsage(self):
+        """Приблизительный объём истории в байтах"""
+        return self._size + sum(command.size for command in self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+        self._size = 0
+        self._merging = False
+        self.changed.emit()
+
+    def onShapesChanged(self, event, index, shapes):
+        if self._suspended:
+            return
+        if event == "insert":
+            self.push(InsertShapes("Построение", index, shapes))
+        elif event == "remove":
+            items = zip(range(index, index + len(shapes)), shapes)
+            self.push(RemoveShapes("Удаление", items))
+        else:
+            self.clear()
+
+    @contextmanager
+    def suspended(self):
+        """Изменения внутри блока не записываются в историю"""
+        self._suspended += 1
+        try:
+            yield
+        finally:
+            self._suspended -= 1
+
+    @contextmanager
+    def group(self, text):
+        """Команды, записанные внутри блока, отменяются одним шагом"""
+        if self._group is not None:
+            yield
+            return
+        self._group = CommandGroup(text)
+        try:
+            yield
+        finally:
+            group, self._group = self._group, None
+            if len(group.commands) == 1:
+                self.push(group.commands[0])
+            elif group.commands:
+                self.push(group)
+
+    def push(self, command):
+        """Добавляет уже выполненную команду"""
+        if self._suspended:
+            return
+        if self._group is not None:
+            self._group.commands.append(command)
+            return
+        self._redo.clear()
+        top = self._undo[-1] if self._undo else None
+        if (
+            self._merging
+            and command.merge_key is not None
+            and top is not None
+            and top.merge_key == command.merge_key
+        ):
+            self._size -= top.size
+            top.merge(command)
+            self._size += top.size
+        else:
+            self._undo.append(command)
+            self._size += command.size
+        self._merging = command.merge_key is not None
+        # Последний шаг сохраняется, даже если он один больше лимита
+        while self._size > self.memory_limit and len(self._undo) > 1:
+            self._size -= self._undo.popleft().size
+        self.changed.emit()
+
+    def seal(self):
+        """Следующая команда не сливается с предыдущей (конец перетаскивания)"""
+        self._merging = False
+
+    def capture(self, shapes):
+        """Состояния фигур перед изменением для recordChanges()"""
+        return [(shape, shape_state(shape)) for shape in shapes]
+
+    def recordChanges(self, text, captured, merge_key=None):
+        """Записывает изменение фигур, состояния которых сняты capture()"""
+        changes = []
+        for shape, before in captured:
+            after = shape_state(shape)
+            if after != before:
+                changes.append((shape, before, after))
+        if changes:
+            self.push(ModifyShapes(text, changes, merge_key))
+
+    def undo(self):
+        """Отменяет последний шаг и возвращает его команду или None"""
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        self._size -= command.size
+        with self.suspended():
+            command.undo(self.canvas)
+        self._redo.append(command)
+        self._merging = False
+        self.changed.emit()
+        return command
+
+    def redo(self):
+        """Повторяет отменённый шаг и возвращает его команду или None"""
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        with self.suspended():
+            command.redo(self.canvas)
+        self._undo.append(command)
+        self._size += command.size
+        self._merging = False
+        self.changed.emit()
+        return command
@@ -1,5 +1,8 @@
 import sys
 import os
+import glob
+import time
+import tempfile
 from PySide6.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -21,13 +24,17 @@ from PySide6.QtWidgets import (
     QSpinBox,
     QMenu,
     QStyleFactory,
+    QProgressBar,
+    QPushButton,
 )
 from PySide6.QtGui import QAction, QIcon, QPalette, QFont
-from PySide6.QtCore import Qt, QSize
+from PySide6.QtCore import Qt, QSize, QTimer, QLockFile
 from app.ui.canvas import Canvas
 from app.ui.object_tree import ConstructionTree
 from PySide6.QtGui import QColor
 from app.utils.handle_dxf import *
+from app.utils.dxf_import import DxfImport
+from app.utils.dxf_save import DxfSave
 from app.utils.handle_input import *
 from app.config.config import *
 
@@ -43,6 +50,11 @@ class MainWindow(QMainWindow):
         self.dock_flag = False
         self.line_input_dock = None
         self.handle_manual_input = lambda: handle_manual_input(self)
+        self.dxf_import = None
+        self.dxf_save = None
+        self.dxf_autosave = None
+        self.autosave_pending = False
+        self.recovery_file = None
         self.initUI()
 
     def initUI(self):
@@ -59,6 +71,7 @@ class MainWindow(QMainWindow):
         self.menuBar().setVisible(False)
         self.createStatusBar()
         self.createConstructionTree()
+        self.createAutosave()
 
     def createToolTabs(self):
         tabs = QTabWidget()
@@ -359,9 +372,119 @@ class MainWindow(QMainWindow):
         self.statusBar = QStatusBar()
         self.setStatusBar(self.statusBar)
 
+        self.importProgressBar = QProgressBar()
+        self.importProgressBar.setMaximumWidth(200)
+        self.importProgressBar.hide()
+        self.statusBar.addPermanentWidget(self.importProgressBar)
+
+        self.cancelImportButton = QPushButton("Отмена")
+        self.cancelImportButton.clicked.connect(lambda: self.cancelDxfImport())
+        self.cancelImportButton.hide()
+        self.statusBar.addPermanentWidget(self.cancelImportButton)
+
         self.fileNameLabel = QLabel("Новый файл")
         self.statusBar.addPermanentWidget(self.fileNameLabel)
 
+    def createAutosave(self):
+        # Файл восстановления у каждого окна свой. Пока окно работает, файл
+        # защищён блокировкой: по ней следующий запуск отличает файлы
+        # аварийно завершившихся сеансов от файлов работающих
+        stem = os.path.join(
+            tempfile.gettempdir(),
+            f"{AUTOSAVE_FILE_PREFIX}-{os.getpid()}-{time.time_ns()}",
+        )
+        self.autosave_file = stem + ".dxf"
+        self.autosave_lock = QLockFile(stem + ".lock")
+        self.autosave_lock.setStaleLockTime(0)
+        self.autosave_lock.tryLock(0)
+        for signal in (
+            self.canvas.shapesInserted,
+            self.canvas.shapesRemoved,
+            self.canvas.shapesReset,
+            self.canvas.shapeChanged,
+        ):
+            signal.connect(self.markAutosavePending)
+        self.autosaveTimer = QTimer(self)
+        self.autosaveTimer.timeout.connect(self.autosave)
+        if AUTOSAVE_INTERVAL > 0:
+            self.autosaveTimer.start(AUTOSAVE_INTERVAL * 1000)
+        recovery_files = self.findRecoveryFiles()
+        if recovery_files:
+            # Вопрос задаётся после показа окна
+            QTimer.singleShot(0, lambda: self.offerRecovery(recovery_files))
+
+    def findRecoveryFiles(self):
+        """Файлы автосохранения аварийно завершившихся сеансов, новые первыми"""
+        prefix = os.path.join(tempfile.gettempdir(), AUTOSAVE_FILE_PREFIX)
+        # Блокировку работающего сеанса взять не удастся; блокировка
+        # завершившегося процесса считается устаревшей и снимается
+        finished = set()
+        for lock_file in glob.glob(prefix + "*.lock"):
+            lock = QLockFile(lock_file)
+            lock.setStaleLockTime(0)
+            if lock.tryLock(0):
+                lock.unlock()
+                finished.add(os.path.splitext(lock_file)[0])
+        found = []
+        for filename in glob.glob(prefix + "*.dxf"):
+            stem = os.path.splitext(filename)[0]
+            if filename != self.autosave_file and (
+                stem in finished or not os.path.exists(stem + ".lock")
+            ):
+                found.append(filename)
+        return sorted(found, key=os.path.getmtime, reverse=True)
+
+    def offerRecovery(self, filenames):
+        """Предлагает открыть найденные файлы восстановления.
+
+        Файл, который не открыли и не удалили, остаётся на месте и будет
+        предложен при следующем запуске.
+        """
+        for filename in filenames:
+            if not os.path.exists(filename):
+                continue
+            saved = time.strftime(
+                "%d.%m.%Y %H:%M", time.localtime(os.path.getmtime(filename))
+            )
+            reply = QMessageBox.question(
+                self,
+                "Восстановление",
+                "Найден файл автосохранения сеанса, завершившегося аварийно "
+                f"({saved}):\n{filename}\n\nОткрыть его?",
+                QMessageBox.Open | QMessageBox.Ignore | QMessageBox.Discard,
+                QMessageBox.Open,
+            )
+            if reply == QMessageBox.Open:
+                self.recovery_file = filename
+                self.loadDxfFile(filename)
+                return
+            if reply == QMessageBox.Discard:
+                os.remove(filename)
+
+    def markAutosavePending(self, *args):
+        self.autosave_pending = True
+
+    def autosave(self):
+        """Сохраняет фигуры в файл восстановления, если они изменились"""
+        if not self.autosave_pending:
+            return
+        if self.dxf_autosave is not None or self.dxf_import is not None:
+            return
+        self.autosave_pending = False
+        self.dxf_autosave = DxfSave(self.canvas.shapes, self.autosave_file, self)
+        self.dxf_autosave.finished.connect(self.onAutosaveFinished)
+        self.dxf_autosave.failed.connect(self.onAutosaveFailed)
+        self.dxf_autosave.start()
+
+    def onAutosaveFinished(self):
+        self.dxf_autosave = None
+        self.statusBar.showMessage(f"Автосохранение: {self.autosave_file}", 3000)
+
+    def onAutosaveFailed(self, message):
+        self.dxf_autosave = None
+        self.autosave_pending = True
+        self.statusBar.showMessage(f"Ошибка автосохранения: {message}")
+
     def handleManualInput(self):
         handle_manual_input(self, self.canvas)
         self.dock_flag = not self.dock_flag
@@ -406,9 +529,9 @@ class MainWindow(QMainWindow):
         if self.canvas.shapes and self.confirmSaveChanges():
             self.saveFile()
 
+        self.cancelDxfImport()
         self.canvas.shapes.clear()
         self.canvas.update()
-        self.constructionTree.updateConstructionTree()
 
         self.current_file = None
         self.fileNameLabel.setText("Новый файл")
@@ -428,55 +551,85 @@ class MainWindow(QMainWindow):
         )
 
         if filename:
-            try:
-                self.canvas.shapes.clear()
+            self.loadDxfFile(filename)
 
-                loaded_shapes = read_from_dxf(filename, self.canvas)
+    def loadDxfFile(self, filename):
+        self.cancelDxfImport()
+        self.canvas.shapes.clear()
 
-                if loaded_shapes:
-                    self.canvas.shapes.extend(loaded_shapes)
-                    self.canvas.update()
-                    self.constructionTree.updateConstructionTree()
+        # Файл читается в отдельном потоке, фигуры добавляются порциями
+        self.dxf_import = DxfImport(filename, self.canvas, self)
+        self.dxf_import.shapesLoaded.connect(self.onDxfShapesLoaded)
+        self.dxf_import.progress.connect(self.onDxfImportProgress)
+        self.dxf_import.finished.connect(self.onDxfImportFinished)
+        self.dxf_import.failed.connect(self.onDxfImportFailed)
+        self.importProgressBar.setRange(0, 0)
+        self.importProgressBar.show()
+        self.cancelImportButton.show()
+        self.statusBar.showMessage(f"Загрузка файла: {filename}")
+        self.dxf_import.start()
+
+    def onDxfShapesLoaded(self, shapes):
+        # Загруженный чертёж - начало истории, а не отменяемое построение
+        with self.canvas.history.suspended():
+            self.canvas.shapes.extend(shapes)
+        self.canvas.update()
 
-                    self.current_file = filename
-                    self.fileNameLabel.setText(
-                        f"Файл: {self.getFileNameFromPath(filename)}"
-                    )
-                    self.statusBar.showMessage(f"Загружен файл: {filename}")
-                else:
-                    QMessageBox.warning(
-                        self, "Ошибка загрузки", "Не удалось загрузить фигуры из файла."
-                    )
-            except Exception as e:
-                QMessageBox.critical(
-                    self,
-                    "Ошибка загрузки",
-                    f"Произошла ошибка при загрузке файла:\n{str(e)}",
-                )
+    def onDxfImportProgress(self, done, total):
+        # Пока общий объём неизвестен (total = 0), полоса показывает занятость
+        self.importProgressBar.setRange(0, total)
+        self.importProgressBar.setValue(done)
+
+    def onDxfImportFinished(self):
+        filename = self.dxf_import.filename
+        recovered = filename == self.recovery_file
+        self.finishDxfImport()
+        if self.canvas.shapes and recovered:
+            # Восстановленный файл становится файлом автосохранения этого
+            # сеанса, а чертёж сохраняется только в новый файл
+            os.replace(filename, self.autosave_file)
+            self.current_file = None
+            self.fileNameLabel.setText("Восстановленный файл")
+            self.statusBar.showMessage(f"Восстановлен файл: {filename}")
+        elif self.canvas.shapes:
+            self.current_file = filename
+            self.fileNameLabel.setText(f"Файл: {self.getFileNameFromPath(filename)}")
+            self.statusBar.showMessage(f"Загружен файл: {filename}")
+        else:
+            QMessageBox.warning(
+                self, "Ошибка загрузки", "Не удалось загрузить фигуры из файла."
+            )
 
-    def saveFile(self):
-        if not self.current_file:
-            return self.saveFileAs()
+    def onDxfImportFailed(self, message):
+        self.finishDxfImport()
+        QMessageBox.critical(
+            self,
+            "Ошибка загрузки",
+            f"Произошла ошибка при загрузке файла:\n{message}",
+        )
 
-        try:
-            success = save_to_dxf_advanced(self.canvas.shapes, self.current_file)
-            if success:
-                self.statusBar.showMessage(f"Файл сохранен: {self.current_file}")
-                return True
-            else:
-                QMessageBox.warning(
-                    self, "Ошибка сохранения", "Не удалось сохранить файл."
-                )
-                return False
-        except Exception as e:
-            QMessageBox.critical(
-                self,
-                "Ошибка сохранения",
-                f"Произошла ошибка при сохранении файла:\n{str(e)}",
-            )
-            return False
+    def cancelDxfImport(self, wait=False):
+        """Отменяет идущий импорт DXF; уже загруженные фигуры остаются"""
+        if self.dxf_import is None:
+            return
+        self.dxf_import.cancel()
+        if wait:
+            self.dxf_import.wait()
+        self.finishDxfImport()
+        self.statusBar.showMessage("Загрузка файла отменена")
+
+    def finishDxfImport(self):
+        self.dxf_import = None
+        self.recovery_file = None
+        self.importProgressBar.hide()
+        self.cancelImportButton.hide()
+
+    def saveFile(self, wait=False):
+        if not self.current_file:
+            return self.saveFileAs(wait)
+        return self.startDxfSave(self.current_file, wait)
 
-    def saveFileAs(self):
+    def saveFileAs(self, wait=False):
         options = QFileDialog.Options()
         filename, _ = QFileDialog.getSaveFileName(
             self, "Сохранить как DXF файл", "", "DXF Files (*.dxf)", options=options
@@ -485,31 +638,52 @@ class MainWindow(QMainWindow):
         if filename:
             if not filename.lower().endswith(".dxf"):
                 filename += ".dxf"
-
-            try:
-                success = save_to_dxf_advanced(self.canvas.shapes, filename)
-                if success:
-                    self.current_file = filename
-                    self.fileNameLabel.setText(
-                        f"Файл: {self.getFileNameFromPath(filename)}"
-                    )
-                    self.statusBar.showMessage(f"Файл сохранен: {filename}")
-                    return True
-                else:
-                    QMessageBox.warning(
-                        self, "Ошибка сохранения", "Не удалось сохранить файл."
-                    )
-                    return False
-            except Exception as e:
-                QMessageBox.critical(
-                    self,
-                    "Ошибка сохранения",
-                    f"Произошла ошибка при сохранении файла:\n{str(e)}",
-                )
-                return False
+            return self.startDxfSave(filename, wait)
 
         return False
 
+    def startDxfSave(self, filename, wait=False):
+        """Сохраняет фигуры в фоне; с wait дожидается записи и возвращает её успех.
+
+        Без wait возвращает True, если сохранение началось: данные фигур уже
+        сняты, и их можно изменять, пока файл записывается.
+        """
+        # Файлы записываются по очереди, чтобы сохранения не обгоняли друг друга
+        self.waitDxfSave()
+        try:
+            self.dxf_save = DxfSave(self.canvas.shapes, filename, self)
+        except Exception as e:
+            self.onDxfSaveFailed(str(e))
+            return False
+        self.dxf_save.finished.connect(self.onDxfSaveFinished)
+        self.dxf_save.failed.connect(self.onDxfSaveFailed)
+        self.statusBar.showMessage(f"Сохранение файла: {filename}")
+        self.dxf_save.start()
+        if wait:
+            return self.waitDxfSave()
+        return True
+
+    def waitDxfSave(self):
+        """Дожидается идущего сохранения; возвращает False, если оно не удалось"""
+        if self.dxf_save is None:
+            return True
+        return self.dxf_save.wait()
+
+    def onDxfSaveFinished(self):
+        filename = self.dxf_save.filename
+        self.dxf_save = None
+        self.current_file = filename
+        self.fileNameLabel.setText(f"Файл: {self.getFileNameFromPath(filename)}")
+        self.statusBar.showMessage(f"Файл сохранен: {filename}")
+
+    def onDxfSaveFailed(self, message):
+        self.dxf_save = None
+        QMessageBox.critical(
+            self,
+            "Ошибка сохранения",
+            f"Произошла ошибка при сохранении файла:\n{message}",
+        )
+
     def confirmSaveChanges(self):
         reply = QMessageBox.question(
             self,
@@ -536,7 +710,7 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         if self.canvas.shapes and self.confirmSaveChanges():
-            if self.saveFile():
+            if self.saveFile(wait=True):
                 event.accept()
             else:
                 reply = QMessageBox.question(
@@ -554,6 +728,17 @@ class MainWindow(QMainWindow):
         else:
             event.accept()
 
+        if event.isAccepted():
+            self.cancelDxfImport(wait=True)
+            self.waitDxfSave()
+            self.autosaveTimer.stop()
+            if self.dxf_autosave is not None:
+                self.dxf_autosave.wait()
+            # Работа завершена штатно, файл восстановления больше не нужен
+            if os.path.exists(self.autosave_file):
+                os.remove(self.autosave_file)
+            self.autosave_lock.unlock()
+
 
 def apply_material_theme(app, dark=False):
     app.setStyle(QStyleFactory.create("Fusion"))